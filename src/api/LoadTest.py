@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine
+
+from src.database.Encryption import VaultKey
+from src.database.MasterKey import MasterKeyStore
+
+# Доля запросов каждого вида в смешанной нагрузке
+SCENARIOS = {
+    "read": 0.6,
+    "list": 0.25,
+    "search": 0.1,
+    "create": 0.05,
+}
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def _seed(client: httpx.AsyncClient, rows: int) -> list:
+    ids = []
+    for start in range(0, rows, 1000):
+        count = min(1000, rows - start)
+        response = await client.post("/records/bulk", json=[
+            {"login": f"load{start + i}", "password": "password", "notes": f"load test note {start + i}"}
+            for i in range(count)])
+        response.raise_for_status()
+        ids.extend(response.json()["ids"])
+    return ids
+
+
+async def _request(client: httpx.AsyncClient, scenario: str, ids: list, rng: random.Random) -> httpx.Response:
+    if scenario == "read":
+        return await client.get(f"/records/{rng.choice(ids)}")
+    if scenario == "list":
+        return await client.get("/records", params={"after_id": rng.choice(ids), "limit": 100})
+    if scenario == "search":
+        return await client.get("/records/search", params={"q": f"load{rng.randrange(100)}"})
+    return await client.post("/records", json={"login": "created", "password": "password", "notes": ""})
+
+
+async def run_load(url: str, requests: int, concurrency: int, rows: int, scenario: str = None,
+                   token: str = None) -> dict:
+    """
+    Нагружает запущенный сервер и возвращает req/s, задержки и количество ошибок.
+
+    Args:
+        url (str): Адрес сервера.
+        requests (int): Общее количество запросов.
+        concurrency (int): Количество одновременных клиентов.
+        rows (int): Сколько записей создать перед замером.
+        scenario (str): Один вид запросов из SCENARIOS; None - смешанная нагрузка.
+        token (str): Токен API, если он задан на сервере.
+
+    Returns:
+        dict: requests, errors, seconds, rps, p50_ms, p99_ms, max_ms.
+    """
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=30) as client:
+        ids = await _seed(client, rows)
+        names, weights = zip(*SCENARIOS.items())
+        latencies, errors = [], 0
+        remaining = requests
+
+        async def worker(seed: int):
+            nonlocal remaining, errors
+            rng = random.Random(seed)
+            while remaining > 0:
+                remaining -= 1
+                kind = scenario or rng.choices(names, weights)[0]
+                start = time.perf_counter()
+                try:
+                    response = await _request(client, kind, ids, rng)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(seed) for seed in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+def _spawn_server(port: int, workers: int, directory: str) -> subprocess.Popen:
+    # Свой .env во временном каталоге, чтобы не трогать .env рабочего каталога
+    database_url = f"sqlite:///{os.path.join(directory, 'load.db')}"
+    # Одноразовый мастер-пароль: сервер разблокирует хранилище при старте и принимает записи
+    password, password_file = secrets.token_urlsafe(), os.path.join(directory, "vault_password")
+    engine = create_engine(database_url)
+    MasterKeyStore(engine, vault=VaultKey()).setup(password)
+    engine.dispose()
+    with open(password_file, "w") as f:
+        f.write(password + "\n")
+    with open(os.path.join(directory, ".env"), "w") as f:
+        f.write(f"SQLITE_PATH={database_url}\nAPI_TOKEN=\nVAULT_PASSWORD_FILE={password_file}\n")
+    env = dict(os.environ, SQLITE_PATH=database_url, API_TOKEN="", VAULT_PASSWORD_FILE=password_file)
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "src.api.Server:app", "--port", str(port),
+                             "--workers", str(workers), "--loop", "uvloop", "--http", "httptools",
+                             "--no-access-log", "--log-level", "warning"], env=env, cwd=directory)
+
+
+async def _wait_for(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while True:
+            try:
+                (await client.get("/records", params={"limit": 1})).raise_for_status()
+                return
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный нагрузочный тест HTTP API (req/s и p99)")
+    parser.add_argument("--url", default=None, help="адрес запущенного сервера (по умолчанию запускается свой)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="воркеры uvicorn для запускаемого сервера")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("-n", "--requests", type=int, default=5000)
+    parser.add_argument("-c", "--concurrency", type=int, default=64)
+    parser.add_argument("--rows", type=int, default=10000, help="записей создается перед замером")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default=None, help="только один вид запросов")
+    parser.add_argument("--token", default=os.getenv("API_TOKEN"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        server = None
+        url = args.url
+        if url is None:
+            url = f"http://127.0.0.1:{args.port}"
+            # Запуск из временного каталога: своя база, рабочие данные не трогаются
+            root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")]))
+            server = _spawn_server(args.port, args.workers, directory)
+        try:
+            if server is not None:
+                asyncio.run(_wait_for(url))
+            result = asyncio.run(run_load(url, args.requests, args.concurrency, args.rows, args.scenario,
+                                          None if server is not None else args.token))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    print(f"{result['requests']} requests, {result['errors']} errors in {result['seconds']:.2f}s")
+    print(f"{result['rps']:.0f} req/s, p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms, "
+          f"max {result['max_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
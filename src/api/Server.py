@@ -0,0 +1,259 @@
+import hmac
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import orjson
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import event
+
+from src.core.Database import DataBase
+from src.core.Metrics import metrics
+from src.core.Services import services
+from src.database.AsyncBbpBase import AsyncBbpCRUD
+from src.database.BbpBase import BbpUpdateSchema, PROJECTION_COLUMNS
+from src.database.Breach import BreachedPasswordError
+from src.database.Encryption import VaultLockedError
+from src.database.MasterKey import MasterKeyStore
+
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+
+
+class BbpCreateSchema(BaseModel):
+    """
+    Pydantic модель для создания записи в таблице "bbp".
+    """
+    login: str
+    password: str
+    notes: str = ""
+
+
+class BulkDeleteSchema(BaseModel):
+    """
+    Pydantic модель для массового удаления записей.
+    """
+    ids: List[int]
+
+
+def _record(record) -> dict:
+    return {"id": record.id, "login": record.login, "password": record.password, "notes": record.notes}
+
+
+def _tune_sqlite(dbapi_connection, connection_record) -> None:
+    # WAL позволяет читать параллельно с записью из нескольких воркеров uvicorn,
+    # busy_timeout - ждать блокировку записи вместо немедленной ошибки
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+def _unlock_vault(engine, password: str) -> None:
+    """
+    Разблокирует vault_key мастер-паролем в этом процессе.
+
+    Перекалибровка KDF отключена: ее выполняет клиент, а воркеры не должны
+    одновременно перезаписывать vault_meta.
+    """
+    store = MasterKeyStore(engine)
+    if not store.initialized:
+        raise RuntimeError("Vault master password is not set; set it in the application first")
+    if not store.unlock(password, retune=False):
+        raise RuntimeError("Wrong vault master password")
+
+
+def _read_password_file(path: str) -> Optional[str]:
+    if not path:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return f.readline().rstrip("\r\n") or None
+
+
+def create_app(database: DataBase = None, api_token: Optional[str] = None, breach_index=None,
+               master_password: Optional[str] = None) -> FastAPI:
+    """
+    Создает приложение FastAPI для работы с таблицей "bbp".
+
+    Движок и пул соединений создаются один раз на процесс и используются всеми
+    запросами этого процесса (у каждого воркера uvicorn свой пул). Конфигурация и
+    база данных разрешаются при старте воркера, а не при импорте модуля.
+
+    Args:
+        database (DataBase): База данных; по умолчанию services.database.
+        api_token (Optional[str]): Токен для заголовка "Authorization: Bearer ...";
+            по умолчанию API_TOKEN из .env. Если не задан, проверка отключена.
+        breach_index (BreachIndex): Индекс утечек для проверки новых паролей; если database
+            не передана, по умолчанию services.breach (BREACH_INDEX_PATH из .env).
+        master_password (Optional[str]): Мастер-пароль, которым каждый воркер разблокирует
+            хранилище при старте; если database не передана, по умолчанию первая строка
+            файла VAULT_PASSWORD_FILE из .env. Без него хранилище остается заблокированным,
+            и запросы с паролями получают 423.
+
+    Returns:
+        FastAPI: Приложение.
+    """
+    state = {}
+
+    def get_database() -> DataBase:
+        if "database" not in state:
+            state["database"] = database or services.database
+        return state["database"]
+
+    def get_api_token() -> Optional[str]:
+        if "api_token" not in state:
+            state["api_token"] = api_token if api_token is not None else services.config.settings.API_TOKEN or None
+        return state["api_token"]
+
+    def get_breach_index():
+        if "breach_index" not in state:
+            # Явно переданная база (тесты, встраивание) не подключает индекс из .env
+            state["breach_index"] = breach_index if breach_index is not None or database is not None \
+                else services.breach
+        return state["breach_index"]
+
+    def get_master_password() -> Optional[str]:
+        if master_password is not None or database is not None:
+            return master_password
+        return _read_password_file(services.config.settings.VAULT_PASSWORD_FILE)
+
+    async def get_crud() -> AsyncBbpCRUD:
+        crud = state.get("crud")
+        if crud is None:
+            database = get_database()
+            engine = await database.async_engine
+            if engine.dialect.name == "sqlite" and not event.contains(engine.sync_engine, "connect", _tune_sqlite):
+                event.listen(engine.sync_engine, "connect", _tune_sqlite)
+            await database.create_db_and_tables_async()
+            crud = state["crud"] = AsyncBbpCRUD(session_factory=await database.async_session_maker(),
+                                                breach_index=get_breach_index())
+        return crud
+
+    async def check_token(authorization: Optional[str] = Header(None)) -> None:
+        token = get_api_token()
+        # Сравнение за постоянное время: по длительности ответа токен не подобрать
+        if token and not hmac.compare_digest((authorization or "").encode(), f"Bearer {token}".encode()):
+            raise HTTPException(status_code=401, detail="Invalid or missing API token")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await get_crud()  # Схема и пул создаются при старте воркера, а не на первом запросе
+        password = get_master_password()
+        if password:
+            # Вывод ключа занимает сотни миллисекунд: не в цикле событий
+            await run_in_threadpool(_unlock_vault, get_database().engine, password)
+        yield
+        await get_database().dispose()
+
+    app = FastAPI(title="KrakenSecure", default_response_class=ORJSONResponse, lifespan=lifespan,
+                  dependencies=[Depends(check_token)])
+
+    @app.exception_handler(VaultLockedError)
+    async def vault_locked(request: Request, exc: VaultLockedError):
+        return ORJSONResponse({"detail": str(exc)}, status_code=423)
+
+    @app.exception_handler(BreachedPasswordError)
+    async def breached_password(request: Request, exc: BreachedPasswordError):
+        return ORJSONResponse({"detail": str(exc)}, status_code=422)
+
+    @app.get("/records")
+    async def list_records(after_id: Optional[int] = None, limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+                           columns: str = "id,login", crud: AsyncBbpCRUD = Depends(get_crud)):
+        """Страница записей (keyset-пагинация), по умолчанию только id и login"""
+        names = tuple(name for name in columns.split(",") if name)
+        if not names or not set(names) <= set(PROJECTION_COLUMNS):
+            raise HTTPException(status_code=422, detail=f"columns must be a subset of {PROJECTION_COLUMNS}")
+        rows = await crud.read_rows(names, after_id, limit)
+        next_after_id = rows[-1].id if len(rows) == limit and "id" in names else None
+        return {"items": [row._asdict() for row in rows], "next_after_id": next_after_id}
+
+    @app.get("/records/export")
+    async def export_records(crud: AsyncBbpCRUD = Depends(get_crud)):
+        """Все записи в формате NDJSON, потоком без загрузки таблицы в память"""
+        async def lines():
+            batch = []
+            async for record in crud.iter_all(EXPORT_BATCH_SIZE):
+                batch.append(orjson.dumps(_record(record)))
+                if len(batch) == EXPORT_BATCH_SIZE:
+                    yield b"\n".join(batch) + b"\n"
+                    batch = []
+            if batch:
+                yield b"\n".join(batch) + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/records/search")
+    async def search_records(q: str, limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+                             crud: AsyncBbpCRUD = Depends(get_crud)):
+        """Полнотекстовый поиск по логину и заметкам"""
+        return [_record(record) for record in await crud.search(q, limit)]
+
+    # Массовые маршруты объявлены раньше /records/{record_id}, иначе "bulk" попадет в record_id
+    @app.post("/records/bulk", status_code=201)
+    async def bulk_create(records: List[BbpCreateSchema], crud: AsyncBbpCRUD = Depends(get_crud)):
+        """Создает записи одной транзакцией, возвращает их ID в том же порядке"""
+        return {"ids": await crud.bulk_create(record.model_dump() for record in records)}
+
+    @app.patch("/records/bulk")
+    async def bulk_update(updates: Dict[int, BbpUpdateSchema], crud: AsyncBbpCRUD = Depends(get_crud)):
+        return {"updated": await crud.bulk_update(updates)}
+
+    @app.post("/records/bulk-delete")
+    async def bulk_delete(data: BulkDeleteSchema, crud: AsyncBbpCRUD = Depends(get_crud)):
+        return {"deleted": await crud.bulk_delete(data.ids)}
+
+    @app.get("/records/{record_id}")
+    async def read_record(record_id: int, crud: AsyncBbpCRUD = Depends(get_crud)):
+        record = await crud.read(record_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Record not found")
+        return _record(record)
+
+    @app.post("/records", status_code=201)
+    async def create_record(data: BbpCreateSchema, crud: AsyncBbpCRUD = Depends(get_crud)):
+        return _record(await crud.create(data.login, data.password, data.notes))
+
+    @app.patch("/records/{record_id}")
+    async def update_record(record_id: int, data: BbpUpdateSchema, crud: AsyncBbpCRUD = Depends(get_crud)):
+        record = await crud.update(record_id, data)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Record not found")
+        return _record(record)
+
+    @app.delete("/records/{record_id}", status_code=204)
+    async def delete_record(record_id: int, crud: AsyncBbpCRUD = Depends(get_crud)):
+        if not await crud.delete(record_id):
+            raise HTTPException(status_code=404, detail="Record not found")
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def export_metrics():
+        """Метрики в текстовом формате Prometheus (пусто, пока сбор выключен)"""
+        return metrics.to_prometheus()
+
+    return app
+
+
+app = create_app()
+
+
+def main():
+    import argparse
+    import os
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="HTTP API хранилища паролей")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="количество процессов uvicorn (по умолчанию число CPU)")
+    args = parser.parse_args()
+
+    uvicorn.run("src.api.Server:app", host=args.host, port=args.port, workers=args.workers,
+                loop="uvloop", http="httptools", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
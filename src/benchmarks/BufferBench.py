@@ -0,0 +1,78 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.utils.Crypt import FileEncryptor
+
+CONFIGURATIONS = [
+    (f"{name} {buffer_name}", format_version, buffer_size, use_mmap)
+    for name, format_version in (("cbc", FileEncryptor.FORMAT_CBC), ("gcm", FileEncryptor.FORMAT_SEGMENTED))
+    for buffer_name, buffer_size, use_mmap in (
+        ("4 KiB", 4 * 1024, False),
+        ("1 MiB", 1024 * 1024, False),
+        ("1 MiB mmap", 1024 * 1024, True),
+    )
+]
+
+
+def run_child(path: str, format_version: int, buffer_size: int, use_mmap: bool) -> dict:
+    """Encrypt and decrypt path once and report MB/s and peak RSS of this process"""
+    encryptor = FileEncryptor("benchmark-password", format_version, buffer_size=buffer_size,
+                              use_mmap=use_mmap)
+    encryptor.start_session()
+    size = os.path.getsize(path)
+
+    start = time.perf_counter()
+    encryptor._encrypt_file(path, path + ".encrypted")
+    encrypt_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encryptor._decrypt_file(path + ".encrypted", path + ".decrypted")
+    decrypt_time = time.perf_counter() - start
+
+    return {
+        "encrypt_mb_s": size / encrypt_time / 1e6,
+        "decrypt_mb_s": size / decrypt_time / 1e6,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def bench_buffers(size_mib: int = 256) -> dict:
+    """Run every configuration in a fresh interpreter so peak RSS is not shared"""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.bin")
+        with open(path, 'wb') as f:
+            for _ in range(size_mib):
+                f.write(os.urandom(1024 * 1024))
+
+        for name, format_version, buffer_size, use_mmap in CONFIGURATIONS:
+            output = subprocess.run(
+                [sys.executable, "-m", "src.benchmarks.BufferBench", "--child", path,
+                 str(format_version), str(buffer_size), str(int(use_mmap))],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[name] = json.loads(output)
+    return results
+
+
+def main():
+    if len(sys.argv) == 6 and sys.argv[1] == "--child":
+        print(json.dumps(run_child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), bool(int(sys.argv[5])))))
+        return
+
+    size_mib = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    print(f"File: {size_mib} MiB")
+    print(f"{'configuration':<18}{'encrypt MB/s':>14}{'decrypt MB/s':>14}{'peak RSS MiB':>14}")
+    for name, result in bench_buffers(size_mib).items():
+        print(f"{name:<18}{result['encrypt_mb_s']:>14.1f}{result['decrypt_mb_s']:>14.1f}"
+              f"{result['peak_rss_mib']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
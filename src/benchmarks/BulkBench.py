@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+from src.database.BbpBase import BbpTableBase, BbpCRUD, BbpUpdateSchema
+from src.database.Encryption import vault_key
+
+
+def _rate(rows: int, function) -> float:
+    start = time.perf_counter()
+    function()
+    return rows / (time.perf_counter() - start)
+
+
+def bench_bulk(rows: int = 2000) -> dict:
+    """rows/sec of the per-row CRUD methods against the bulk ones on a file database"""
+    records = [(f"user{i}", f"password{i}", f"note {i}") for i in range(rows)]
+    results = {}
+
+    # Одноразовый ключ: записи шифруются, как в приложении
+    with tempfile.TemporaryDirectory() as directory, vault_key.temporary_unlock():
+        for name in ("per_row", "bulk"):
+            engine = create_engine(f"sqlite:///{os.path.join(directory, name + '.db')}")
+            BbpTableBase.metadata.create_all(engine)
+            crud = BbpCRUD(engine)
+
+            if name == "per_row":
+                ids = []
+                results["create", name] = _rate(rows, lambda: ids.extend(crud.create(*r).id for r in records))
+                results["update", name] = _rate(rows, lambda: [
+                    crud.update(record_id, BbpUpdateSchema(notes="updated")) for record_id in ids])
+                results["delete", name] = _rate(rows, lambda: [crud.delete(record_id) for record_id in ids])
+            else:
+                ids = []
+                results["create", name] = _rate(rows, lambda: ids.extend(crud.bulk_create(records)))
+                results["update", name] = _rate(rows, lambda: crud.bulk_update(
+                    {record_id: BbpUpdateSchema(notes="updated") for record_id in ids}))
+                results["delete", name] = _rate(rows, lambda: crud.bulk_delete(ids))
+            engine.dispose()
+
+    return results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    results = bench_bulk(rows)
+    print(f"Rows: {rows}")
+    print(f"{'operation':<10}{'per-row rows/s':>16}{'bulk rows/s':>16}{'speedup':>10}")
+    for operation in ("create", "update", "delete"):
+        per_row, bulk = results[operation, "per_row"], results[operation, "bulk"]
+        print(f"{operation:<10}{per_row:>16.0f}{bulk:>16.0f}{bulk / per_row:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
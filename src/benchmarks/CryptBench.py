@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+import time
+
+from src.utils.Crypt import FileEncryptor
+
+
+def _make_files(directory: str, count: int, size: int) -> list[str]:
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"file_{i}.bin")
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+        paths.append(path)
+    return paths
+
+
+def bench_files_per_second(count: int = 50, size: int = 4096) -> dict:
+    """Compare per-file PBKDF2 against a session master key on many small files"""
+    password = "benchmark-password"
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = _make_files(directory, count, size)
+
+        encryptor = FileEncryptor(password)
+        start = time.perf_counter()
+        for path in paths:
+            encryptor.encrypt_file(path, path + ".encrypted")
+        results["per_file_kdf"] = count / (time.perf_counter() - start)
+
+        encryptor.start_session()
+        start = time.perf_counter()
+        for path in paths:
+            encryptor.encrypt_file(path, path + ".encrypted")
+        results["session"] = count / (time.perf_counter() - start)
+        encryptor.end_session()
+
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    results = bench_files_per_second(count)
+    print(f"Files: {count}")
+    print(f"per-file KDF: {results['per_file_kdf']:10.1f} files/sec")
+    print(f"session:      {results['session']:10.1f} files/sec")
+    print(f"speedup:      {results['session'] / results['per_file_kdf']:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import gc
+import sys
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, insert
+
+from src.database.BbpBase import BbpTableBase, BbpCRUD
+from src.database.Encryption import vault_key
+
+
+def _fill(engine, rows: int) -> None:
+    with engine.begin() as connection:
+        connection.execute(insert(BbpTableBase), [
+            {"login": f"user{i}", "password": f"password-{i}", "notes": f"note {i} " + "x" * 200}
+            for i in range(rows)
+        ])
+
+
+def _measure(function, repeat: int):
+    """best latency over repeat runs and peak memory of one run holding the result"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return best, peak
+
+
+def bench_projection(rows: int = 50000, repeat: int = 3) -> dict:
+    """read_all (ORM objects) against read_rows (id, login namedtuples) for a list view"""
+    engine = create_engine("sqlite:///:memory:")
+    BbpTableBase.metadata.create_all(engine)
+    crud = BbpCRUD(engine)
+    # Одноразовый ключ: пароли шифруются, и read_all платит за их расшифровку
+    with vault_key.temporary_unlock():
+        _fill(engine, rows)
+        results = {
+            "read_all": _measure(crud.read_all, repeat),
+            "read_rows": _measure(crud.read_rows, repeat),
+        }
+    engine.dispose()
+    return results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    results = bench_projection(rows)
+    print(f"Rows: {rows}")
+    for name, (seconds, peak) in results.items():
+        print(f"{name:<10} {seconds * 1000:8.1f} ms  peak {peak / 2 ** 20:8.1f} MiB")
+    (orm_time, orm_peak), (rows_time, rows_peak) = results["read_all"], results["read_rows"]
+    print(f"speedup:   {orm_time / rows_time:8.1f}x  memory {orm_peak / rows_peak:6.1f}x less")
+
+
+if __name__ == "__main__":
+    main()
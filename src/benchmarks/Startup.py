@@ -0,0 +1,101 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Точки входа: модуль, который импортирует процесс при запуске
+TARGETS = {
+    "cli": "src.utils.Crypt",
+    "api": "src.api.Server",
+    "desktop": "src.ui.ui",
+}
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Разбирает вывод -X importtime.
+
+    Returns:
+        list: (модуль, собственное время в мкс, накопленное время в мкс, глубина вложенности).
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(own), int(cumulative), depth))
+    return entries
+
+
+def measure(module: str, repeat: int = 5) -> dict:
+    """
+    Холодный запуск интерпретатора с импортом модуля в пустом временном каталоге.
+
+    Returns:
+        dict: wall_ms - лучшее время процесса, import_ms - накопленное время импорта
+            модуля, created - файлы, созданные импортом в рабочем каталоге
+            (ожидается пустой список), slowest - самые дорогие прямые зависимости.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE="1")
+    best_wall, best_entries, created = float("inf"), [], []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                    cwd=directory, env=env, capture_output=True, text=True, timeout=120)
+            wall = time.perf_counter() - start
+            if result.returncode != 0:
+                raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+            created = sorted(os.listdir(directory))
+        if wall < best_wall:
+            best_wall, best_entries = wall, parse_importtime(result.stderr)
+
+    total = next((cumulative for name, _, cumulative, depth in best_entries if name == module and depth == 0), 0)
+    slowest = sorted(((name, cumulative) for name, _, cumulative, depth in best_entries if depth == 1),
+                     key=lambda item: item[1], reverse=True)[:10]
+    return {"wall_ms": best_wall * 1000, "import_ms": total / 1000, "created": created,
+            "slowest": [(name, cumulative / 1000) for name, cumulative in slowest]}
+
+
+def bench_startup(quick: bool, repeat: int) -> dict:
+    """Cold start of every entry point: wall time and import time of the entry module"""
+    results = {}
+    for target, module in TARGETS.items():
+        measured = measure(module, 1 if quick else repeat)
+        results[f"startup.{target}.wall"] = {"value": measured["wall_ms"], "unit": "ms", "higher_is_better": False}
+        results[f"startup.{target}.import"] = {"value": measured["import_ms"], "unit": "ms",
+                                               "higher_is_better": False}
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.benchmarks.Startup",
+                                     description="Cold-start time of the CLI, API and desktop entry points")
+    parser.add_argument("targets", nargs="*", metavar="target",
+                        help=f"entry points (default: all of {', '.join(TARGETS)})")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per entry point, the best one is kept")
+    args = parser.parse_args(argv)
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+
+    side_effects = False
+    for target in args.targets or TARGETS:
+        measured = measure(TARGETS[target], args.repeat)
+        print(f"{target}: {measured['wall_ms']:.0f} ms wall, {measured['import_ms']:.0f} ms import "
+              f"({TARGETS[target]})")
+        for name, milliseconds in measured["slowest"]:
+            print(f"    {milliseconds:8.1f} ms  {name}")
+        if measured["created"]:
+            side_effects = True
+            print(f"    import created files: {', '.join(measured['created'])}")
+    return 1 if side_effects else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
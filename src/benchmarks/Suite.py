@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.benchmarks.Startup import bench_startup
+from src.database.AsyncBbpBase import AsyncBbpCRUD
+from src.database.BbpBase import BbpTableBase, BbpCRUD, BbpUpdateSchema
+from src.database.Encryption import vault_key
+from src.utils.Crypt import FileEncryptor
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+# (full run, --quick run)
+FILE_SIZES = ((64 * 1024, 1024 * 1024, 16 * 1024 * 1024), (64 * 1024, 1024 * 1024))
+BUFFER_SIZES = ((64 * 1024, 1024 * 1024), (64 * 1024, 1024 * 1024))
+ROW_COUNTS = ((1000, 10000, 100000), (1000,))
+POINT_OPERATIONS = 200  # Количество одиночных create/read/update/delete в каждом замере
+
+
+def _metric(value: float, unit: str, higher_is_better: bool = True) -> dict:
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def _best(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_crypt(directory: str, quick: bool, repeat: int) -> dict:
+    """FileEncryptor MB/s for every file size and buffer size, KDF cost excluded by a session"""
+    results = {}
+    for size in FILE_SIZES[quick]:
+        plain = os.path.join(directory, f"plain_{size}")
+        with open(plain, "wb") as f:
+            f.write(os.urandom(size))
+        encrypted, decrypted = plain + ".encrypted", plain + ".decrypted"
+        for buffer_size in BUFFER_SIZES[quick]:
+            encryptor = FileEncryptor("benchmark-password", buffer_size=buffer_size)
+            encryptor.start_session()
+            name = f"crypt.size={size // 1024}KiB.buffer={buffer_size // 1024}KiB"
+            seconds = _best(lambda: encryptor.encrypt_file(plain, encrypted), repeat)
+            results[f"{name}.encrypt"] = _metric(size / seconds / 2 ** 20, "MB/s")
+            seconds = _best(lambda: encryptor.decrypt_file(encrypted, decrypted), repeat)
+            results[f"{name}.decrypt"] = _metric(size / seconds / 2 ** 20, "MB/s")
+            encryptor.end_session()
+    return results
+
+
+def bench_kdf(repeat: int) -> dict:
+    """Cost of one PBKDF2 master key derivation (FileEncryptor.start_session)"""
+    encryptor = FileEncryptor("benchmark-password")
+
+    def derive():
+        encryptor.start_session()
+        encryptor.end_session()
+
+    return {"kdf.pbkdf2": _metric(_best(derive, repeat) * 1000, "ms", higher_is_better=False)}
+
+
+def _crud_operations(crud: BbpCRUD, rows: int) -> dict:
+    records = [(f"user{i}", f"password{i}", f"note {i}") for i in range(rows)]
+    results = {}
+
+    start = time.perf_counter()
+    ids = crud.bulk_create(records)
+    results["bulk_create"] = rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    crud.read_all()
+    results["read_all"] = rows / (time.perf_counter() - start)
+
+    sample = random.Random(0).sample(ids, min(POINT_OPERATIONS, rows))
+    start = time.perf_counter()
+    for record_id in sample:
+        crud.read(record_id)
+    results["read"] = len(sample) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for record_id in sample:
+        crud.update(record_id, BbpUpdateSchema(notes="updated"))
+    results["update"] = len(sample) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    crud.bulk_update({record_id: BbpUpdateSchema(notes="bulk updated") for record_id in ids})
+    results["bulk_update"] = rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for record_id in sample:
+        crud.delete(record_id)
+    results["delete"] = len(sample) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    created = [crud.create(*record).id for record in records[:len(sample)]]
+    results["create"] = len(created) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    crud.bulk_delete(ids + created)
+    results["bulk_delete"] = (rows + len(created)) / (time.perf_counter() - start)
+    return results
+
+
+def bench_crud(directory: str, quick: bool) -> dict:
+    """BbpCRUD operations per second for every row count on in-memory and file SQLite"""
+    results = {}
+    for rows in ROW_COUNTS[quick]:
+        for storage in ("memory", "file"):
+            url = "sqlite://" if storage == "memory" else f"sqlite:///{os.path.join(directory, f'crud_{rows}.db')}"
+            engine = create_engine(url)
+            BbpTableBase.metadata.create_all(engine)
+            for operation, rate in _crud_operations(BbpCRUD(engine), rows).items():
+                results[f"crud.{storage}.rows={rows}.{operation}"] = _metric(rate, "ops/s")
+            engine.dispose()
+    return results
+
+
+async def _async_reads(url: str, ids: list) -> float:
+    engine = create_async_engine(url)
+    crud = AsyncBbpCRUD(engine)
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(crud.read(record_id) for record_id in ids))
+        return len(ids) / (time.perf_counter() - start)
+    finally:
+        await engine.dispose()
+
+
+def bench_engines(directory: str, quick: bool) -> dict:
+    """Point reads through the sync engine against concurrent reads through the async engine"""
+    rows = ROW_COUNTS[quick][0]
+    path = os.path.join(directory, "engines.db")
+    engine = create_engine(f"sqlite:///{path}")
+    BbpTableBase.metadata.create_all(engine)
+    crud = BbpCRUD(engine)
+    ids = crud.bulk_create((f"user{i}", "password", "note") for i in range(rows))
+    sample = random.Random(0).sample(ids, min(POINT_OPERATIONS, rows))
+
+    start = time.perf_counter()
+    for record_id in sample:
+        crud.read(record_id)
+    results = {"engine.sync.read": _metric(len(sample) / (time.perf_counter() - start), "ops/s")}
+    engine.dispose()
+
+    rate = asyncio.run(_async_reads(f"sqlite+aiosqlite:///{path}", sample))
+    results["engine.async.read"] = _metric(rate, "ops/s")
+    return results
+
+
+def run_suite(quick: bool = False, repeat: int = 3, only: str = None) -> dict:
+    """
+    Runs every benchmark group (crypt, kdf, crud, engine, startup) and returns name -> metric.
+    """
+    groups = {
+        "crypt": lambda directory: bench_crypt(directory, quick, repeat),
+        "kdf": lambda directory: bench_kdf(repeat),
+        "crud": lambda directory: bench_crud(directory, quick),
+        "engine": lambda directory: bench_engines(directory, quick),
+        "startup": lambda directory: bench_startup(quick, repeat),
+    }
+    results = {}
+    # Один ключ на весь прогон: группы crud и engine шифруют пароли, как приложение
+    with tempfile.TemporaryDirectory() as directory, vault_key.temporary_unlock():
+        for name, group in groups.items():
+            if only is None or name == only:
+                results.update(group(directory))
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """
+    Returns (name, baseline, current, change) for every metric worse than baseline by more than threshold.
+    Metrics missing from either side are ignored.
+    """
+    regressions = []
+    for name, metric in results.items():
+        if name not in baseline:
+            continue
+        old, new = baseline[name]["value"], metric["value"]
+        if old <= 0:
+            continue
+        change = (new - old) / old
+        worse = -change if metric["higher_is_better"] else change
+        if worse > threshold:
+            regressions.append((name, old, new, change))
+    return regressions
+
+
+def _environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "sqlite": sqlite3.sqlite_version,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.benchmarks",
+                                     description="Run the benchmark suite and compare it with a baseline")
+    parser.add_argument("--quick", action="store_true", help="small sizes only (about a few seconds)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing, the best one is kept")
+    parser.add_argument("--only", choices=["crypt", "kdf", "crud", "engine", "startup"], help="run a single group")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file ('-' for stdout)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.quick, args.repeat, args.only)
+    report = {"environment": _environment(), "results": results}
+
+    for name, metric in results.items():
+        print(f"{name:<52}{metric['value']:>14.1f} {metric['unit']}", file=sys.stderr)
+    if args.output:
+        text = json.dumps(report, indent=2, sort_keys=True)
+        if args.output == "-":
+            print(text)
+        else:
+            with open(args.output, "w") as f:
+                f.write(text + "\n")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline to create one", file=sys.stderr)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for name, old, new, change in regressions:
+        print(f"REGRESSION {name}: {old:.1f} -> {new:.1f} ({change:+.0%})", file=sys.stderr)
+    print(f"{len(regressions)} regression(s), threshold {args.threshold:.0%}", file=sys.stderr)
+    return 1 if regressions else 0
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+from sqlalchemy import create_engine, insert
+
+from src.database.BbpBase import BbpTableBase, BbpCRUD
+from src.database.Encryption import vault_key
+
+
+def _fill(engine, rows: int) -> None:
+    with engine.begin() as connection:
+        connection.execute(insert(BbpTableBase), [
+            {"login": f"user{i}", "password": f"password-{i}", "notes": f"note {i}"}
+            for i in range(rows)
+        ])
+
+
+def _time_read_all(crud: BbpCRUD, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        crud.read_all()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_read_all(rows: int = 20000, repeat: int = 3) -> dict:
+    """read_all latency with plaintext passwords and with EncryptedString passwords"""
+    results = {}
+    for name, unlocked in (("plaintext", False), ("encrypted", True)):
+        if unlocked:
+            vault_key.unlock("benchmark-password", os.urandom(16))
+        vault_key.allow_plaintext = not unlocked
+        engine = create_engine("sqlite:///:memory:")
+        BbpTableBase.metadata.create_all(engine)
+        _fill(engine, rows)
+        results[name] = _time_read_all(BbpCRUD(engine), repeat)
+        engine.dispose()
+        vault_key.lock()
+    vault_key.allow_plaintext = False
+    return results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    results = bench_read_all(rows)
+    print(f"Rows: {rows}")
+    for name, seconds in results.items():
+        print(f"{name:<10} read_all: {seconds * 1000:8.1f} ms ({rows / seconds:10.0f} rows/s)")
+    print(f"overhead:  {(results['encrypted'] / results['plaintext'] - 1) * 100:8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+
+from src.benchmarks.Suite import main
+
+sys.exit(main())
@@ -1,45 +1,264 @@
+import logging
 import os
+import tempfile
+import threading
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import Callable, Dict, Iterable, Mapping, Optional
+
+from dotenv import dotenv_values
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Callable[[Dict[str, Optional[str]]], None]
+
+
+class Settings(BaseSettings):
+    """
+    Типизированные настройки приложения. Неизвестные ключи из .env тоже доступны (как строки).
+    """
+    model_config = SettingsConfigDict(case_sensitive=True, extra="allow")
+
+    SQLITE_PATH: str = ""  # Пустое значение - локальный файл database.db
+    SQLITE_ECHO: bool = False
+    # Пул соединений; не заданные параметры не передаются движку (класс пула зависит от URL)
+    SQLITE_POOL_SIZE: Optional[int] = None
+    SQLITE_MAX_OVERFLOW: Optional[int] = None
+    SQLITE_POOL_TIMEOUT: Optional[float] = None
+    SQLITE_POOL_RECYCLE: Optional[int] = None
+    SQLITE_POOL_PRE_PING: Optional[bool] = None
+    API_TOKEN: str = ""
+    METRICS_ENABLED: bool = False
+    UNLOCK_TARGET_MS: int = 300  # Целевое время разблокировки мастер-паролем (калибровка KDF)
+    BREACH_INDEX_PATH: str = ""  # Индекс утечек (python -m src.database.Breach build); пусто - без проверки
+    VAULT_PASSWORD_FILE: str = ""  # Файл с мастер-паролем для разблокировки API при старте; пусто - заблокировано
+
+
+# Ключи, которые записываются в новый .env
+DEFAULTS = {"SQLITE_PATH": ""}
+
+
+def _format_value(value: str) -> str:
+    if not any(char in value for char in ' \t\n#"\'\\'):
+        return value
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
 
 
 class Config:
+    """
+    Настройки из .env, разобранные один раз в снимок в памяти.
+
+    Файл читается (и создается, если его нет) при первом обращении, а не при
+    создании объекта, поэтому импорт модуля не трогает файловую систему. get читает снимок без обращения к файлу; set и set_many обновляют снимок и
+    перезаписывают .env одной атомарной записью (временный файл и переименование).
+    Переменные окружения процесса, заданные до загрузки, имеют приоритет над .env
+    (как в load_dotenv). При изменении значений вызываются подписчики (subscribe);
+    watch включает перезагрузку при изменении файла.
+    """
+
     def __init__(self, env_file='.env'):
+        """
+        Args:
+            env_file: Путь к файлу .env (создается при первом обращении, если его нет).
+        """
         self.env_file = env_file
-        self._create_env_file_if_not_exists()
-        load_dotenv(self.env_file)
-        # for key, value in os.environ.items():
-        #     setattr(self, key, value) # WIP
+        self._lock = threading.RLock()
+        self._environment = None  # Значения окружения процесса до загрузки .env
+        self._values: Dict[str, str] = {}
+        self._settings = None
+        self._subscribers = []
+        self._watch_thread = None
+        self._watch_stop = None
+
+    def _ensure_loaded(self):
+        if self._environment is None:
+            with self._lock:
+                if self._environment is None:
+                    self._environment = dict(os.environ)
+                    self._create_env_file_if_not_exists()
+                    self._load()  # Первая загрузка - не изменение, подписчики не вызываются
 
     def _create_env_file_if_not_exists(self):
         if not Path(self.env_file).exists():
-            with open(self.env_file, 'w') as f:
-                f.write("# Configuration file\n")
-            self.set_default()
-                # f.write("KEY=value\n")
+            self._write_file(dict(DEFAULTS), header="# Configuration file\n")
+
+    @property
+    def settings(self) -> Settings:
+        """
+        Типизированный снимок настроек (новый объект после каждого изменения).
+        """
+        self._ensure_loaded()
+        return self._settings
 
     def get(self, key, default=None):
-        return os.getenv(key, default)
+        self._ensure_loaded()
+        value = self._values.get(key)
+        if value is None:
+            return os.environ.get(key, default)
+        return value
 
     def set(self, key, value):
-        os.environ[key] = value
-        self._update_env_file(key, value)
+        self.set_many({key: value})
+
+    def set_many(self, values: Mapping[str, str]) -> None:
+        """
+        Сохраняет несколько значений одной записью .env.
+
+        Args:
+            values (Mapping[str, str]): Ключи и новые значения.
+        """
+        values = {key: str(value) for key, value in values.items()}
+        if not values:
+            return
+        self._ensure_loaded()
+        with self._lock:
+            self._write_file(values)
+            for key, value in values.items():
+                # Явно заданное значение важнее исходного окружения процесса
+                self._environment.pop(key, None)
+                os.environ[key] = value
+            changed = self._update_snapshot({**self._values, **values})
+        self._notify(changed)
 
     def set_default(self):
-        self.set("SQLITE_PATH", "")
+        """
+        Записывает в .env значения по умолчанию для отсутствующих в нем ключей.
+        Значения из окружения процесса не перезаписываются.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            missing = {key: value for key, value in DEFAULTS.items() if key not in self._file_values()}
+            if missing:
+                self._write_file(missing)
+                self.reload()
 
-    def _update_env_file(self, key, value):
-        with open(self.env_file, 'r') as f:
-            lines = f.readlines()
+    def reload(self) -> Dict[str, Optional[str]]:
+        """
+        Перечитывает .env и уведомляет подписчиков об изменившихся значениях.
 
-        with open(self.env_file, 'w') as f:
-            for line in lines:
-                if line.startswith(f"{key}="):
-                    continue
-                f.write(line)
-            f.write(f"{key}={value}\n")
+        Returns:
+            Dict[str, Optional[str]]: Изменившиеся ключи и новые значения (None - ключ удален).
+        """
+        if self._environment is None:
+            self._ensure_loaded()
+            return {}
+        changed = self._load()
+        self._notify(changed)
+        return changed
 
+    def _load(self) -> Dict[str, Optional[str]]:
+        with self._lock:
+            values = self._file_values()
+            for key in values:
+                if key in self._environment:
+                    values[key] = self._environment[key]
+                else:
+                    os.environ[key] = values[key]
+            for key in set(self._values) - set(values) - set(self._environment):
+                os.environ.pop(key, None)
+            return self._update_snapshot(values)
 
-# Пример использования
-config = Config()
+    def subscribe(self, callback: Subscriber, keys: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """
+        Подписывает callback на изменения настроек.
 
+        Args:
+            callback (Subscriber): Вызывается со словарем изменившихся ключей и новых значений.
+            keys (Optional[Iterable[str]]): Вызывать только при изменении этих ключей (None - любых).
+
+        Returns:
+            Callable[[], None]: Функция отмены подписки.
+        """
+        entry = (callback, frozenset(keys) if keys is not None else None)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def watch(self) -> None:
+        """
+        Запускает фоновую перезагрузку .env при изменении файла (нужен пакет watchfiles).
+        """
+        import watchfiles  # Нужен только для перезагрузки на лету
+
+        self._ensure_loaded()
+        with self._lock:
+            if self._watch_thread is not None:
+                return
+            path = os.path.abspath(self.env_file)
+            stop = self._watch_stop = threading.Event()
+
+            def run():
+                # Следим за каталогом: атомарная запись заменяет файл, и наблюдение за ним самим прервется
+                for _ in watchfiles.watch(os.path.dirname(path), stop_event=stop, debounce=200,
+                                          watch_filter=lambda change, changed_path: changed_path == path):
+                    try:
+                        self.reload()
+                    except Exception:
+                        logger.exception("Failed to reload %s", self.env_file)
+
+            self._watch_thread = threading.Thread(target=run, name="config-watch", daemon=True)
+            self._watch_thread.start()
+
+    def stop_watching(self) -> None:
+        with self._lock:
+            thread, self._watch_thread = self._watch_thread, None
+            if thread is None:
+                return
+            self._watch_stop.set()
+        thread.join()
+
+    def _file_values(self) -> Dict[str, str]:
+        if not Path(self.env_file).exists():
+            return {}
+        return {key: value or "" for key, value in dotenv_values(self.env_file).items()}
+
+    def _update_snapshot(self, values: Dict[str, str]) -> Dict[str, Optional[str]]:
+        changed = {key: values.get(key) for key in set(self._values) | set(values)
+                   if self._values.get(key) != values.get(key)}
+        self._values = values
+        # Пустые значения означают значение по умолчанию (например, "SQLITE_ECHO=")
+        self._settings = Settings(**{key: value for key, value in values.items() if value != ""})
+        return changed
+
+    def _notify(self, changed: Dict[str, Optional[str]]) -> None:
+        if not changed:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, keys in subscribers:
+            if keys is None or not keys.isdisjoint(changed):
+                try:
+                    callback(changed)
+                except Exception:
+                    logger.exception("Config subscriber %r failed", callback)
+
+    def _write_file(self, values: Dict[str, str], header: str = "") -> None:
+        lines = []
+        if Path(self.env_file).exists():
+            with open(self.env_file, 'r') as f:
+                lines = [line for line in f if line.split("=", 1)[0].strip() not in values]
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
+        lines = [header] + lines if header else lines
+        lines.extend(f"{key}={_format_value(value)}\n" for key, value in values.items())
+
+        directory = os.path.dirname(os.path.abspath(self.env_file))
+        fd, tmp_path = tempfile.mkstemp(prefix=".env.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.env_file)  # Читатели видят либо старый, либо новый файл целиком
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+# Общий экземпляр; .env читается при первом обращении (см. также src.core.Services)
+config = Config()
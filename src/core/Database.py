@@ -1,26 +1,67 @@
+import asyncio
+import threading
+from typing import TYPE_CHECKING
+
 from sqlalchemy import create_engine, MetaData
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from src.core.Config import config
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
 from src.database.Base import Base
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+DEFAULT_DATABASE_PATH = "sqlite:///database.db"
+
+# Асинхронные драйверы для синхронных URL из конфигурации
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
 
 class DataBase:
-    def __init__(self, database_path, echo=False):
+    def __init__(self, database_path, echo=False, **engine_options):
+        """
+        Args:
+            database_path: URL базы данных (синхронный, например sqlite:///database.db).
+            echo: Логировать SQL-запросы.
+            engine_options: Настройки пула и движка (pool_size, max_overflow, pool_timeout,
+                pool_recycle, pool_pre_ping, ...), общие для синхронного и асинхронного движков.
+        """
         self._database_path = database_path
-        self._Engine = create_engine(database_path, echo=echo)
+        self._echo = echo
+        self._engine_options = engine_options
+        self._Engine = None  # Движки создаются при первом обращении
+        self._Engine_lock = threading.Lock()
         self._Async_engine = None
+        self._Async_session = None
+        self._Async_tables_created = False
+        self._Async_init_lock = asyncio.Lock()
+        self._Retired_async_engines = []
         self._Metadata = MetaData()
 
     @property
     def engine(self):
+        if self._Engine is None:
+            with self._Engine_lock:
+                if self._Engine is None:
+                    self._Engine = create_engine(self._database_path, echo=self._echo, **self._engine_options)
         return self._Engine
 
-    async def create_async_engine(self) -> AsyncEngine:
-        return create_async_engine(self._database_path, echo=True)
+    @property
+    def async_database_path(self) -> str:
+        url = make_url(self._database_path)
+        drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+        return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+    async def create_async_engine(self) -> "AsyncEngine":
+        # sqlalchemy.ext.asyncio импортируется только при работе с асинхронным движком
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        return create_async_engine(self.async_database_path, echo=self._echo, **self._engine_options)
 
     @property
-    async def async_engine(self) -> AsyncEngine:
+    async def async_engine(self) -> "AsyncEngine":
         if self._Async_engine is None:
             self._Async_engine = await self.create_async_engine()  # Await the engine creation here
         return self._Async_engine
@@ -30,16 +71,99 @@ class DataBase:
         return self._Metadata
 
     def create_db_and_tables(self) -> None:
-        Base.metadata.create_all(self._Engine)
+        Base.metadata.create_all(self.engine)
+
+    async def create_db_and_tables_async(self) -> None:
+        """
+        Создает таблицы через асинхронный движок (один раз за время жизни процесса).
+        """
+        async with self._Async_init_lock:
+            if self._Async_tables_created:
+                return
+            engine = await self.async_engine
+            try:
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+            except OperationalError:
+                # Другой процесс (например, соседний воркер uvicorn) создал таблицы между
+                # проверкой и CREATE TABLE; повторная проверка их уже увидит
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+            self._Async_tables_created = True
+
+    async def async_session_maker(self) -> "async_sessionmaker":
+        """
+        Возвращает фабрику асинхронных сессий, созданную один раз.
+        """
+        if self._Async_session is None:
+            from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+            self._Async_session = async_sessionmaker(await self.async_engine, expire_on_commit=False,
+                                                     class_=AsyncSession)
+        return self._Async_session
+
+    def reconfigure(self, database_path=None, echo=None, engine_options=None) -> bool:
+        """
+        Пересоздает движки для нового URL, режима логирования или настроек пула. Текущие соединения
+        синхронного движка закрываются; асинхронный движок закрывается в dispose.
+        Объекты, уже получившие engine (например, BbpCRUD), продолжают работать со старым.
+
+        Args:
+            database_path: Новый URL базы данных (None - без изменений).
+            echo: Логировать SQL-запросы (None - без изменений).
+            engine_options: Новые настройки пула и движка (None - без изменений).
+
+        Returns:
+            bool: True, если движки пересозданы.
+        """
+        database_path = self._database_path if database_path is None else database_path
+        echo = self._echo if echo is None else echo
+        engine_options = self._engine_options if engine_options is None else engine_options
+        if (database_path, echo, engine_options) == (self._database_path, self._echo, self._engine_options):
+            return False
+        old_engine = self._Engine
+        self._database_path, self._echo, self._engine_options = database_path, echo, engine_options
+        self._Engine = None
+        if self._Async_engine is not None:
+            self._Retired_async_engines.append(self._Async_engine)
+        self._Async_engine = None
+        self._Async_session = None
+        self._Async_tables_created = False
+        if old_engine is not None:
+            old_engine.dispose()
+        return True
+
+    async def dispose(self) -> None:
+        """
+        Закрывает соединения пулов обоих движков.
+        """
+        for engine in self._Retired_async_engines:
+            await engine.dispose()
+        self._Retired_async_engines.clear()
+        if self._Async_engine is not None:
+            await self._Async_engine.dispose()
+        if self._Engine is not None:
+            self._Engine.dispose()
 
 
 async def get_async_session():
-    engine = await database.async_engine
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    # Инициализируем async_session только после создания таблиц и получения engine
-    _async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
-    return _async_session
+    # Схема создается при первом вызове, дальше возвращается одна и та же фабрика сессий
+    database = get_database()
+    await database.create_db_and_tables_async()
+    return await database.async_session_maker()
+
+
+def get_database() -> DataBase:
+    """
+    Общая база данных из контейнера сервисов (создается при первом вызове).
+    """
+    from src.core.Services import services
+
+    return services.database
 
 
-database = DataBase(config.get("SQLITE_PATH"), echo=True)
+def __getattr__(name):
+    # "from src.core.Database import database" создает базу при первом импорте имени, а не модуля
+    if name == "database":
+        return get_database()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
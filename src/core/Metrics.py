@@ -0,0 +1,334 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+import weakref
+from typing import Dict, Sequence, Tuple
+
+# Границы корзин гистограмм по умолчанию (секунды)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Границы для количества SQL-запросов за операцию
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 1000)
+# Границы для пропускной способности (байт в секунду)
+THROUGHPUT_BUCKETS = tuple(2 ** 20 * mib for mib in (1, 10, 50, 100, 250, 500, 1000, 2500))
+
+# Счетчик SQL-запросов текущей операции (см. Metrics.timed с count_statements=True)
+_statement_counter = contextvars.ContextVar("statement_counter", default=None)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами корзин (как в Prometheus).
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets (Sequence[float]): Верхние границы корзин по возрастанию.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Последняя корзина - +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """
+        Пары (граница, количество значений не больше границы), включая +Inf.
+        """
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {_format_bound(bound): total for bound, total in self.cumulative()},
+        }
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer:
+    def __init__(self, metrics: "Metrics", name: str, labels: Labels, buckets):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.buckets = buckets
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics._observe(self.name, time.perf_counter() - self.start, self.labels, self.buckets)
+        return False
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metrics:
+    """
+    Реестр метрик: счетчики и гистограммы с метками, экспорт в JSON и текстовый формат Prometheus.
+
+    Пока сбор выключен, все методы возвращаются сразу (timer отдает общий пустой
+    контекстный менеджер), поэтому инструментирование горячих путей почти ничего
+    не стоит.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        Args:
+            enabled (bool): Собирать метрики с момента создания.
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._engines = weakref.WeakSet()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        """
+        Удаляет все собранные значения.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """
+        Увеличивает счетчик.
+
+        Args:
+            name (str): Имя метрики.
+            amount (float): Величина увеличения.
+            labels: Метки.
+        """
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels) -> None:
+        """
+        Добавляет значение в гистограмму.
+
+        Args:
+            name (str): Имя метрики.
+            value (float): Значение.
+            buckets (Sequence[float]): Границы корзин (используются при первом значении).
+            labels: Метки.
+        """
+        if self.enabled:
+            self._observe(name, value, _labels(labels), buckets)
+
+    def _observe(self, name: str, value: float, labels: Labels, buckets: Sequence[float]) -> None:
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def timer(self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels):
+        """
+        Контекстный менеджер, записывающий длительность блока в гистограмму (в секундах).
+
+        Args:
+            name (str): Имя метрики.
+            buckets (Sequence[float]): Границы корзин.
+            labels: Метки.
+        """
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, name, _labels(labels), buckets)
+
+    def timed(self, name: str, count_statements: bool = False, **labels):
+        """
+        Декоратор функции или корутины, записывающий длительность каждого вызова.
+
+        Args:
+            name (str): Имя гистограммы длительности.
+            count_statements (bool): Дополнительно записывать количество SQL-запросов
+                за вызов в гистограмму name + "_sql_statements" (движок должен быть
+                подключен через instrument_engine).
+            labels: Метки.
+        """
+        frozen = _labels(labels)
+        statements_name = name + "_sql_statements"
+
+        def decorator(function):
+            if inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await function(*args, **kwargs)
+                    counter, token = self._start_counting(count_statements)
+                    start = time.perf_counter()
+                    try:
+                        return await function(*args, **kwargs)
+                    finally:
+                        self._finish(name, statements_name, frozen, start, counter, token)
+                return async_wrapper
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                counter, token = self._start_counting(count_statements)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self._finish(name, statements_name, frozen, start, counter, token)
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def _start_counting(count_statements: bool):
+        if not count_statements:
+            return None, None
+        counter = [0]
+        return counter, _statement_counter.set(counter)
+
+    def _finish(self, name, statements_name, labels, start, counter, token) -> None:
+        self._observe(name, time.perf_counter() - start, labels, DEFAULT_BUCKETS)
+        if counter is not None:
+            _statement_counter.reset(token)
+            self._observe(statements_name, counter[0], labels, COUNT_BUCKETS)
+
+    def instrument_engine(self, engine) -> None:
+        """
+        Подключает к движку SQLAlchemy (синхронному или асинхронному) сбор метрик:
+        количество и длительность SQL-запросов, выдачи соединений из пула и время
+        удержания соединения. Повторный вызов для того же движка ничего не делает.
+
+        Args:
+            engine: Engine или AsyncEngine.
+        """
+        from sqlalchemy import event  # Не нужен тем, кто не работает с базой (например, Crypt)
+
+        engine = getattr(engine, "sync_engine", engine)
+        with self._lock:
+            if engine in self._engines:
+                return
+            self._engines.add(engine)
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if not self.enabled:
+                return
+            conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+            counter = _statement_counter.get()
+            if counter is not None:
+                counter[0] += 1
+            self.inc("sql_statements_total")
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get("metrics_query_start")
+            if starts:
+                self.observe("sql_statement_seconds", time.perf_counter() - starts.pop())
+
+        @event.listens_for(engine, "checkout")
+        def checkout(dbapi_connection, connection_record, connection_proxy):
+            if self.enabled:
+                connection_record.info["metrics_checkout"] = time.perf_counter()
+                self.inc("pool_checkouts_total")
+
+        @event.listens_for(engine, "checkin")
+        def checkin(dbapi_connection, connection_record):
+            start = connection_record.info.pop("metrics_checkout", None)
+            if start is not None:
+                self.observe("pool_connection_hold_seconds", time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        """
+        Текущие значения всех метрик.
+
+        Returns:
+            dict: {"counters": {имя{метки}: значение}, "histograms": {имя{метки}: {count, sum, buckets}}}.
+        """
+        with self._lock:
+            return {
+                "counters": {name + _format_labels(labels): value
+                             for (name, labels), value in sorted(self._counters.items())},
+                "histograms": {name + _format_labels(labels): histogram.to_dict()
+                               for (name, labels), histogram in sorted(self._histograms.items())},
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Метрики в текстовом формате Prometheus (exposition format 0.0.4).
+        """
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(histogram.cumulative()), histogram.sum, histogram.count)
+                                for key, histogram in self._histograms.items())
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), cumulative, total, count in histograms:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            for bound, bucket_count in cumulative:
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', _format_bound(bound)),))} "
+                             f"{bucket_count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+# Общий реестр; включается metrics.enable() или настройкой METRICS_ENABLED (Settings: .env
+# или окружение), которую применяет services.config при загрузке конфигурации
+metrics = Metrics()
@@ -0,0 +1,159 @@
+import threading
+from typing import Any, Callable, Dict
+
+
+class Services:
+    """
+    Ленивый контейнер сервисов: каждый сервис создается фабрикой при первом
+    обращении (services.database, services.get("database")) и дальше переиспользуется.
+
+    Импорт модулей приложения ничего не создает и не читает .env: CLI и тесты,
+    которым не нужна база, не платят за конфигурацию и движки.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[["Services"], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[["Services"], Any]) -> None:
+        """
+        Регистрирует фабрику сервиса (заменяет прежнюю; созданный экземпляр сбрасывается).
+
+        Args:
+            name (str): Имя сервиса.
+            factory (Callable[[Services], Any]): Фабрика, получает контейнер для доступа к зависимостям.
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """
+        Возвращает сервис, создавая его при первом обращении.
+
+        Args:
+            name (str): Имя сервиса.
+
+        Returns:
+            Any: Экземпляр сервиса.
+        """
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        with self._lock:  # RLock: фабрика может запрашивать другие сервисы
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(f"Unknown service: {name}")
+                self._instances[name] = self._factories[name](self)
+            return self._instances[name]
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self.get(name)
+        except KeyError:
+            raise AttributeError(f"Unknown service: {name}") from None
+
+    def is_created(self, name: str) -> bool:
+        return name in self._instances
+
+    def override(self, name: str, instance: Any) -> None:
+        """
+        Подставляет готовый экземпляр сервиса (например, в тестах).
+        """
+        with self._lock:
+            self._instances[name] = instance
+
+    def reset(self, name: str = None) -> None:
+        """
+        Забывает созданный экземпляр (или все); следующее обращение вызовет фабрику снова.
+        """
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+
+def _config(services: Services):
+    from src.core.Config import config
+    from src.core.Metrics import metrics
+
+    # METRICS_ENABLED читается через Settings, а не при импорте Metrics
+    if config.settings.METRICS_ENABLED:
+        metrics.enable()
+
+    def on_metrics_change(changed) -> None:
+        metrics.enabled = config.settings.METRICS_ENABLED
+
+    config.subscribe(on_metrics_change, keys=("METRICS_ENABLED",))
+    return config
+
+
+# Настройки пула из .env -> параметры create_engine
+POOL_SETTINGS = {
+    "SQLITE_POOL_SIZE": "pool_size",
+    "SQLITE_MAX_OVERFLOW": "max_overflow",
+    "SQLITE_POOL_TIMEOUT": "pool_timeout",
+    "SQLITE_POOL_RECYCLE": "pool_recycle",
+    "SQLITE_POOL_PRE_PING": "pool_pre_ping",
+}
+
+
+def _engine_options(settings) -> dict:
+    return {option: getattr(settings, key) for key, option in POOL_SETTINGS.items()
+            if getattr(settings, key) is not None}
+
+
+def _database(services: Services):
+    from src.core.Database import DEFAULT_DATABASE_PATH, DataBase
+
+    config = services.config
+    # Пустой SQLITE_PATH (значение по умолчанию в .env) означает локальный файл database.db
+    database = DataBase(config.settings.SQLITE_PATH or DEFAULT_DATABASE_PATH, echo=config.settings.SQLITE_ECHO,
+                        **_engine_options(config.settings))
+
+    def on_config_change(changed) -> None:
+        # Изменение .env (config.set_many или config.watch) переключает движки на новые настройки
+        if database.reconfigure(config.settings.SQLITE_PATH or DEFAULT_DATABASE_PATH, config.settings.SQLITE_ECHO,
+                                _engine_options(config.settings)):
+            services.reset("crud")  # BbpCRUD и MasterKeyStore держат ссылку на старый движок
+            services.reset("master_key")
+
+    config.subscribe(on_config_change, keys=("SQLITE_PATH", "SQLITE_ECHO", *POOL_SETTINGS))
+    return database
+
+
+def _breach(services: Services):
+    path = services.config.settings.BREACH_INDEX_PATH
+    if not path:
+        return None
+    from src.database.Breach import BreachIndex
+
+    return BreachIndex(path)  # Файл отображается в память, не читается
+
+
+def _master_key(services: Services):
+    from src.database.MasterKey import MasterKeyStore
+
+    return MasterKeyStore(services.database.engine,
+                          target_seconds=services.config.settings.UNLOCK_TARGET_MS / 1000)
+
+
+def _crud(services: Services):
+    from src.database.BbpBase import BbpCRUD
+
+    database = services.database
+    database.create_db_and_tables()
+    return BbpCRUD(engine=database.engine, breach_index=services.breach)
+
+
+services = Services()
+services.register("config", _config)
+services.register("database", _database)
+services.register("breach", _breach)
+services.register("crud", _crud)
+services.register("master_key", _master_key)
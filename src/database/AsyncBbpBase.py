@@ -0,0 +1,319 @@
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from src.core.Metrics import metrics
+from src.database.BbpBase import (BbpCRUD, BbpTableBase, BbpUpdateSchema, DEFAULT_PROJECTION, _BULK_INSERT,
+                                  _DELETE_OPTIONS, _batched, _bulk_delete_statement, _bulk_update_statement,
+                                  _fts_query, _insert_rows, _inserted_ids, _notes_statement, _page_statement,
+                                  _row_type, _rows_statement, _search_login_statement, _search_rows_statement,
+                                  _search_statement, _timed, _update_groups)
+
+
+class AsyncBbpCRUD:
+    """
+    Асинхронный вариант BbpCRUD для работы через AsyncEngine (например, в FastAPI/uvloop).
+
+    Набор операций тот же, что у BbpCRUD. Схема должна быть создана заранее,
+    один раз при старте (DataBase.create_db_and_tables_async).
+    """
+    BATCH_SIZE = BbpCRUD.BATCH_SIZE
+    # Проверки по индексу утечек не обращаются к базе
+    _check_password = BbpCRUD._check_password
+    _check_passwords = BbpCRUD._check_passwords
+
+    def __init__(self, engine: AsyncEngine = None, session_factory: async_sessionmaker = None,
+                 breach_index=None):
+        """
+        Args:
+            engine (AsyncEngine): Асинхронный движок SQLAlchemy.
+            session_factory (async_sessionmaker): Готовая фабрика сессий (например,
+                DataBase.async_session_maker()); тогда engine не нужен.
+            breach_index (BreachIndex): Локальный индекс утечек (см. BbpCRUD).
+        """
+        if session_factory is None:
+            if engine is None:
+                raise ValueError("engine or session_factory is required")
+            # expire_on_commit=False: после коммита объекты не перечитываются из базы
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        self.Session = session_factory
+        self.breach_index = breach_index
+        if session_factory.kw.get("bind") is not None:
+            metrics.instrument_engine(session_factory.kw["bind"])  # Счетчики SQL-запросов для метрик операций
+
+    @_timed("create", mode="async")
+    async def create(self, login, password, notes) -> BbpTableBase:
+        """
+        Создает новую запись в таблице "bbp".
+
+        Args:
+            login (str): Логин пользователя.
+            password (str): Пароль пользователя.
+            notes (str): Заметки пользователя.
+
+        Returns:
+            BbpTableBase: Объект созданной записи (ID заполняется при flush, без повторного SELECT).
+        """
+        self._check_password(password)
+        async with self.Session() as session:
+            new_record = BbpTableBase(login=login, password=password, notes=notes)
+            session.add(new_record)
+            await session.commit()
+            return new_record
+
+    @_timed("read", mode="async")
+    async def read(self, record_id: int) -> Optional[BbpTableBase]:
+        """
+        Получает запись из таблицы "bbp" по ID.
+
+        Args:
+            record_id (int): ID записи для получения.
+
+        Returns:
+            BbpTableBase: Объект записи, если найден, иначе None.
+        """
+        async with self.Session() as session:
+            return await session.get(BbpTableBase, record_id)
+
+    @_timed("read_all", mode="async")
+    async def read_all(self) -> List[BbpTableBase]:
+        """
+        Получает все записи из таблицы "bbp".
+
+        Returns:
+            List[BbpTableBase]: Список объектов записей.
+        """
+        async with self.Session() as session:
+            return list(await session.scalars(select(BbpTableBase)))
+
+    async def iter_all(self, batch_size: int = BATCH_SIZE) -> AsyncIterator[BbpTableBase]:
+        """
+        Перебирает все записи по возрастанию ID, загружая их пачками (потоковый результат).
+
+        Args:
+            batch_size (int): Количество строк, загружаемых за раз.
+
+        Yields:
+            BbpTableBase: Объекты записей.
+        """
+        statement = (select(BbpTableBase)
+                     .order_by(BbpTableBase.id)
+                     .execution_options(yield_per=batch_size))
+        async with self.Session() as session:
+            async for record in await session.stream_scalars(statement):
+                yield record
+
+    @_timed("page", mode="async")
+    async def page(self, after_id: Optional[int] = None, limit: int = 100) -> List[BbpTableBase]:
+        """
+        Получает страницу записей по ключу (keyset-пагинация по первичному ключу).
+
+        Args:
+            after_id (Optional[int]): ID последней записи предыдущей страницы; None для первой страницы.
+            limit (int): Максимальное количество записей на странице.
+
+        Returns:
+            List[BbpTableBase]: Записи с ID больше after_id по возрастанию ID.
+        """
+        async with self.Session() as session:
+            return list(await session.scalars(_page_statement(after_id, limit)))
+
+    @_timed("read_rows", mode="async")
+    async def read_rows(self, columns: Iterable[str] = DEFAULT_PROJECTION, after_id: Optional[int] = None,
+                        limit: Optional[int] = None) -> List[tuple]:
+        """
+        Читает только выбранные столбцы в компактные строки (см. BbpCRUD.read_rows).
+
+        Args:
+            columns (Iterable[str]): Имена столбцов из PROJECTION_COLUMNS.
+            after_id (Optional[int]): Читать записи с ID больше указанного.
+            limit (Optional[int]): Максимальное количество строк; None - все.
+
+        Returns:
+            List[tuple]: Строки-namedtuple с полями в порядке columns, по возрастанию ID.
+        """
+        columns = tuple(columns)
+        make_row = _row_type(columns)._make
+        async with self.Session() as session:
+            result = await session.execute(_rows_statement(columns, after_id, limit))
+            return list(map(make_row, result.tuples()))
+
+    @_timed("read_notes", mode="async")
+    async def read_notes(self, record_ids: Iterable[int], batch_size: int = BATCH_SIZE) -> Dict[int, str]:
+        """
+        Дочитывает заметки для выбранных записей (см. BbpCRUD.read_notes).
+
+        Args:
+            record_ids (Iterable[int]): ID записей.
+            batch_size (int): Количество ID в одном запросе.
+
+        Returns:
+            Dict[int, str]: Заметки по ID; отсутствующие записи пропускаются.
+        """
+        notes = {}
+        async with self.Session() as session:
+            for batch in _batched(record_ids, batch_size):
+                notes.update((await session.execute(_notes_statement(batch))).all())
+        return notes
+
+    @_timed("update", mode="async")
+    async def update(self, record_id: int, update_data: BbpUpdateSchema) -> Optional[BbpTableBase]:
+        """
+        Обновляет запись в таблице "bbp" по ID, используя Pydantic модель.
+
+        Args:
+            record_id (int): ID записи для обновления.
+            update_data (BbpUpdateSchema): Pydantic модель с данными для обновления.
+
+        Returns:
+            BbpTableBase: Объект обновленной записи, если найден, иначе None.
+        """
+        self._check_password(update_data.model_dump(exclude_unset=True).get("password"))
+        async with self.Session() as session:
+            record = await session.get(BbpTableBase, record_id)
+            if record:
+                for key, value in update_data.model_dump(exclude_unset=True).items():
+                    setattr(record, key, value)
+                await session.commit()
+                return record
+            return None
+
+    @_timed("delete", mode="async")
+    async def delete(self, record_id: int) -> bool:
+        """
+        Удаляет запись из таблицы "bbp" по ID.
+
+        Args:
+            record_id (int): ID записи для удаления.
+
+        Returns:
+            bool: True, если запись была удалена, иначе False.
+        """
+        async with self.Session() as session:
+            result = await session.execute(_bulk_delete_statement([record_id]),
+                                           execution_options=_DELETE_OPTIONS)
+            await session.commit()
+            return result.rowcount > 0
+
+    @_timed("bulk_create", mode="async")
+    async def bulk_create(self, records: Iterable, batch_size: int = BATCH_SIZE) -> List[int]:
+        """
+        Создает много записей в одной транзакции (INSERT ... RETURNING пачками).
+
+        Args:
+            records (Iterable): Словари с ключами login, password, notes или кортежи (без id).
+            batch_size (int): Количество строк в одном запросе.
+
+        Returns:
+            List[int]: ID созданных записей в том же порядке.
+        """
+        ids = []
+        async with self.Session() as session:
+            for batch in _batched(records, batch_size):
+                rows = _insert_rows(batch)
+                self._check_passwords(rows)
+                ids.extend(_inserted_ids(await session.scalars(_BULK_INSERT, rows)))
+            await session.commit()
+        return ids
+
+    @_timed("bulk_update", mode="async")
+    async def bulk_update(self, updates: Dict[int, BbpUpdateSchema], batch_size: int = BATCH_SIZE) -> int:
+        """
+        Обновляет много записей в одной транзакции (executemany пачками).
+
+        Args:
+            updates (Dict[int, BbpUpdateSchema]): Данные для обновления по ID записи.
+            batch_size (int): Количество строк в одном запросе.
+
+        Returns:
+            int: Количество обновленных записей.
+        """
+        updated = 0
+        groups = _update_groups(updates)
+        for rows in groups.values():
+            self._check_passwords(rows)
+        async with self.Session() as session:
+            connection = await session.connection()
+            for keys, rows in groups.items():
+                statement = _bulk_update_statement(keys)
+                for batch in _batched(rows, batch_size):
+                    updated += (await connection.execute(statement, batch)).rowcount
+            await session.commit()
+        return updated
+
+    @_timed("bulk_delete", mode="async")
+    async def bulk_delete(self, record_ids: Iterable[int], batch_size: int = BATCH_SIZE) -> int:
+        """
+        Удаляет много записей в одной транзакции.
+
+        Args:
+            record_ids (Iterable[int]): ID записей для удаления.
+            batch_size (int): Количество ID в одном запросе.
+
+        Returns:
+            int: Количество удаленных записей.
+        """
+        deleted = 0
+        async with self.Session() as session:
+            for batch in _batched(record_ids, batch_size):
+                result = await session.execute(_bulk_delete_statement(batch), execution_options=_DELETE_OPTIONS)
+                deleted += result.rowcount
+            await session.commit()
+        return deleted
+
+    @_timed("search", mode="async")
+    async def search(self, query: str, limit: int = 20) -> List[BbpTableBase]:
+        """
+        Полнотекстовый поиск по логину и заметкам с ранжированием (см. BbpCRUD.search).
+
+        Args:
+            query (str): Поисковая строка.
+            limit (int): Максимальное количество результатов.
+
+        Returns:
+            List[BbpTableBase]: Найденные записи, самые релевантные первыми.
+        """
+        match = _fts_query(query)
+        if not match:
+            return []
+        async with self.Session() as session:
+            return list(await session.scalars(_search_statement(match, limit)))
+
+    @_timed("search_rows", mode="async")
+    async def search_rows(self, query: str, columns: Iterable[str] = DEFAULT_PROJECTION,
+                          limit: int = 20) -> List[tuple]:
+        """
+        Полнотекстовый поиск в компактные строки выбранных столбцов (см. BbpCRUD.search_rows).
+
+        Args:
+            query (str): Поисковая строка.
+            columns (Iterable[str]): Имена столбцов из PROJECTION_COLUMNS.
+            limit (int): Максимальное количество результатов.
+
+        Returns:
+            List[tuple]: Строки-namedtuple с полями в порядке columns, самые релевантные первыми.
+        """
+        columns = tuple(columns)
+        make_row = _row_type(columns)._make
+        match = _fts_query(query)
+        if not match:
+            return []
+        async with self.Session() as session:
+            result = await session.execute(_search_rows_statement(columns, match, limit))
+            return list(map(make_row, result.tuples()))
+
+    @_timed("search_login", mode="async")
+    async def search_login(self, prefix: str, limit: int = 20) -> List[BbpTableBase]:
+        """
+        Поиск записей по началу логина через индекс ix_bbp_login (см. BbpCRUD.search_login).
+
+        Args:
+            prefix (str): Начало логина.
+            limit (int): Максимальное количество результатов.
+
+        Returns:
+            List[BbpTableBase]: Записи, отсортированные по логину.
+        """
+        async with self.Session() as session:
+            return list(await session.scalars(_search_login_statement(prefix, limit)))
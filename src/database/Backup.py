@@ -0,0 +1,358 @@
+import os
+import time
+import zlib
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+import orjson
+from sqlalchemy import column, delete, func, select, table, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from src.database.BbpBase import CHANGES_DDL, SEARCH_DDL, SEARCH_TRIGGERS, _batched
+from src.database.Encryption import VaultKey
+from src.database.MasterKey import VaultMetaTable
+from src.utils.Crypt import FileEncryptor
+
+# Таблицы без типов SQLAlchemy: значения копируются как есть, без шифрования
+# и расшифровки EncryptedString (пароли остаются зашифрованными ключом хранилища).
+_bbp = table("bbp", column("id"), column("login"), column("password"), column("notes"))
+_changes = table("bbp_changes", column("record_id"), column("version"), column("deleted"))
+_RECORD_FIELDS = ("id", "login", "password", "notes")
+_VERSION = select(func.coalesce(func.max(_changes.c.version), 0))
+# Обернутый ключ хранилища: без него зашифрованные пароли из копии не расшифровать
+_vault_meta = VaultMetaTable.__table__
+_META_FIELDS = ("kdf", "cost", "salt", "wrapped_key", "unlock_seconds")
+_META_BINARY = ("salt", "wrapped_key")
+
+ARCHIVE_FORMAT = 1
+CHUNK_SIZE = 256 * 1024  # Размер порции NDJSON перед сжатием
+BATCH_SIZE = 1000
+COMPRESSION_LEVEL = 6
+_GZIP_WBITS = 31  # zlib с заголовком gzip: архив после расшифровки читается gunzip
+
+
+class BackupInfo(NamedTuple):
+    """
+    Сведения о резервной копии (первая строка архива).
+
+    Атрибуты:
+        kind (str): "full" или "incremental".
+        base_version (int): Версия журнала, от которой считаются изменения (0 для полной копии).
+        version (int): Версия журнала на момент копии; база для следующей инкрементальной.
+        records (int): Количество сохраненных записей.
+        deleted (int): Количество удаленных записей (только для инкрементальной копии).
+        created (float): Время создания (Unix time).
+    """
+    kind: str
+    base_version: int
+    version: int
+    records: int = 0
+    deleted: int = 0
+    created: float = 0.0
+
+
+def _ensure_journal(connection) -> None:
+    for statement in CHANGES_DDL:
+        connection.execute(text(statement))
+    _vault_meta.create(connection, checkfirst=True)
+
+
+def _meta_entry(row) -> dict:
+    entry = dict(zip(_META_FIELDS, row), type="vault_meta")
+    for name in _META_BINARY:
+        entry[name] = entry[name].hex()
+    return entry
+
+
+def _compress(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, _GZIP_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _decompress(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj(_GZIP_WBITS)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    data = decompressor.flush()
+    if data:
+        yield data
+    if not decompressor.eof:
+        raise ValueError("Truncated backup archive")
+
+
+def _lines(chunks: Iterable[bytes]) -> Iterator[dict]:
+    tail = b""
+    for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            yield orjson.loads(line)
+    if tail:
+        yield orjson.loads(tail)
+
+
+def _joined(lines: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Склеивает строки NDJSON в порции около CHUNK_SIZE байт.
+    """
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+class VaultBackup:
+    """
+    Потоковое резервное копирование таблицы "bbp" в зашифрованный сжатый NDJSON.
+
+    Записи читаются курсором и сразу сжимаются и шифруются (FileEncryptor,
+    сегментированный формат), поэтому память не зависит от размера хранилища.
+    Инкрементальная копия содержит только записи, измененные после указанной
+    версии журнала bbp_changes, и ID удаленных записей. Каждая копия содержит и
+    строку vault_meta (ключ хранилища, обернутый мастер-паролем): пароли в копии
+    зашифрованы этим ключом.
+    """
+
+    def __init__(self, engine, encryptor: FileEncryptor = None):
+        """
+        Args:
+            engine: SQLAlchemy engine базы данных.
+            encryptor (FileEncryptor): Шифровальщик архива; по умолчанию FileEncryptor().
+        """
+        self.engine = engine
+        self.encryptor = encryptor or FileEncryptor()
+
+    def current_version(self) -> int:
+        """
+        Текущая версия журнала изменений.
+        """
+        with self.engine.begin() as connection:
+            _ensure_journal(connection)
+            return connection.execute(_VERSION).scalar()
+
+    def backup(self, path: str, password: str = None, since_version: Optional[int] = None) -> BackupInfo:
+        """
+        Создает резервную копию.
+
+        Args:
+            path (str): Путь к файлу архива.
+            password (str): Пароль архива (по умолчанию пароль encryptor).
+            since_version (Optional[int]): Версия предыдущей копии (BackupInfo.version);
+                None - полная копия.
+
+        Returns:
+            BackupInfo: Сведения о созданной копии.
+        """
+        with self.engine.begin() as connection:
+            _ensure_journal(connection)
+
+        counts = {"records": 0, "deleted": 0}
+        tmp_path = path + ".tmp"
+        try:
+            info = self._write(tmp_path, password, since_version, counts)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)  # Недописанный архив не подменяет готовый
+        return info._replace(**counts)
+
+    def _write(self, path: str, password: str, since_version: Optional[int], counts: dict) -> BackupInfo:
+        with self.engine.connect() as connection:
+            # Все чтения в одной транзакции: версия и записи соответствуют одному моменту
+            with connection.begin():
+                version = connection.execute(_VERSION).scalar()
+                kind = "full" if since_version is None else "incremental"
+                info = BackupInfo(kind, since_version or 0, version, created=time.time())
+
+                def lines():
+                    yield orjson.dumps({"type": "header", "format": ARCHIVE_FORMAT, **info._asdict()}) + b"\n"
+                    meta = connection.execute(select(*(_vault_meta.c[name] for name in _META_FIELDS))).first()
+                    if meta is not None:
+                        yield orjson.dumps(_meta_entry(meta)) + b"\n"
+                    for row in self._changed_rows(connection, since_version):
+                        counts["records"] += 1
+                        yield orjson.dumps(dict(zip(_RECORD_FIELDS, row), type="record")) + b"\n"
+                    if since_version is not None:
+                        for batch in _batched(self._deleted_ids(connection, since_version), BATCH_SIZE):
+                            counts["deleted"] += len(batch)
+                            yield orjson.dumps({"type": "deleted", "ids": batch}) + b"\n"
+                    yield orjson.dumps({"type": "end", **counts}) + b"\n"
+
+                with open(path, "wb") as f:
+                    for chunk in self.encryptor.encrypt_stream(_compress(_joined(lines())), password):
+                        f.write(chunk)
+        return info
+
+    @staticmethod
+    def _changed_rows(connection, since_version):
+        statement = select(_bbp.c.id, _bbp.c.login, _bbp.c.password, _bbp.c.notes)
+        if since_version is None:
+            statement = statement.order_by(_bbp.c.id)
+        else:
+            # Обход по индексу версии журнала: время зависит от числа изменений, а не от размера таблицы
+            statement = (statement.select_from(_changes.join(_bbp, _bbp.c.id == _changes.c.record_id))
+                         .where(_changes.c.version > since_version)
+                         .order_by(_changes.c.version))
+        return connection.execution_options(stream_results=True, yield_per=BATCH_SIZE).execute(statement)
+
+    @staticmethod
+    def _deleted_ids(connection, since_version):
+        statement = select(_changes.c.record_id).where(_changes.c.deleted == 1, _changes.c.version > since_version)
+        return connection.execution_options(stream_results=True, yield_per=BATCH_SIZE).execute(statement).scalars()
+
+    def _read(self, path: str, password: str = None) -> Iterator[dict]:
+        with open(path, "rb") as f:
+            yield from _lines(_decompress(self.encryptor.decrypt_stream(f, password)))
+
+    def read_info(self, path: str, password: str = None) -> BackupInfo:
+        """
+        Читает сведения о копии из начала архива (остальной архив не расшифровывается).
+
+        Args:
+            path (str): Путь к файлу архива.
+            password (str): Пароль архива.
+
+        Returns:
+            BackupInfo: Сведения о копии (счетчики записей не заполняются).
+        """
+        entries = self._read(path, password)
+        try:
+            return self._header(next(entries))
+        finally:
+            entries.close()
+
+    @staticmethod
+    def _header(entry: dict) -> BackupInfo:
+        if entry.get("type") != "header" or entry.get("format") != ARCHIVE_FORMAT:
+            raise ValueError("Not a vault backup archive")
+        return BackupInfo(*(entry[field] for field in BackupInfo._fields))
+
+    def restore(self, paths: List[str], password: str = None) -> BackupInfo:
+        """
+        Восстанавливает таблицу из полной копии и следующих за ней инкрементальных.
+
+        Полная копия заменяет содержимое таблицы, инкрементальные применяются по
+        порядку (вставка или обновление записей и удаление). Каждая инкрементальная
+        копия должна начинаться с версии предыдущей. Строка vault_meta из копии
+        заменяет текущую; зашифрованные пароли без обернутого ключа (ни в копии, ни в
+        базе) не восстанавливаются. Все архивы применяются в одной транзакции: при
+        ошибке таблица не меняется.
+
+        Args:
+            paths (List[str]): Пути к архивам: полный, затем инкрементальные по порядку.
+            password (str): Пароль архивов.
+
+        Returns:
+            BackupInfo: Сведения о последней примененной копии, счетчики - суммарные.
+        """
+        totals = {"records": 0, "deleted": 0}
+        info, encrypted = None, False
+        with self.engine.begin() as connection:
+            _ensure_journal(connection)
+            for path in paths:
+                entries = self._read(path, password)
+                header = self._header(next(entries))
+                if info is None and header.kind != "full":
+                    raise ValueError(f"{path}: restore must start with a full backup")
+                if info is not None and (header.kind != "incremental" or header.base_version != info.version):
+                    raise ValueError(f"{path}: does not follow the previous backup (version {info.version})")
+                if header.kind == "full":
+                    # Полнотекстовый индекс перестраивается один раз после загрузки:
+                    # примерно втрое быстрее, чем обновлять его триггерами на каждую строку
+                    for trigger in SEARCH_TRIGGERS:
+                        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+                    connection.execute(delete(_bbp))
+                    encrypted = self._apply(connection, entries, True, totals) or encrypted
+                    for statement in SEARCH_DDL:
+                        connection.execute(text(statement))
+                    connection.execute(text("INSERT INTO bbp_fts(bbp_fts) VALUES ('rebuild')"))
+                else:
+                    encrypted = self._apply(connection, entries, False, totals) or encrypted
+                info = header
+            if encrypted and connection.execute(select(func.count()).select_from(_vault_meta)).scalar() == 0:
+                raise ValueError("Backup has encrypted passwords but no vault key to decrypt them")
+        return info._replace(**totals)
+
+    @staticmethod
+    def _apply(connection, entries: Iterator[dict], full: bool, totals: dict) -> bool:
+        """
+        Применяет записи одного архива; возвращает True, если среди паролей есть зашифрованные.
+        """
+        encrypted = False
+        insert = sqlite_insert(_bbp)
+        if not full:
+            insert = insert.on_conflict_do_update(
+                index_elements=["id"],
+                set_={name: insert.excluded[name] for name in _RECORD_FIELDS if name != "id"})
+        batch = []
+        for entry in entries:
+            kind = entry.pop("type")
+            if kind == "record":
+                encrypted = encrypted or (entry["password"] or "").startswith(VaultKey.PREFIX)
+                batch.append(entry)
+                if len(batch) == BATCH_SIZE:
+                    connection.execute(insert, batch)
+                    totals["records"] += len(batch)
+                    batch = []
+            elif kind == "deleted":
+                connection.execute(delete(_bbp).where(_bbp.c.id.in_(entry["ids"])))
+                totals["deleted"] += len(entry["ids"])
+            elif kind == "vault_meta":
+                for name in _META_BINARY:
+                    entry[name] = bytes.fromhex(entry[name])
+                connection.execute(delete(_vault_meta))
+                connection.execute(_vault_meta.insert().values(id=1, **entry))
+            elif kind == "end":
+                if batch:
+                    connection.execute(insert, batch)
+                    totals["records"] += len(batch)
+                return encrypted
+        raise ValueError("Backup archive has no end marker")
+
+
+def main():
+    import argparse
+    import getpass
+
+    parser = argparse.ArgumentParser(description="Резервное копирование таблицы bbp")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backup_parser = subparsers.add_parser("backup", help="создать копию")
+    backup_parser.add_argument("archive")
+    backup_parser.add_argument("--since", metavar="ARCHIVE",
+                               help="предыдущая копия: сохранить только изменения после нее")
+    restore_parser = subparsers.add_parser("restore", help="восстановить из копий")
+    restore_parser.add_argument("archives", nargs="+", help="полная копия и инкрементальные по порядку")
+    parser.add_argument("--database-url", default=None, help="URL базы данных (по умолчанию SQLITE_PATH из .env)")
+    args = parser.parse_args()
+
+    if args.database_url:
+        from sqlalchemy import create_engine
+        engine = create_engine(args.database_url)
+    else:
+        from src.core.Database import database
+        engine = database.engine
+
+    password = getpass.getpass("Backup password: ")
+    backup = VaultBackup(engine)
+    if args.command == "backup":
+        since = backup.read_info(args.since, password).version if args.since else None
+        info = backup.backup(args.archive, password, since)
+        print(f"{info.kind} backup: {info.records} records, {info.deleted} deleted, version {info.version}")
+    else:
+        info = backup.restore(args.archives, password)
+        print(f"Restored {info.records} records, {info.deleted} deleted, version {info.version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,33 @@
 # Импортируем необходимые модули и классы
+from src.core.Metrics import metrics
 from src.database.Base import Base
+from src.database.Cache import RecordCache
+from src.database.Encryption import EncryptedString, vault_key
 from sqlalchemy.orm import Mapped, mapped_column, sessionmaker
-from sqlalchemy import String
-from typing import Any, Optional, List
+from sqlalchemy import (String, insert, update, delete, bindparam, select, event, DDL, text,
+                        table, column, literal_column, func)
+from typing import Any, Optional, List, Dict, Iterable, Iterator, NamedTuple, Tuple
+from collections import namedtuple
+from functools import lru_cache
 from pydantic import BaseModel
 
 
+def _batched(items: Iterable, batch_size: int):
+    """
+    Разбивает последовательность на списки длиной не больше batch_size.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 class BbpTableBase(Base):
     """
     Класс, представляющий структуру таблицы "bbp" в базе данных.
@@ -14,15 +36,15 @@ class BbpTableBase(Base):
         __tablename__ (str): Имя таблицы в базе данных.
         id (Mapped[int]): Уникальный идентификатор записи (первичный ключ).
         login (Mapped[str]): Логин пользователя (максимальная длина - 30 символов).
-        password (Mapped[str]): Пароль пользователя.
+        password (Mapped[str]): Пароль пользователя (шифруется ключом хранилища, см. vault_key).
         notes (Mapped[str]): Заметки пользователя.
     """
     __tablename__ = "bbp"  # Указываем имя таблицы в базе данных
 
     # Определяем столбцы таблицы с помощью Mapped
     id: Mapped[int] = mapped_column(primary_key=True)  # Первичный ключ
-    login: Mapped[str] = mapped_column(String(30))  # Логин пользователя (макс. 30 символов)
-    password: Mapped[str] = mapped_column(String)  # Пароль пользователя
+    login: Mapped[str] = mapped_column(String(30), index=True)  # Логин пользователя (макс. 30 символов)
+    password: Mapped[str] = mapped_column(EncryptedString(vault_key, b"bbp.password"))  # Пароль пользователя
     notes: Mapped[str] = mapped_column(String)  # Заметки пользователя
 
     def __repr__(self):
@@ -35,6 +57,194 @@ class BbpTableBase(Base):
         return f"{self.login} ; {self.password} ; {self.notes}"
 
 
+class BbpRecord(NamedTuple):
+    """
+    Неизменяемый снимок записи таблицы "bbp", не связанный с сессией.
+    """
+    id: int
+    login: str
+    password: str
+    notes: str
+
+    @classmethod
+    def from_orm(cls, record: Optional[BbpTableBase]) -> Optional["BbpRecord"]:
+        """
+        Создает снимок из ORM-объекта (None остается None).
+        """
+        if record is None:
+            return None
+        return cls(record.id, record.login, record.password, record.notes)
+
+
+# Полнотекстовый индекс по login и notes (SQLite FTS5, external content).
+# Триггеры поддерживают его в актуальном состоянии при любых изменениях таблицы,
+# включая массовые операции.
+SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS bbp_fts USING fts5("
+    "login, notes, content='bbp', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS bbp_fts_ai AFTER INSERT ON bbp BEGIN "
+    "INSERT INTO bbp_fts(rowid, login, notes) VALUES (new.id, new.login, new.notes); END",
+    "CREATE TRIGGER IF NOT EXISTS bbp_fts_ad AFTER DELETE ON bbp BEGIN "
+    "INSERT INTO bbp_fts(bbp_fts, rowid, login, notes) VALUES ('delete', old.id, old.login, old.notes); END",
+    "CREATE TRIGGER IF NOT EXISTS bbp_fts_au AFTER UPDATE OF login, notes ON bbp BEGIN "
+    "INSERT INTO bbp_fts(bbp_fts, rowid, login, notes) VALUES ('delete', old.id, old.login, old.notes); "
+    "INSERT INTO bbp_fts(rowid, login, notes) VALUES (new.id, new.login, new.notes); END",
+)
+
+SEARCH_TRIGGERS = ("bbp_fts_ai", "bbp_fts_ad", "bbp_fts_au")
+
+# Журнал изменений для инкрементальных резервных копий (см. src.database.Backup):
+# одна строка на запись с номером последнего изменения и признаком удаления.
+_NEXT_VERSION = "(SELECT COALESCE(MAX(version), 0) + 1 FROM bbp_changes)"
+CHANGES_DDL = (
+    "CREATE TABLE IF NOT EXISTS bbp_changes ("
+    "record_id INTEGER PRIMARY KEY, version INTEGER NOT NULL, deleted INTEGER NOT NULL DEFAULT 0)",
+    "CREATE INDEX IF NOT EXISTS ix_bbp_changes_version ON bbp_changes(version)",
+    "CREATE TRIGGER IF NOT EXISTS bbp_changes_ai AFTER INSERT ON bbp BEGIN "
+    f"INSERT INTO bbp_changes(record_id, version, deleted) VALUES (new.id, {_NEXT_VERSION}, 0) "
+    "ON CONFLICT(record_id) DO UPDATE SET version = excluded.version, deleted = 0; END",
+    "CREATE TRIGGER IF NOT EXISTS bbp_changes_au AFTER UPDATE ON bbp BEGIN "
+    f"INSERT INTO bbp_changes(record_id, version, deleted) VALUES (new.id, {_NEXT_VERSION}, 0) "
+    "ON CONFLICT(record_id) DO UPDATE SET version = excluded.version, deleted = 0; END",
+    "CREATE TRIGGER IF NOT EXISTS bbp_changes_ad AFTER DELETE ON bbp BEGIN "
+    f"INSERT INTO bbp_changes(record_id, version, deleted) VALUES (old.id, {_NEXT_VERSION}, 1) "
+    "ON CONFLICT(record_id) DO UPDATE SET version = excluded.version, deleted = 1; END",
+)
+
+for _statement in SEARCH_DDL + CHANGES_DDL:
+    event.listen(BbpTableBase.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+_bbp_fts = table("bbp_fts", column("rowid"))
+_fts_match = literal_column("bbp_fts")
+
+
+def _fts_query(query: str) -> str:
+    """
+    Превращает пользовательский ввод в запрос FTS5: каждое слово ищется как префикс.
+    """
+    terms = query.replace('"', " ").split()
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _insert_rows(batch) -> List[dict]:
+    rows = [record if isinstance(record, dict)
+            else dict(zip(("login", "password", "notes"), record))
+            for record in batch]
+    if any("id" in row for row in rows):
+        # Возвращаемые ID сортируются (см. _inserted_ids) и не совпали бы с порядком явных ID
+        raise ValueError("bulk_create does not accept explicit ids")
+    return rows
+
+
+def _update_groups(updates) -> Dict[tuple, List[dict]]:
+    """
+    Группирует обновления по набору изменяемых полей: каждая группа - один UPDATE.
+    """
+    groups = {}
+    for record_id, update_data in updates.items():
+        values = update_data.model_dump(exclude_unset=True)
+        if values:
+            values["record_id"] = record_id
+            groups.setdefault(tuple(sorted(values)), []).append(values)
+    return groups
+
+
+def _bulk_update_statement(keys):
+    return (update(BbpTableBase)
+            .where(BbpTableBase.id == bindparam("record_id"))
+            .values({key: bindparam(key) for key in keys if key != "record_id"}))
+
+
+def _bulk_delete_statement(batch):
+    return delete(BbpTableBase).where(BbpTableBase.id.in_(batch))
+
+
+def _page_statement(after_id, limit):
+    statement = select(BbpTableBase).order_by(BbpTableBase.id).limit(limit)
+    if after_id is not None:
+        statement = statement.where(BbpTableBase.id > after_id)  # Индекс первичного ключа, без OFFSET
+    return statement
+
+
+def _search_statement(match, limit):
+    return (select(BbpTableBase)
+            .join(_bbp_fts, _bbp_fts.c.rowid == BbpTableBase.id)
+            .where(_fts_match.op("MATCH")(match))
+            .order_by(func.bm25(_fts_match))
+            .limit(limit))
+
+
+def _search_login_statement(prefix, limit):
+    # Диапазон вместо LIKE: LIKE в SQLite регистронезависим и не использует индекс
+    return (select(BbpTableBase)
+            .where(BbpTableBase.login >= prefix, BbpTableBase.login < prefix + "\U0010ffff")
+            .order_by(BbpTableBase.login, BbpTableBase.id)
+            .limit(limit))
+
+
+# Столбцы, доступные для проекций; по умолчанию читаются только id и login (для списков)
+PROJECTION_COLUMNS = ("id", "login", "password", "notes")
+DEFAULT_PROJECTION = ("id", "login")
+
+
+@lru_cache(maxsize=None)
+def _row_type(columns: Tuple[str, ...]):
+    """
+    Класс строки проекции: namedtuple без __dict__ (один тип на набор столбцов).
+    """
+    unknown = set(columns) - set(PROJECTION_COLUMNS)
+    if unknown or not columns:
+        raise ValueError(f"Unknown columns: {sorted(unknown)}" if unknown else "No columns selected")
+    return namedtuple("BbpRow", columns)
+
+
+def _rows_statement(columns, after_id, limit):
+    table = BbpTableBase.__table__
+    statement = select(*(table.c[name] for name in columns)).order_by(table.c.id)
+    if after_id is not None:
+        statement = statement.where(table.c.id > after_id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+def _search_rows_statement(columns, match, limit):
+    table = BbpTableBase.__table__
+    return (select(*(table.c[name] for name in columns))
+            .join(_bbp_fts, _bbp_fts.c.rowid == table.c.id)
+            .where(_fts_match.op("MATCH")(match))
+            .order_by(func.bm25(_fts_match))
+            .limit(limit))
+
+
+def _notes_statement(record_ids):
+    table = BbpTableBase.__table__
+    return select(table.c.id, table.c.notes).where(table.c.id.in_(record_ids))
+
+
+def _timed(operation: str, **labels):
+    """
+    Декоратор метрик операции: длительность и количество SQL-запросов (см. Metrics.timed).
+    """
+    return metrics.timed("bbp_operation_seconds", count_statements=True, operation=operation, **labels)
+
+
+# Без sort_by_parameter_order: SQLite не поддерживает упорядоченный RETURNING для
+# многострочного INSERT, и SQLAlchemy выполнял бы по одному INSERT на строку.
+# Строки одной пачки получают возрастающие ID в порядке вставки, поэтому
+# отсортированные ID совпадают с порядком записей (см. _inserted_ids). Это верно
+# только для ID, назначенных базой, поэтому явные ID отклоняются (_insert_rows).
+_BULK_INSERT = insert(BbpTableBase).returning(BbpTableBase.id)
+
+
+def _inserted_ids(ids) -> List[int]:
+    return sorted(ids)
+
+
+_DELETE_OPTIONS = {"synchronize_session": False}
+
+
 class BbpUpdateSchema(BaseModel):
     """
     Pydantic модель для обновления данных в таблице "bbp".
@@ -53,16 +263,32 @@ class BbpCRUD:
     """
     Класс для выполнения CRUD-операций с таблицей "bbp" в базе данных.
     """
+    BATCH_SIZE = 1000  # Размер пачки по умолчанию для массовых операций
 
-    def __init__(self, engine):
+    def __init__(self, engine, breach_index=None):
         """
         Инициализирует CRUD-операции, создавая сессию подключения к базе данных.
 
         Args:
             engine: SQLAlchemy engine, представляющий подключение к базе данных.
+            breach_index (BreachIndex): Локальный индекс утечек; если задан, create и update
+                не сохраняют пароли из него (BreachedPasswordError).
         """
         self.Session = sessionmaker(bind=engine)  # Создаем сессию для работы с базой данных
+        self.breach_index = breach_index
+        metrics.instrument_engine(engine)  # Счетчики SQL-запросов для метрик операций
+
+    def _check_password(self, password) -> None:
+        if self.breach_index is not None and password is not None:
+            self.breach_index.check(password)
+
+    def _check_passwords(self, rows: Iterable[dict]) -> None:
+        # Пачка проверяется целиком до запроса, чтобы не записать ее часть
+        if self.breach_index is not None:
+            for row in rows:
+                self._check_password(row.get("password"))
 
+    @_timed("create")
     def create(self, login, password, notes):
         """
         Создает новую запись в таблице "bbp".
@@ -75,6 +301,7 @@ class BbpCRUD:
         Returns:
             BbpTableBase: Объект созданной записи.
         """
+        self._check_password(password)
         with self.Session() as session:
             new_record = BbpTableBase(login=login, password=password, notes=notes)  # Создаем новую запись
             session.add(new_record)  # Добавляем запись в сессию
@@ -82,6 +309,7 @@ class BbpCRUD:
             session.refresh(new_record)  # Обновляем объект, чтобы получить сгенерированный ID
             return new_record
 
+    @_timed("read")
     def read(self, record_id: int):
         """
         Получает запись из таблицы "bbp" по ID.
@@ -95,6 +323,7 @@ class BbpCRUD:
         with self.Session() as session:
             return session.get(BbpTableBase, record_id)  # Получаем запись по ID
 
+    @_timed("read_all")
     def read_all(self):
         """
         Получает все записи из таблицы "bbp".
@@ -105,6 +334,85 @@ class BbpCRUD:
         with self.Session() as session:
             return session.query(BbpTableBase).all()
 
+    def iter_all(self, batch_size: int = BATCH_SIZE) -> Iterator[BbpTableBase]:
+        """
+        Перебирает все записи таблицы "bbp" по возрастанию ID, загружая их пачками.
+
+        В отличие от read_all, в памяти одновременно находится не больше одной
+        пачки ORM-объектов, а первые записи доступны сразу. Сессия остается
+        открытой, пока генератор не будет исчерпан или закрыт.
+
+        Args:
+            batch_size (int): Количество строк, загружаемых за раз.
+
+        Yields:
+            BbpTableBase: Объекты записей.
+        """
+        statement = (select(BbpTableBase)
+                     .order_by(BbpTableBase.id)
+                     .execution_options(yield_per=batch_size))
+        with self.Session() as session:
+            yield from session.scalars(statement)
+
+    @_timed("page")
+    def page(self, after_id: Optional[int] = None, limit: int = 100) -> List[BbpTableBase]:
+        """
+        Получает страницу записей по ключу (keyset-пагинация по первичному ключу).
+
+        Args:
+            after_id (Optional[int]): ID последней записи предыдущей страницы; None для первой страницы.
+            limit (int): Максимальное количество записей на странице.
+
+        Returns:
+            List[BbpTableBase]: Записи с ID больше after_id по возрастанию ID.
+        """
+        with self.Session() as session:
+            return list(session.scalars(_page_statement(after_id, limit)))
+
+    @_timed("read_rows")
+    def read_rows(self, columns: Iterable[str] = DEFAULT_PROJECTION, after_id: Optional[int] = None,
+                  limit: Optional[int] = None) -> List[tuple]:
+        """
+        Читает только выбранные столбцы в компактные строки без ORM-объектов.
+
+        Запрос выполняется через Core: нет identity map и инструментирования, а
+        password и notes не читаются (и не расшифровываются), если их не запросили.
+        Для списков достаточно столбцов по умолчанию, заметки можно дочитать через
+        read_notes.
+
+        Args:
+            columns (Iterable[str]): Имена столбцов из PROJECTION_COLUMNS.
+            after_id (Optional[int]): Читать записи с ID больше указанного (keyset-пагинация).
+            limit (Optional[int]): Максимальное количество строк; None - все.
+
+        Returns:
+            List[tuple]: Строки-namedtuple с полями в порядке columns, по возрастанию ID.
+        """
+        columns = tuple(columns)
+        make_row = _row_type(columns)._make
+        with self.Session() as session:
+            return list(map(make_row, session.connection().execute(_rows_statement(columns, after_id, limit))))
+
+    @_timed("read_notes")
+    def read_notes(self, record_ids: Iterable[int], batch_size: int = BATCH_SIZE) -> Dict[int, str]:
+        """
+        Дочитывает заметки для выбранных записей (отложенная загрузка для read_rows).
+
+        Args:
+            record_ids (Iterable[int]): ID записей.
+            batch_size (int): Количество ID в одном запросе.
+
+        Returns:
+            Dict[int, str]: Заметки по ID; отсутствующие записи пропускаются.
+        """
+        notes = {}
+        with self.Session() as session:
+            connection = session.connection()
+            for batch in _batched(record_ids, batch_size):
+                notes.update(connection.execute(_notes_statement(batch)).all())
+        return notes
+
+    @_timed("update")
     def update(self, record_id: int, update_data: BbpUpdateSchema):
         """
         Обновляет запись в таблице "bbp" по ID, используя Pydantic модель.
@@ -116,6 +424,7 @@ class BbpCRUD:
         Returns:
             BbpTableBase: Объект обновленной записи, если найден, иначе None.
         """
+        self._check_password(update_data.model_dump(exclude_unset=True).get("password"))
         with self.Session() as session:
             record = session.get(BbpTableBase, record_id)  # Получаем запись по ID
             if record:
@@ -128,6 +437,7 @@ class BbpCRUD:
                 return record
             return None
 
+    @_timed("delete")
     def delete(self, record_id: int):
         """
         Удаляет запись из таблицы "bbp" по ID.
@@ -145,3 +455,265 @@ class BbpCRUD:
                 session.commit()  # Сохраняем изменения в базе данных
                 return True
             return False
+
+    @_timed("bulk_create")
+    def bulk_create(self, records: Iterable, batch_size: int = BATCH_SIZE) -> List[int]:
+        """
+        Создает много записей в одной транзакции (INSERT ... RETURNING пачками).
+
+        Args:
+            records (Iterable): Записи в виде словарей с ключами login, password, notes
+                или кортежей (login, password, notes); ключ id не допускается.
+            batch_size (int): Количество строк в одном запросе.
+
+        Returns:
+            List[int]: ID созданных записей в том же порядке.
+        """
+        ids = []
+        with self.Session() as session:
+            for batch in _batched(records, batch_size):
+                rows = _insert_rows(batch)
+                self._check_passwords(rows)
+                ids.extend(_inserted_ids(session.scalars(_BULK_INSERT, rows)))
+            session.commit()  # Один коммит на всю операцию
+        return ids
+
+    @_timed("bulk_update")
+    def bulk_update(self, updates: Dict[int, BbpUpdateSchema], batch_size: int = BATCH_SIZE) -> int:
+        """
+        Обновляет много записей в одной транзакции (executemany пачками).
+
+        Args:
+            updates (Dict[int, BbpUpdateSchema]): Данные для обновления по ID записи.
+            batch_size (int): Количество строк в одном запросе.
+
+        Returns:
+            int: Количество обновленных записей.
+        """
+        updated = 0
+        groups = _update_groups(updates)
+        for rows in groups.values():
+            self._check_passwords(rows)
+        with self.Session() as session:
+            for keys, rows in groups.items():
+                statement = _bulk_update_statement(keys)
+                for batch in _batched(rows, batch_size):
+                    updated += session.connection().execute(statement, batch).rowcount
+            session.commit()
+        return updated
+
+    @_timed("bulk_delete")
+    def bulk_delete(self, record_ids: Iterable[int], batch_size: int = BATCH_SIZE) -> int:
+        """
+        Удаляет много записей в одной транзакции.
+
+        Args:
+            record_ids (Iterable[int]): ID записей для удаления.
+            batch_size (int): Количество ID в одном запросе.
+
+        Returns:
+            int: Количество удаленных записей.
+        """
+        deleted = 0
+        with self.Session() as session:
+            for batch in _batched(record_ids, batch_size):
+                deleted += session.execute(_bulk_delete_statement(batch), execution_options=_DELETE_OPTIONS).rowcount
+            session.commit()
+        return deleted
+
+    @_timed("search")
+    def search(self, query: str, limit: int = 20) -> List[BbpTableBase]:
+        """
+        Полнотекстовый поиск по логину и заметкам с ранжированием (SQLite FTS5, bm25).
+
+        Каждое слово запроса ищется как префикс, все слова должны встретиться в записи.
+
+        Args:
+            query (str): Поисковая строка.
+            limit (int): Максимальное количество результатов.
+
+        Returns:
+            List[BbpTableBase]: Найденные записи, самые релевантные первыми.
+        """
+        match = _fts_query(query)
+        if not match:
+            return []
+        with self.Session() as session:
+            return list(session.scalars(_search_statement(match, limit)))
+
+    @_timed("search_rows")
+    def search_rows(self, query: str, columns: Iterable[str] = DEFAULT_PROJECTION, limit: int = 20) -> List[tuple]:
+        """
+        Полнотекстовый поиск (как search), но в компактные строки выбранных столбцов:
+        для списков результатов не читаются и не расшифровываются пароли.
+
+        Args:
+            query (str): Поисковая строка.
+            columns (Iterable[str]): Имена столбцов из PROJECTION_COLUMNS.
+            limit (int): Максимальное количество результатов.
+
+        Returns:
+            List[tuple]: Строки-namedtuple с полями в порядке columns, самые релевантные первыми.
+        """
+        columns = tuple(columns)
+        make_row = _row_type(columns)._make
+        match = _fts_query(query)
+        if not match:
+            return []
+        with self.Session() as session:
+            return list(map(make_row, session.connection().execute(_search_rows_statement(columns, match, limit))))
+
+    @_timed("search_login")
+    def search_login(self, prefix: str, limit: int = 20) -> List[BbpTableBase]:
+        """
+        Поиск записей по началу логина через B-tree индекс ix_bbp_login (с учетом регистра).
+
+        Args:
+            prefix (str): Начало логина.
+            limit (int): Максимальное количество результатов.
+
+        Returns:
+            List[BbpTableBase]: Записи, отсортированные по логину.
+        """
+        with self.Session() as session:
+            return list(session.scalars(_search_login_statement(prefix, limit)))
+
+    @_timed("rebuild_search_index")
+    def rebuild_search_index(self) -> None:
+        """
+        Создает индексы поиска в существующей базе данных (если их нет) и перестраивает
+        полнотекстовый индекс по текущему содержимому таблицы.
+        """
+        with self.Session() as session:
+            connection = session.connection()
+            for index in BbpTableBase.__table__.indexes:
+                index.create(connection, checkfirst=True)
+            for statement in SEARCH_DDL:
+                connection.execute(text(statement))
+            connection.execute(text("INSERT INTO bbp_fts(bbp_fts) VALUES ('rebuild')"))
+            session.commit()
+
+
+def _is_query_key(key) -> bool:
+    return key[0] != "record"
+
+
+class CachedBbpCRUD(BbpCRUD):
+    """
+    BbpCRUD с кэшем чтения перед read, read_all, search и search_login.
+
+    Чтение возвращает неизменяемые снимки BbpRecord вместо ORM-объектов.
+    Изменения через этот объект инвалидируют кэш: update/delete и массовые
+    операции удаляют закэшированные записи с затронутыми ID, любое изменение
+    удаляет закэшированные результаты запросов. Блокировка и разблокировка
+    хранилища полностью очищают кэш. Изменения в обход этого объекта
+    (другой процесс, другой BbpCRUD) видны только после истечения ttl кэша.
+    """
+
+    def __init__(self, engine, cache: RecordCache = None, breach_index=None):
+        """
+        Args:
+            engine: SQLAlchemy engine, представляющий подключение к базе данных.
+            cache (RecordCache): Кэш; по умолчанию RecordCache с настройками по умолчанию.
+            breach_index (BreachIndex): Локальный индекс утечек (см. BbpCRUD).
+        """
+        super().__init__(engine, breach_index)
+        self.cache = cache if cache is not None else RecordCache()
+        self._vault_generation = vault_key.generation
+
+    @property
+    def stats(self) -> dict:
+        """
+        Счетчики кэша (см. RecordCache.stats).
+        """
+        return self.cache.stats
+
+    def _cached(self, key, load):
+        if self._vault_generation != vault_key.generation:
+            # Расшифрованные пароли не должны переживать смену ключа хранилища
+            self.cache.clear()
+            self._vault_generation = vault_key.generation
+        return self.cache.get_or_load(key, load)
+
+    def _invalidate(self, record_ids: Iterable[int] = ()) -> None:
+        self.cache.invalidate(("record", record_id) for record_id in record_ids)
+        self.cache.invalidate_where(_is_query_key)
+
+    def read(self, record_id: int) -> Optional[BbpRecord]:
+        load = super().read
+        return self._cached(("record", record_id), lambda: BbpRecord.from_orm(load(record_id)))
+
+    def read_all(self) -> List[BbpRecord]:
+        load = super().read_all
+        return list(self._cached(("all",), lambda: tuple(map(BbpRecord.from_orm, load()))))
+
+    def search(self, query: str, limit: int = 20) -> List[BbpRecord]:
+        load = super().search
+        return list(self._cached(("search", _fts_query(query), limit),
+                                 lambda: tuple(map(BbpRecord.from_orm, load(query, limit)))))
+
+    def search_login(self, prefix: str, limit: int = 20) -> List[BbpRecord]:
+        load = super().search_login
+        return list(self._cached(("login", prefix, limit),
+                                 lambda: tuple(map(BbpRecord.from_orm, load(prefix, limit)))))
+
+    def create(self, login, password, notes):
+        try:
+            return super().create(login, password, notes)
+        finally:
+            self._invalidate()
+
+    def update(self, record_id: int, update_data: BbpUpdateSchema):
+        try:
+            return super().update(record_id, update_data)
+        finally:
+            self._invalidate((record_id,))
+
+    def delete(self, record_id: int):
+        try:
+            return super().delete(record_id)
+        finally:
+            self._invalidate((record_id,))
+
+    def bulk_create(self, records: Iterable, batch_size: int = BbpCRUD.BATCH_SIZE) -> List[int]:
+        try:
+            return super().bulk_create(records, batch_size)
+        finally:
+            self._invalidate()
+
+    def bulk_update(self, updates: Dict[int, BbpUpdateSchema], batch_size: int = BbpCRUD.BATCH_SIZE) -> int:
+        try:
+            return super().bulk_update(updates, batch_size)
+        finally:
+            self._invalidate(updates)
+
+    def bulk_delete(self, record_ids: Iterable[int], batch_size: int = BbpCRUD.BATCH_SIZE) -> int:
+        record_ids = list(record_ids)
+        try:
+            return super().bulk_delete(record_ids, batch_size)
+        finally:
+            self._invalidate(record_ids)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Обслуживание таблицы bbp")
+    parser.add_argument("command", choices=["rebuild-search"])
+    parser.add_argument("database_url", nargs="?", default=None,
+                        help="URL базы данных (по умолчанию SQLITE_PATH из .env)")
+    args = parser.parse_args()
+
+    if args.database_url:
+        from sqlalchemy import create_engine
+        engine = create_engine(args.database_url)
+    else:
+        from src.core.Database import database
+        engine = database.engine
+
+    BbpCRUD(engine).rebuild_search_index()
+    print("Search index rebuilt")
+
+
+if __name__ == "__main__":
+    main()
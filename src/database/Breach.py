@@ -0,0 +1,410 @@
+import binascii
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import struct
+import tempfile
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+# Формат индекса: заголовок (MAGIC, количество хешей), таблица FANOUT_SIZE + 1 смещений по
+# первым двум байтам хеша, затем отсортированные 20-байтовые SHA-1 без повторов.
+MAGIC = b"BBPHIBP1"
+DIGEST_SIZE = 20
+FANOUT_SIZE = 1 << 16
+_HEADER = struct.Struct("<8sQ")
+_OFFSET = struct.Struct("<Q")
+_ENTRIES_OFFSET = _HEADER.size + (FANOUT_SIZE + 1) * _OFFSET.size
+
+# Формат фильтра Блума: заголовок (BLOOM_MAGIC, количество бит, количество хеш-функций), затем биты
+BLOOM_MAGIC = b"BBPBLOOM"
+BLOOM_SUFFIX = ".bloom"
+_BLOOM_HEADER = struct.Struct("<8sQI4x")
+
+RUN_SIZE = 5_000_000  # Хешей в одном отсортированном куске при конвертации (~300 МБ: ~60 байт на объект bytes)
+READ_SIZE = 1 << 20
+BATCH_SIZE = 1000
+
+
+class BreachedPasswordError(ValueError):
+    """
+    Исключение, возникающее при попытке сохранить пароль из базы утечек.
+    """
+
+
+class BreachedRecord(NamedTuple):
+    """
+    Запись хранилища, пароль которой найден в базе утечек.
+    """
+    id: int
+    login: str
+
+
+def password_digest(password: str) -> bytes:
+    """
+    SHA-1 пароля в кодировке UTF-8 (как в списках утечек Have I Been Pwned).
+    """
+    return hashlib.sha1(password.encode()).digest()
+
+
+def _parse_digests(lines: Iterable[bytes]) -> Iterator[bytes]:
+    # Строки вида "SHA1HEX" или "SHA1HEX:количество", регистр не важен
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        digest = line.split(b":", 1)[0]
+        if len(digest) != 2 * DIGEST_SIZE:
+            raise ValueError(f"Invalid SHA-1 on line {number}")
+        try:
+            yield binascii.unhexlify(digest)
+        except binascii.Error:
+            raise ValueError(f"Invalid SHA-1 on line {number}") from None
+
+
+def _write_run(digests: List[bytes], directory: str) -> str:
+    digests.sort()
+    fd, path = tempfile.mkstemp(suffix=".run", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"".join(digests))
+    return path
+
+
+def _read_run(path: str) -> Iterator[bytes]:
+    size = READ_SIZE - READ_SIZE % DIGEST_SIZE
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(size)
+            if not block:
+                return
+            for offset in range(0, len(block), DIGEST_SIZE):
+                yield block[offset:offset + DIGEST_SIZE]
+
+
+def _sorted_digests(lines: Iterable[bytes], directory: str, run_size: int) -> Iterator[bytes]:
+    # Внешняя сортировка: куски по run_size хешей сортируются в памяти и сливаются с диска
+    runs, digests = [], []
+    try:
+        for digest in _parse_digests(lines):
+            digests.append(digest)
+            if len(digests) >= run_size:
+                runs.append(_write_run(digests, directory))
+                digests = []
+        digests.sort()
+        if not runs:
+            yield from digests
+            return
+        yield from heapq.merge(digests, *map(_read_run, runs))
+    finally:
+        for path in runs:
+            os.remove(path)
+
+
+def build_index(corpus_path: str, index_path: str, bloom_error_rate: Optional[float] = None,
+                run_size: int = RUN_SIZE) -> int:
+    """
+    Конвертирует текстовый список SHA-1 (один хеш в строке, допускается ":количество")
+    в отсортированный бинарный индекс. Выполняется один раз после загрузки списка;
+    память ограничена run_size хешами, остальное сортируется через временные файлы
+    рядом с индексом. Индекс записывается во временный файл и атомарно заменяет старый.
+
+    Args:
+        corpus_path (str): Путь к текстовому списку.
+        index_path (str): Путь к создаваемому индексу.
+        bloom_error_rate (Optional[float]): Если задано, рядом создается фильтр Блума
+            (index_path + BLOOM_SUFFIX) с такой долей ложных срабатываний.
+        run_size (int): Хешей в одном куске внешней сортировки.
+
+    Returns:
+        int: Количество уникальных хешей в индексе.
+    """
+    directory = os.path.dirname(os.path.abspath(index_path))
+    fanout = [0] * (FANOUT_SIZE + 1)
+    count, previous = 0, None
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f, open(corpus_path, "rb") as corpus:
+            f.seek(_ENTRIES_OFFSET)
+            buffer = []
+            for digest in _sorted_digests(corpus, directory, run_size):
+                if digest == previous:
+                    continue
+                previous = digest
+                fanout[(digest[0] << 8 | digest[1]) + 1] += 1
+                buffer.append(digest)
+                if len(buffer) >= BATCH_SIZE:
+                    f.write(b"".join(buffer))
+                    buffer = []
+            f.write(b"".join(buffer))
+            count = sum(fanout)
+
+            for prefix in range(FANOUT_SIZE):  # Количества по префиксам -> смещения
+                fanout[prefix + 1] += fanout[prefix]
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, count))
+            f.write(struct.pack(f"<{FANOUT_SIZE + 1}Q", *fanout))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    if bloom_error_rate is not None:
+        build_bloom(index_path, index_path + BLOOM_SUFFIX, bloom_error_rate)
+    elif os.path.exists(index_path + BLOOM_SUFFIX):
+        os.remove(index_path + BLOOM_SUFFIX)  # Фильтр старого индекса дал бы ложные отрицательные ответы
+    return count
+
+
+def _bloom_positions(digest: bytes, bits: int, hashes: int) -> Iterator[int]:
+    # SHA-1 уже равномерен: две половины хеша дают k позиций (двойное хеширование)
+    first = int.from_bytes(digest[:8], "little")
+    step = int.from_bytes(digest[8:16], "little") | 1
+    for i in range(hashes):
+        yield (first + i * step) % bits
+
+
+def build_bloom(index_path: str, bloom_path: str, error_rate: float = 0.01) -> None:
+    """
+    Строит фильтр Блума по готовому индексу. Отрицательный ответ фильтра не требует
+    обращения к индексу (большинство паролей не найдены в утечках).
+
+    Args:
+        index_path (str): Путь к индексу (build_index).
+        bloom_path (str): Путь к создаваемому фильтру.
+        error_rate (float): Доля ложных срабатываний (0 < error_rate < 1).
+    """
+    if not 0 < error_rate < 1:
+        raise ValueError("error_rate must be between 0 and 1")
+    with BreachIndex(index_path, bloom_path=False) as index:
+        count = max(len(index), 1)
+        bits = max(8, math.ceil(-count * math.log(error_rate) / math.log(2) ** 2))
+        hashes = max(1, round(bits / count * math.log(2)))
+        bitmap = bytearray((bits + 7) // 8)
+        for digest in index:
+            for position in _bloom_positions(digest, bits, hashes):
+                bitmap[position >> 3] |= 1 << (position & 7)
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(bloom_path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_BLOOM_HEADER.pack(BLOOM_MAGIC, bits, hashes))
+            f.write(bitmap)
+        os.replace(tmp_path, bloom_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _map(f: BinaryIO, magic: bytes, header: struct.Struct):
+    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(data) < header.size or data[:len(magic)] != magic:
+        data.close()
+        raise ValueError(f"Unexpected file format: {f.name}")
+    return data
+
+
+class BreachIndex:
+    """
+    Проверка паролей по локальному индексу утечек (build_index) без сети.
+
+    Индекс отображается в память (mmap) и не читается целиком: поиск занимает
+    две чтения таблицы префиксов и двоичный поиск внутри префикса, то есть
+    несколько страниц файла. Если рядом есть фильтр Блума, большинство
+    отсутствующих паролей отсеивается им без обращения к индексу.
+    """
+
+    def __init__(self, path: str, bloom_path=None):
+        """
+        Args:
+            path (str): Путь к индексу.
+            bloom_path: Путь к фильтру Блума; None - path + BLOOM_SUFFIX, если файл есть;
+                False - без фильтра.
+        """
+        self.path = path
+        self._file = self._data = self._bloom_file = self._bloom = None
+        try:
+            self._file = open(path, "rb")
+            self._data = _map(self._file, MAGIC, _HEADER)
+            _, self._count = _HEADER.unpack_from(self._data)
+            if _ENTRIES_OFFSET + self._count * DIGEST_SIZE != len(self._data):
+                raise ValueError(f"Truncated breach index file: {path}")
+
+            if bloom_path is None and os.path.exists(path + BLOOM_SUFFIX):
+                bloom_path = path + BLOOM_SUFFIX
+            if bloom_path:
+                self._bloom_file = open(bloom_path, "rb")
+                self._bloom = _map(self._bloom_file, BLOOM_MAGIC, _BLOOM_HEADER)
+                _, self._bloom_bits, self._bloom_hashes = _BLOOM_HEADER.unpack_from(self._bloom)
+        except BaseException:
+            self.close()
+            raise
+        self.bloom_rejections = 0  # Сколько проверок завершил фильтр Блума
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[bytes]:
+        for offset in range(_ENTRIES_OFFSET, len(self._data), DIGEST_SIZE):
+            yield self._data[offset:offset + DIGEST_SIZE]
+
+    def __contains__(self, password: str) -> bool:
+        return self.contains(password)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _maybe_contains(self, digest: bytes) -> bool:
+        bloom = self._bloom
+        if bloom is None:
+            return True
+        bits, position = self._bloom_bits, int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:16], "little") | 1
+        for _ in range(self._bloom_hashes):  # Та же последовательность, что в _bloom_positions
+            position %= bits
+            if not bloom[_BLOOM_HEADER.size + (position >> 3)] >> (position & 7) & 1:
+                self.bloom_rejections += 1
+                return False
+            position += step
+        return True
+
+    def contains_digest(self, digest: bytes) -> bool:
+        """
+        Проверяет SHA-1 (20 байт) по индексу.
+
+        Args:
+            digest (bytes): SHA-1 пароля.
+
+        Returns:
+            bool: True, если хеш есть в списке утечек.
+        """
+        if len(digest) != DIGEST_SIZE:
+            raise ValueError(f"SHA-1 digest must be {DIGEST_SIZE} bytes")
+        if not self._maybe_contains(digest):
+            return False
+        data = self._data
+        prefix = digest[0] << 8 | digest[1]
+        low, = _OFFSET.unpack_from(data, _HEADER.size + prefix * _OFFSET.size)
+        high, = _OFFSET.unpack_from(data, _HEADER.size + (prefix + 1) * _OFFSET.size)
+        while low < high:
+            middle = (low + high) // 2
+            offset = _ENTRIES_OFFSET + middle * DIGEST_SIZE
+            entry = data[offset:offset + DIGEST_SIZE]
+            if entry < digest:
+                low = middle + 1
+            elif entry > digest:
+                high = middle
+            else:
+                return True
+        return False
+
+    def contains(self, password: str) -> bool:
+        """
+        Проверяет пароль по индексу.
+
+        Args:
+            password (str): Пароль.
+
+        Returns:
+            bool: True, если пароль есть в списке утечек.
+        """
+        return self.contains_digest(password_digest(password))
+
+    def check(self, password: str) -> None:
+        """
+        Вызывает BreachedPasswordError, если пароль есть в списке утечек.
+        """
+        if self.contains(password):
+            raise BreachedPasswordError("Password has appeared in a data breach")
+
+    def audit(self, crud, batch_size: int = BATCH_SIZE) -> List[BreachedRecord]:
+        """
+        Проверяет все записи хранилища. Записи читаются страницами (только id, логин и
+        пароль); одинаковые пароли хешируются и проверяются один раз, хеши страницы
+        проверяются по возрастанию, чтобы соседние поиски попадали в уже прочитанные
+        страницы индекса.
+
+        Args:
+            crud: BbpCRUD (нужен разблокированный ключ хранилища).
+            batch_size (int): Размер страницы чтения.
+
+        Returns:
+            List[BreachedRecord]: Записи с паролями из утечек по возрастанию id.
+        """
+        breached, checked = [], {}  # type: List[BreachedRecord], Dict[bytes, bool]
+        after_id = None
+        while True:
+            rows = crud.read_rows(("id", "login", "password"), after_id, batch_size)
+            digests = {row.id: password_digest(row.password) for row in rows}
+            for digest in sorted(set(digests.values()) - checked.keys()):
+                checked[digest] = self.contains_digest(digest)
+            breached.extend(BreachedRecord(row.id, row.login) for row in rows if checked[digests[row.id]])
+            if len(rows) < batch_size:
+                return breached
+            after_id = rows[-1].id
+
+    def close(self) -> None:
+        for resource in (self._data, self._file, self._bloom, self._bloom_file):
+            if resource is not None:
+                resource.close()
+
+
+def main():
+    import argparse
+    import getpass
+    import time
+
+    parser = argparse.ArgumentParser(description="Проверка паролей по локальному списку утечек")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="конвертировать текстовый список SHA-1 в индекс")
+    build_parser.add_argument("corpus")
+    build_parser.add_argument("index")
+    build_parser.add_argument("--bloom", type=float, metavar="ERROR_RATE", default=None,
+                              help="создать фильтр Блума с такой долей ложных срабатываний (например, 0.01)")
+    check_parser = subparsers.add_parser("check", help="проверить пароль (вводится без отображения)")
+    check_parser.add_argument("index")
+    audit_parser = subparsers.add_parser("audit", help="проверить все записи хранилища")
+    audit_parser.add_argument("index")
+    audit_parser.add_argument("--database-url", default=None, help="URL базы данных (по умолчанию SQLITE_PATH из .env)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        count = build_index(args.corpus, args.index, args.bloom)
+        print(f"{count} hashes indexed in {time.perf_counter() - started:.1f}s")
+        return
+
+    with BreachIndex(args.index) as index:
+        if args.command == "check":
+            print("Breached" if index.contains(getpass.getpass("Password: ")) else "Not found")
+            return
+
+        from src.database.BbpBase import BbpCRUD
+        if args.database_url:
+            from sqlalchemy import create_engine
+            engine = create_engine(args.database_url)
+        else:
+            from src.core.Database import database
+            engine = database.engine
+        from src.database.MasterKey import MasterKeyStore
+        store = MasterKeyStore(engine)
+        if not store.initialized:
+            parser.error("master password is not set for this database")
+        if not store.unlock(getpass.getpass("Master password: ")):
+            parser.error("wrong master password")
+        try:
+            breached = index.audit(BbpCRUD(engine))
+        finally:
+            store.lock()
+        for record in breached:
+            print(f"{record.id}\t{record.login}")
+        print(f"{len(breached)} breached passwords")
+
+
+if __name__ == "__main__":
+    main()
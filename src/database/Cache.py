@@ -0,0 +1,196 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+_MISSING = object()
+
+
+def approximate_size(value: Any) -> int:
+    """
+    Приблизительный размер значения в байтах (сам объект и вложенные строки/кортежи).
+
+    Args:
+        value (Any): Кэшируемое значение.
+
+    Returns:
+        int: Размер в байтах.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, tuple):
+        size += sum(approximate_size(item) for item in value)
+    return size
+
+
+class RecordCache:
+    """
+    Ограниченный LRU-кэш с необязательным временем жизни записей.
+
+    Объем ограничивается количеством записей и приблизительным размером в байтах;
+    при переполнении вытесняются давно не использованные записи. Значения должны
+    быть неизменяемыми (кортежи, NamedTuple), тогда попадание в кэш не может
+    изменить закэшированные данные. Все операции потокобезопасны.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024, ttl: Optional[float] = None,
+                 sizeof: Callable[[Any], int] = approximate_size):
+        """
+        Args:
+            max_entries (int): Максимальное количество записей.
+            max_bytes (int): Максимальный суммарный размер записей в байтах.
+            ttl (Optional[float]): Время жизни записи в секундах; None - без ограничения.
+            sizeof (Callable[[Any], int]): Функция оценки размера значения.
+        """
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("max_entries and max_bytes must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof
+        self._entries = OrderedDict()  # ключ -> (значение, размер, срок действия)
+        self._bytes = 0
+        self._generation = 0  # Увеличивается при каждой инвалидации
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        """
+        Возвращает значение по ключу и отмечает его как недавно использованное.
+
+        Args:
+            key (Hashable): Ключ.
+            default (Any): Значение, если ключа нет или срок записи истек.
+            count (bool): Учитывать обращение в счетчиках попаданий и промахов.
+
+        Returns:
+            Any: Закэшированное значение или default.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Сохраняет значение, вытесняя старые записи при превышении лимитов.
+        Значения больше max_bytes не кэшируются.
+
+        Args:
+            key (Hashable): Ключ.
+            value (Any): Неизменяемое значение.
+        """
+        self._store(key, value, None)
+
+    def _store(self, key: Hashable, value: Any, generation: Optional[int]) -> None:
+        size = self._sizeof(value)
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return  # Значение загружено до инвалидации и могло устареть
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, expires)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        Возвращает значение из кэша или загружает и сохраняет его (None не кэшируется).
+
+        Если во время загрузки произошла инвалидация, загруженное значение могло
+        устареть и в кэш не попадает.
+
+        Args:
+            key (Hashable): Ключ.
+            load (Callable[[], Any]): Функция загрузки значения при промахе.
+
+        Returns:
+            Any: Значение.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            generation = self._generation
+            value = load()
+            if value is not None:
+                self._store(key, value, generation)
+        return value
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        """
+        Удаляет записи с указанными ключами.
+
+        Args:
+            keys (Iterable[Hashable]): Ключи удаляемых записей.
+        """
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """
+        Удаляет записи, ключи которых удовлетворяют условию.
+
+        Args:
+            predicate (Callable[[Hashable], bool]): Условие для ключа.
+        """
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._entries if predicate(key)]:
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """
+        Очищает кэш (счетчики сохраняются).
+        """
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    @property
+    def stats(self) -> dict:
+        """
+        Счетчики кэша: попадания, промахи, вытеснения, инвалидации и текущий объем.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,185 @@
+import base64
+import os
+from contextlib import contextmanager
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from sqlalchemy import String
+from sqlalchemy.exc import DontWrapMixin
+from sqlalchemy.types import TypeDecorator
+
+
+class VaultLockedError(DontWrapMixin, RuntimeError):
+    """
+    Исключение, возникающее при попытке зашифровать или расшифровать значение без ключа хранилища.
+
+    DontWrapMixin: SQLAlchemy не оборачивает его в StatementError при записи.
+    """
+
+
+class VaultKey:
+    """
+    Ключ хранилища для шифрования отдельных полей.
+
+    Пароль растягивается через PBKDF2 один раз при разблокировке, дальше каждое
+    значение шифруется AES-GCM без повторного вызова KDF.
+
+    Формат значения в базе: "enc1:" + base64(nonce | шифротекст | тег).
+
+    allow_plaintext разрешает записывать значения открытым текстом, пока хранилище
+    заблокировано (тесты, импорт старых баз). По умолчанию запись без ключа вызывает
+    VaultLockedError, чтобы пароль не попал в базу незашифрованным.
+    """
+    PREFIX = "enc1:"
+    KEY_SIZE = 32
+    NONCE_SIZE = 12
+    KDF_ITERATIONS = 100000
+
+    def __init__(self, allow_plaintext: bool = False):
+        """
+        Args:
+            allow_plaintext (bool): Разрешить запись открытым текстом без ключа.
+        """
+        self._aead = None
+        self.allow_plaintext = allow_plaintext
+        self.generation = 0  # Меняется при каждой разблокировке и блокировке (для сброса кэшей)
+
+    @property
+    def unlocked(self) -> bool:
+        return self._aead is not None
+
+    def unlock(self, password: str, salt: bytes, iterations: int = KDF_ITERATIONS) -> None:
+        """
+        Выводит ключ хранилища из пароля (один раз за сессию).
+
+        Args:
+            password (str): Мастер-пароль.
+            salt (bytes): Соль, сохраненная вместе с хранилищем.
+            iterations (int): Количество итераций PBKDF2.
+        """
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=self.KEY_SIZE,
+            salt=salt,
+            iterations=iterations,
+        )
+        self.unlock_with_key(kdf.derive(password.encode()))
+
+    def unlock_with_key(self, key: bytes) -> None:
+        """
+        Разблокирует хранилище уже выведенным ключом.
+
+        Args:
+            key (bytes): 32-байтовый ключ.
+        """
+        if len(key) != self.KEY_SIZE:
+            raise ValueError(f"Vault key must be {self.KEY_SIZE} bytes")
+        self._aead = AESGCM(key)
+        self.generation += 1
+
+    def lock(self) -> None:
+        """
+        Забывает ключ хранилища.
+        """
+        self._aead = None
+        self.generation += 1
+
+    @contextmanager
+    def temporary_unlock(self, key: bytes = None):
+        """
+        Разблокирует хранилище на время блока (бенчмарки, утилиты) и блокирует его на выходе.
+
+        Args:
+            key (bytes): 32-байтовый ключ; по умолчанию случайный.
+        """
+        self.unlock_with_key(key or os.urandom(self.KEY_SIZE))
+        try:
+            yield self
+        finally:
+            self.lock()
+
+    def _cipher(self) -> AESGCM:
+        aead = self._aead
+        if aead is None:
+            raise VaultLockedError("Vault is locked")
+        return aead
+
+    def encrypt(self, value: str, context: bytes = b"") -> str:
+        """
+        Шифрует строку.
+
+        Args:
+            value (str): Открытое значение.
+            context (bytes): Дополнительные данные (например, имя столбца), которые
+                привязывают шифротекст к месту хранения.
+
+        Returns:
+            str: Зашифрованное значение с префиксом формата.
+        """
+        nonce = os.urandom(self.NONCE_SIZE)
+        ciphertext = self._cipher().encrypt(nonce, value.encode(), context)
+        return self.PREFIX + base64.b64encode(nonce + ciphertext).decode("ascii")
+
+    def decrypt(self, value: str, context: bytes = b"") -> str:
+        """
+        Расшифровывает строку. Значения без префикса (старые записи) возвращаются как есть.
+
+        Args:
+            value (str): Значение из базы данных.
+            context (bytes): Те же дополнительные данные, что и при шифровании.
+
+        Returns:
+            str: Открытое значение.
+        """
+        if value is None or not value.startswith(self.PREFIX):
+            return value
+        return self._decrypt_value(self._cipher(), value, context)
+
+    def _decrypt_value(self, aead: AESGCM, value: str, context: bytes) -> str:
+        raw = base64.b64decode(value[len(self.PREFIX):])
+        try:
+            return aead.decrypt(raw[:self.NONCE_SIZE], raw[self.NONCE_SIZE:], context).decode()
+        except InvalidTag:
+            raise ValueError("Wrong vault key or corrupted value") from None
+
+
+class EncryptedString(TypeDecorator):
+    """
+    Тип столбца SQLAlchemy, прозрачно шифрующий строку ключом хранилища.
+
+    Пока хранилище заблокировано, запись и чтение зашифрованных значений вызывают
+    VaultLockedError. Открытый текст записывается только с VaultKey.allow_plaintext и
+    только если он не начинается с префикса формата (иначе он читался бы как шифротекст,
+    такое значение можно сохранить только в разблокированном хранилище).
+    """
+    impl = String
+    cache_ok = True
+
+    def __init__(self, vault: VaultKey, context: bytes = b"", *args, **kwargs):
+        """
+        Args:
+            vault (VaultKey): Ключ хранилища.
+            context (bytes): Дополнительные данные AEAD, обычно "таблица.столбец".
+        """
+        super().__init__(*args, **kwargs)
+        self.vault = vault
+        self.context = context
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return value
+        if not self.vault.unlocked and self.vault.allow_plaintext:
+            if value.startswith(self.vault.PREFIX):
+                raise VaultLockedError(f"Values starting with {self.vault.PREFIX!r} need an unlocked vault")
+            return value
+        return self.vault.encrypt(value, self.context)
+
+    def process_result_value(self, value, dialect):
+        # Шифр создается один раз при разблокировке, на строку остается только AES-GCM
+        return self.vault.decrypt(value, self.context)
+
+
+# Ключ хранилища текущей сессии
+vault_key = VaultKey()
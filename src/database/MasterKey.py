@@ -0,0 +1,296 @@
+import math
+import os
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+from sqlalchemy import Float, Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column, sessionmaker
+
+from src.database.Base import Base
+from src.database.Encryption import VaultKey, vault_key
+
+PBKDF2 = "pbkdf2-sha256"
+SCRYPT = "scrypt"
+DEFAULT_KDF = PBKDF2
+TARGET_UNLOCK_SECONDS = 0.3
+
+# Нижние границы стоимости не зависят от скорости машины: быстрее разблокировка не станет
+MIN_COST = {PBKDF2: VaultKey.KDF_ITERATIONS, SCRYPT: 2 ** 14}
+MAX_SCRYPT_COST = 2 ** 18  # 256 МиБ памяти при r=8
+SCRYPT_R, SCRYPT_P = 8, 1
+PROBE_SECONDS = 0.05  # Минимальная длительность замера при калибровке
+RETUNE_FACTOR = 2.0  # Перекалибровка, если разблокировка вышла вдвое быстрее или медленнее цели
+
+SALT_SIZE = 16
+NONCE_SIZE = 12
+_WRAP_AAD = b"vault_meta.wrapped_key"
+
+
+class VaultMetaTable(Base):
+    """
+    Параметры мастер-пароля хранилища (одна строка).
+
+    Ключ хранилища случайный и хранится зашифрованным (AES-GCM) ключом, выведенным
+    из мастер-пароля; тег AES-GCM служит проверкой пароля. Поэтому смена параметров
+    KDF или пароля перешифровывает только этот ключ, а не записи.
+
+    Атрибуты:
+        id (Mapped[int]): Всегда 1.
+        kdf (Mapped[str]): PBKDF2 или SCRYPT.
+        cost (Mapped[int]): Итерации PBKDF2 или параметр N для scrypt.
+        salt (Mapped[bytes]): Соль KDF.
+        wrapped_key (Mapped[bytes]): nonce | зашифрованный ключ хранилища | тег.
+        unlock_seconds (Mapped[float]): Время вывода ключа при последней калибровке.
+    """
+    __tablename__ = "vault_meta"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kdf: Mapped[str] = mapped_column(String(20))
+    cost: Mapped[int] = mapped_column(Integer)
+    salt: Mapped[bytes] = mapped_column(LargeBinary)
+    wrapped_key: Mapped[bytes] = mapped_column(LargeBinary)
+    unlock_seconds: Mapped[float] = mapped_column(Float)
+
+
+class KdfParams(NamedTuple):
+    """
+    Параметры вывода ключа из мастер-пароля.
+    """
+    kdf: str
+    cost: int
+    salt: bytes
+
+
+def derive_key(params: KdfParams, password: str) -> bytes:
+    """
+    Выводит 32-байтовый ключ из пароля.
+
+    Args:
+        params (KdfParams): Параметры KDF.
+        password (str): Пароль.
+
+    Returns:
+        bytes: Ключ.
+    """
+    if params.kdf == PBKDF2:
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=VaultKey.KEY_SIZE, salt=params.salt,
+                         iterations=params.cost)
+    elif params.kdf == SCRYPT:
+        kdf = Scrypt(salt=params.salt, length=VaultKey.KEY_SIZE, n=params.cost, r=SCRYPT_R, p=SCRYPT_P)
+    else:
+        raise ValueError(f"Unknown KDF: {params.kdf}")
+    return kdf.derive(password.encode())
+
+
+def _scaled_cost(kdf: str, cost: int, seconds: float, target_seconds: float, min_cost: int) -> int:
+    # Время KDF растет линейно со стоимостью; N для scrypt - степень двойки не больше нужной
+    wanted = cost * target_seconds / max(seconds, 1e-6)
+    if kdf == SCRYPT:
+        wanted = min(2 ** int(math.log2(max(wanted, 2))), MAX_SCRYPT_COST)
+    else:
+        wanted = int(wanted) // 1000 * 1000
+    return max(int(wanted), min_cost)
+
+
+def calibrate(kdf: str = DEFAULT_KDF, target_seconds: float = TARGET_UNLOCK_SECONDS,
+              min_cost: Optional[int] = None) -> int:
+    """
+    Подбирает стоимость KDF, при которой вывод ключа на этой машине занимает около
+    target_seconds: замеряет небольшую стоимость (удваивая ее, пока замер не станет
+    длиннее PROBE_SECONDS) и масштабирует.
+
+    Args:
+        kdf (str): PBKDF2 или SCRYPT.
+        target_seconds (float): Целевое время разблокировки.
+        min_cost (Optional[int]): Нижняя граница стоимости (по умолчанию MIN_COST[kdf]).
+
+    Returns:
+        int: Итерации PBKDF2 или N для scrypt.
+    """
+    if kdf not in MIN_COST:
+        raise ValueError(f"Unknown KDF: {kdf}")
+    min_cost = MIN_COST[kdf] if min_cost is None else min_cost
+    cost, salt = (1000 if kdf == PBKDF2 else 2 ** 10), os.urandom(SALT_SIZE)
+    while True:
+        started = time.perf_counter()
+        derive_key(KdfParams(kdf, cost, salt), "calibration")
+        seconds = time.perf_counter() - started
+        if seconds >= PROBE_SECONDS or (kdf == SCRYPT and cost >= MAX_SCRYPT_COST):
+            return _scaled_cost(kdf, cost, seconds, target_seconds, min_cost)
+        cost *= 2
+
+
+class MasterKeyStore:
+    """
+    Разблокировка хранилища мастер-паролем.
+
+    setup один раз калибрует KDF под target_seconds на этой машине, создает случайный
+    ключ хранилища и сохраняет его зашифрованным в таблице "vault_meta". unlock
+    проверяет пароль и разблокирует vault_key; если разблокировка заметно отклонилась
+    от цели (другое железо, см. RETUNE_FACTOR), ключ перешифровывается с новой
+    стоимостью, пересчитанной по этому же замеру, так что время разблокировки
+    остается предсказуемым на разных машинах.
+    """
+
+    def __init__(self, engine, vault: VaultKey = vault_key, kdf: str = DEFAULT_KDF,
+                 target_seconds: float = TARGET_UNLOCK_SECONDS, min_cost: Optional[int] = None):
+        """
+        Args:
+            engine: SQLAlchemy engine; таблица "vault_meta" создается, если ее нет.
+            vault (VaultKey): Разблокируемый ключ хранилища.
+            kdf (str): KDF для setup и перекалибровки (PBKDF2 или SCRYPT).
+            target_seconds (float): Целевое время разблокировки.
+            min_cost (Optional[int]): Нижняя граница стоимости (по умолчанию MIN_COST[kdf]).
+        """
+        if kdf not in MIN_COST:
+            raise ValueError(f"Unknown KDF: {kdf}")
+        VaultMetaTable.__table__.create(engine, checkfirst=True)
+        self.Session = sessionmaker(bind=engine)
+        self.vault = vault
+        self.kdf = kdf
+        self.target_seconds = target_seconds
+        self.min_cost = MIN_COST[kdf] if min_cost is None else min_cost
+        self._lock = threading.Lock()
+        self.last_unlock_seconds = None  # Время вывода ключа при последней разблокировке
+        self.retuned = False  # Последняя разблокировка перекалибровала KDF
+
+    @property
+    def initialized(self) -> bool:
+        with self.Session() as session:
+            return session.get(VaultMetaTable, 1) is not None
+
+    @property
+    def params(self) -> Optional[KdfParams]:
+        """
+        Текущие параметры KDF или None, если мастер-пароль не задан.
+        """
+        with self.Session() as session:
+            meta = session.get(VaultMetaTable, 1)
+            return KdfParams(meta.kdf, meta.cost, meta.salt) if meta is not None else None
+
+    def _wrap(self, session, password: str, data_key: bytes, cost: Optional[int] = None) -> float:
+        # Новая соль при каждом перешифровании: старый обернутый ключ не связан с новым
+        params = KdfParams(self.kdf, cost or calibrate(self.kdf, self.target_seconds, self.min_cost),
+                           os.urandom(SALT_SIZE))
+        started = time.perf_counter()
+        key = derive_key(params, password)
+        seconds = time.perf_counter() - started
+        nonce = os.urandom(NONCE_SIZE)
+        meta = session.get(VaultMetaTable, 1) or VaultMetaTable(id=1)
+        meta.kdf, meta.cost, meta.salt = params
+        meta.wrapped_key = nonce + AESGCM(key).encrypt(nonce, data_key, _WRAP_AAD)
+        meta.unlock_seconds = seconds
+        session.add(meta)
+        session.commit()
+        return seconds
+
+    def setup(self, password: str) -> KdfParams:
+        """
+        Задает мастер-пароль нового хранилища и разблокирует его.
+
+        Args:
+            password (str): Мастер-пароль.
+
+        Returns:
+            KdfParams: Выбранные параметры KDF.
+        """
+        if not password:
+            raise ValueError("Master password must not be empty")
+        with self._lock, self.Session() as session:
+            if session.get(VaultMetaTable, 1) is not None:
+                raise ValueError("Master password is already set")
+            data_key = os.urandom(VaultKey.KEY_SIZE)
+            self.last_unlock_seconds = self._wrap(session, password, data_key)
+        self.vault.unlock_with_key(data_key)
+        return self.params
+
+    def _unwrap(self, meta: VaultMetaTable, password: str) -> Optional[bytes]:
+        key = derive_key(KdfParams(meta.kdf, meta.cost, meta.salt), password)
+        nonce, wrapped = meta.wrapped_key[:NONCE_SIZE], meta.wrapped_key[NONCE_SIZE:]
+        try:
+            return AESGCM(key).decrypt(nonce, wrapped, _WRAP_AAD)
+        except InvalidTag:
+            return None
+
+    def unlock(self, password: str, retune: bool = True) -> bool:
+        """
+        Проверяет мастер-пароль и разблокирует хранилище.
+
+        Args:
+            password (str): Мастер-пароль.
+            retune (bool): Перекалибровать KDF, если разблокировка отклонилась от цели
+                больше чем в RETUNE_FACTOR раз или KDF отличается от self.kdf.
+
+        Returns:
+            bool: True, если пароль верный.
+        """
+        with self._lock, self.Session() as session:
+            meta = session.get(VaultMetaTable, 1)
+            if meta is None:
+                raise ValueError("Master password is not set")
+            started = time.perf_counter()
+            data_key = self._unwrap(meta, password)
+            seconds = self.last_unlock_seconds = time.perf_counter() - started
+            if data_key is None:
+                return False
+
+            self.retuned = False
+            if retune:
+                cost = _scaled_cost(self.kdf, meta.cost, seconds, self.target_seconds, self.min_cost) \
+                    if meta.kdf == self.kdf else None
+                ratio = seconds / self.target_seconds
+                if cost is None or (cost != meta.cost and not 1 / RETUNE_FACTOR <= ratio <= RETUNE_FACTOR):
+                    self._wrap(session, password, data_key, cost)
+                    self.retuned = True
+        self.vault.unlock_with_key(data_key)
+        return True
+
+    def change_password(self, old_password: str, new_password: str) -> bool:
+        """
+        Меняет мастер-пароль (перешифровывается только ключ хранилища).
+
+        Returns:
+            bool: False, если старый пароль неверный.
+        """
+        if not new_password:
+            raise ValueError("Master password must not be empty")
+        with self._lock, self.Session() as session:
+            meta = session.get(VaultMetaTable, 1)
+            if meta is None:
+                raise ValueError("Master password is not set")
+            data_key = self._unwrap(meta, old_password)
+            if data_key is None:
+                return False
+            self._wrap(session, new_password, data_key, meta.cost if meta.kdf == self.kdf else None)
+        self.vault.unlock_with_key(data_key)
+        return True
+
+    def lock(self) -> None:
+        """
+        Блокирует хранилище.
+        """
+        self.vault.lock()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Калибровка KDF мастер-пароля на этой машине")
+    parser.add_argument("--kdf", choices=sorted(MIN_COST), default=DEFAULT_KDF)
+    parser.add_argument("--target-ms", type=int, default=int(TARGET_UNLOCK_SECONDS * 1000))
+    args = parser.parse_args()
+
+    cost = calibrate(args.kdf, args.target_ms / 1000)
+    started = time.perf_counter()
+    derive_key(KdfParams(args.kdf, cost, os.urandom(SALT_SIZE)), "calibration")
+    print(f"{args.kdf}: cost={cost}, unlock {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
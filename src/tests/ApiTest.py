@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+import httpx
+from sqlalchemy import text
+
+from src.api.Server import create_app
+from src.core.Database import DataBase
+from src.database.Encryption import VaultKey, vault_key
+from src.database.MasterKey import MasterKeyStore
+from src.tests import unlock_test_vault
+
+
+class TestApi(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        unlock_test_vault(self.addCleanup)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = DataBase(f"sqlite:///{os.path.join(self.tmp.name, 'test.db')}")
+        app = create_app(self.database, api_token="secret")
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://test",
+                                        headers={"Authorization": "Bearer secret"})
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await self.database.dispose()
+        self.tmp.cleanup()
+
+    async def test_crud(self):
+        created = (await self.client.post("/records", json={"login": "api_user", "password": "pw"})).json()
+
+        response = await self.client.get(f"/records/{created['id']}")
+        self.assertEqual(response.json()["login"], "api_user")
+
+        response = await self.client.patch(f"/records/{created['id']}", json={"notes": "new notes"})
+        self.assertEqual(response.json()["notes"], "new notes")
+
+        self.assertEqual((await self.client.delete(f"/records/{created['id']}")).status_code, 204)
+        self.assertEqual((await self.client.get(f"/records/{created['id']}")).status_code, 404)
+
+    async def test_bulk_list_and_export(self):
+        ids = (await self.client.post("/records/bulk", json=[
+            {"login": f"user{i}", "password": "pw", "notes": f"note {i}"} for i in range(5)])).json()["ids"]
+
+        response = await self.client.patch("/records/bulk", json={str(ids[0]): {"notes": "changed"}})
+        self.assertEqual(response.json(), {"updated": 1})
+
+        page = (await self.client.get("/records", params={"limit": 2})).json()
+        self.assertEqual(page["items"], [{"id": ids[0], "login": "user0"}, {"id": ids[1], "login": "user1"}])
+        self.assertEqual(page["next_after_id"], ids[1])
+
+        lines = (await self.client.get("/records/export")).text.splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertIn('"notes":"changed"', lines[0])
+
+        response = await self.client.post("/records/bulk-delete", json={"ids": ids})
+        self.assertEqual(response.json(), {"deleted": 5})
+
+    async def test_requires_token(self):
+        response = await self.client.get("/records", headers={"Authorization": "Bearer wrong"})
+
+        self.assertEqual(response.status_code, 401)
+        response = await self.client.get("/records", headers={"Authorization": ""})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_unlocks_vault_at_startup(self):
+        MasterKeyStore(self.database.engine, target_seconds=0.01, min_cost=1000).setup("master")
+        vault_key.lock()
+
+        app = create_app(self.database, api_token="secret", master_password="wrong")
+        with self.assertRaises(RuntimeError):
+            async with app.router.lifespan_context(app):
+                pass
+        self.assertEqual((await self.client.post("/records", json={"login": "u", "password": "pw"})).status_code, 423)
+
+        app = create_app(self.database, api_token="secret", master_password="master")
+        async with app.router.lifespan_context(app):
+            self.assertTrue(vault_key.unlocked)
+            created = (await self.client.post("/records", json={"login": "u", "password": "pw"})).json()
+            self.assertEqual((await self.client.get(f"/records/{created['id']}")).json()["password"], "pw")
+        with self.database.engine.connect() as connection:
+            raw = connection.execute(text("SELECT password FROM bbp")).scalar()
+        self.assertTrue(raw.startswith(VaultKey.PREFIX))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.core.Database import DataBase
+from src.database.AsyncBbpBase import AsyncBbpCRUD
+from src.database.Base import Base
+from src.database.BbpBase import BbpUpdateSchema
+from src.tests import unlock_test_vault
+
+
+class TestAsyncBbpCRUD(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        unlock_test_vault(self.addCleanup)
+        # Отдельный файл базы на каждый тест, чтобы не зависеть от database.db
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, 'test.db')}")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.crud = AsyncBbpCRUD(self.engine)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+        self.tmp.cleanup()
+
+    async def test_create_read_update_delete(self):
+        record = await self.crud.create('async_user', 'password', 'notes')
+
+        self.assertIsNotNone(record.id)
+        self.assertEqual((await self.crud.read(record.id)).login, 'async_user')
+
+        updated = await self.crud.update(record.id, BbpUpdateSchema(notes='new notes'))
+        self.assertEqual(updated.notes, 'new notes')
+
+        self.assertTrue(await self.crud.delete(record.id))
+        self.assertIsNone(await self.crud.read(record.id))
+        self.assertFalse(await self.crud.delete(record.id))
+
+    async def test_bulk_and_iteration(self):
+        ids = await self.crud.bulk_create([('bulk_user', 'password', f'notes {i}') for i in range(5)])
+
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(await self.crud.bulk_update({ids[0]: BbpUpdateSchema(login='renamed')}), 1)
+        self.assertEqual([record.id async for record in self.crud.iter_all(batch_size=2)], ids)
+        self.assertEqual([record.id for record in await self.crud.page(after_id=ids[1], limit=2)], ids[2:4])
+        self.assertEqual(await self.crud.bulk_delete(ids[:2]), 2)
+        self.assertEqual(len(await self.crud.read_all()), 3)
+
+    async def test_read_rows(self):
+        ids = await self.crud.bulk_create([('rows_user', 'password', f'notes {i}') for i in range(3)])
+
+        rows = await self.crud.read_rows(after_id=ids[0], limit=5)
+
+        self.assertEqual([tuple(row) for row in rows], [(ids[1], 'rows_user'), (ids[2], 'rows_user')])
+        self.assertEqual(await self.crud.read_notes([ids[2]]), {ids[2]: 'notes 2'})
+
+    async def test_search(self):
+        await self.crud.bulk_create([('alice', 'password', 'bank account'), ('bob', 'password', 'email')])
+
+        self.assertEqual([record.login for record in await self.crud.search('bank')], ['alice'])
+        self.assertEqual([record.login for record in await self.crud.search_login('bo')], ['bob'])
+        self.assertEqual([tuple(row) for row in await self.crud.search_rows('email', ('login',))], [('bob',)])
+
+    async def test_database_session_factory(self):
+        database = DataBase(f"sqlite:///{os.path.join(self.tmp.name, 'factory.db')}")
+        try:
+            self.assertTrue(database.async_database_path.startswith("sqlite+aiosqlite:///"))
+            await database.create_db_and_tables_async()
+            factory = await database.async_session_maker()
+            self.assertIs(factory, await database.async_session_maker())  # Фабрика создается один раз
+
+            crud = AsyncBbpCRUD(session_factory=factory)
+            record = await crud.create('factory_user', 'password', 'notes')
+            self.assertEqual((await crud.read(record.id)).login, 'factory_user')
+        finally:
+            await database.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from src.utils.AsyncCrypt import AsyncFileEncryptor
+
+
+async def _chunks(data, size=1000):
+    for start in range(0, len(data), size):
+        await asyncio.sleep(0)
+        yield data[start:start + size]
+
+
+class TestAsyncFileEncryptor(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.encryptor = AsyncFileEncryptor("test_password", max_concurrency=2, segment_size=1024)
+
+    async def asyncTearDown(self):
+        await self.encryptor.close()
+        self.tmp.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    async def test_concurrent_files(self):
+        files = {}
+        for i in range(4):
+            files[i] = os.urandom(3000 + i)
+            with open(self._path(f"{i}.bin"), 'wb') as f:
+                f.write(files[i])
+
+        results = await asyncio.gather(*(
+            self.encryptor.encrypt_file(self._path(f"{i}.bin"), self._path(f"{i}.encrypted")) for i in files))
+        self.assertTrue(all(results))
+        results = await asyncio.gather(*(
+            self.encryptor.decrypt_file(self._path(f"{i}.encrypted"), self._path(f"{i}.out")) for i in files))
+        self.assertTrue(all(results))
+        for i, data in files.items():
+            with open(self._path(f"{i}.out"), 'rb') as f:
+                self.assertEqual(f.read(), data)
+
+    async def test_event_loop_not_blocked(self):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        await self.encryptor.encrypt_bytes(b"data")
+        elapsed = time.perf_counter() - start
+        task.cancel()
+        # Во время PBKDF2 цикл событий должен продолжать работать
+        self.assertGreater(ticks, elapsed / 0.001 / 4)
+
+    async def test_stream_roundtrip(self):
+        data = os.urandom(10000)
+        encrypted = b"".join([chunk async for chunk in self.encryptor.encrypt_stream(_chunks(data))])
+        decrypted = b"".join([chunk async for chunk in self.encryptor.decrypt_stream(_chunks(encrypted, 777))])
+        self.assertEqual(decrypted, data)
+
+    async def test_file_stream_helpers(self):
+        data = os.urandom(10000)
+        written = await self.encryptor.encrypt_to_file(_chunks(data), self._path("upload.encrypted"))
+        self.assertEqual(written, os.path.getsize(self._path("upload.encrypted")))
+        chunks = [chunk async for chunk in self.encryptor.decrypt_from_file(self._path("upload.encrypted"))]
+        self.assertEqual(b"".join(chunks), data)
+
+    async def test_stream_errors_and_early_exit(self):
+        encrypted = await self.encryptor.encrypt_bytes(os.urandom(10000))
+        with self.assertRaises(ValueError):
+            async for _ in self.encryptor.decrypt_stream(_chunks(encrypted[:-1])):
+                pass
+
+        stream = self.encryptor.decrypt_stream(_chunks(encrypted))
+        async for _ in stream:
+            break
+        await stream.aclose()
+        # Слоты освобождены: новые задания не зависают
+        for _ in range(3):
+            await asyncio.wait_for(self.encryptor.decrypt_bytes(encrypted), timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, text
+
+from src.database.Backup import VaultBackup
+from src.database.BbpBase import BbpTableBase, BbpCRUD, BbpUpdateSchema
+from src.database.Encryption import VaultKey, vault_key
+from src.database.MasterKey import MasterKeyStore
+from src.utils.Crypt import FileEncryptor
+
+
+class TestVaultBackup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = self._engine("source.db")
+        # Копия переносит обернутый ключ хранилища, поэтому источнику нужен мастер-пароль
+        MasterKeyStore(self.source, target_seconds=0.01, min_cost=1000).setup("master")
+        self.addCleanup(vault_key.lock)
+        self.crud = BbpCRUD(self.source)
+        self.backup = VaultBackup(self.source, FileEncryptor("backup_password"))
+
+    def tearDown(self):
+        self.source.dispose()
+        self.tmp.cleanup()
+
+    def _engine(self, name):
+        engine = create_engine(f"sqlite:///{self._path(name)}")
+        BbpTableBase.metadata.create_all(engine)
+        return engine
+
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def _contents(self, engine):
+        return [(row.id, row.login, row.password, row.notes)
+                for row in BbpCRUD(engine).read_rows(("id", "login", "password", "notes"))]
+
+    def test_full_and_incremental_restore(self):
+        ids = self.crud.bulk_create([(f'user{i}', f'password{i}', f'secret note {i}') for i in range(50)])
+        full = self.backup.backup(self._path("full.kbak"))
+        self.assertEqual((full.kind, full.records), ("full", 50))
+
+        self.crud.update(ids[0], BbpUpdateSchema(notes='changed'))
+        self.crud.bulk_delete(ids[1:3])
+        self.crud.create('new_user', 'password', 'notes')
+        incremental = self.backup.backup(self._path("incr.kbak"), since_version=full.version)
+        self.assertEqual((incremental.kind, incremental.records, incremental.deleted), ("incremental", 2, 2))
+        self.assertEqual(self.backup.read_info(self._path("incr.kbak")).base_version, full.version)
+
+        with open(self._path("full.kbak"), "rb") as f:
+            self.assertNotIn(b"secret note", f.read())  # Архив сжат и зашифрован
+
+        target = self._engine("target.db")
+        restored = VaultBackup(target, FileEncryptor("backup_password")).restore(
+            [self._path("full.kbak"), self._path("incr.kbak")])
+        self.assertEqual(restored.version, incremental.version)
+        self.assertEqual(self._contents(target), self._contents(self.source))
+        self.assertEqual([record.login for record in BbpCRUD(target).search('changed')], ['user0'])
+        target.dispose()
+
+    def test_restore_rejects_broken_chain(self):
+        self.crud.create('user', 'password', 'notes')
+        full = self.backup.backup(self._path("full.kbak"))
+        self.crud.create('user2', 'password', 'notes')
+        self.backup.backup(self._path("incr.kbak"), since_version=full.version - 1)
+
+        target = self._engine("target.db")
+        restore = VaultBackup(target, FileEncryptor("backup_password")).restore
+        with self.assertRaises(ValueError):
+            restore([self._path("incr.kbak")])
+        with self.assertRaises(ValueError):
+            restore([self._path("full.kbak"), self._path("incr.kbak")])
+        self.assertEqual(self._contents(target), [])  # Транзакция откатилась
+        target.dispose()
+
+    def test_vault_key_travels_with_backup(self):
+        self.crud.create('user', 'secret', 'notes')
+        self.backup.backup(self._path("full.kbak"))
+        vault_key.lock()
+
+        target = self._engine("target.db")
+        VaultBackup(target, FileEncryptor("backup_password")).restore([self._path("full.kbak")])
+        vault = VaultKey()
+        self.assertTrue(MasterKeyStore(target, vault).unlock("master", retune=False))
+        with target.connect() as connection:
+            raw = connection.execute(text("SELECT password FROM bbp")).scalar()
+        self.assertEqual(vault.decrypt(raw, b"bbp.password"), "secret")
+        target.dispose()
+
+    def test_restore_refuses_encrypted_rows_without_vault_key(self):
+        source = create_engine(f"sqlite:///{self._path('no_meta.db')}")  # Без мастер-пароля и vault_meta
+        BbpTableBase.metadata.create_all(source)
+        BbpCRUD(source).create('user', 'secret', 'notes')
+        VaultBackup(source, FileEncryptor("backup_password")).backup(self._path("full.kbak"))
+        source.dispose()
+
+        target = self._engine("target.db")
+        with self.assertRaises(ValueError):
+            VaultBackup(target, FileEncryptor("backup_password")).restore([self._path("full.kbak")])
+        self.assertEqual(self._contents(target), [])
+        target.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
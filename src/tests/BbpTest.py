@@ -3,6 +3,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.database.BbpBase import BbpTableBase, BbpCRUD, BbpUpdateSchema
+from src.tests import unlock_test_vault
 
 
 class TestBbpCRUD(unittest.TestCase):
@@ -14,6 +15,12 @@ class TestBbpCRUD(unittest.TestCase):
         cls.crud = BbpCRUD(cls.engine)
         # Создание таблицы для тестирования (необходимо добавить определение BbpTableBase)
         BbpTableBase.metadata.create_all(cls.engine)
+        cls.crud.rebuild_search_index()  # Индексы поиска для уже существующего файла database.db
+        unlock_test_vault(cls.addClassCleanup)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
 
     def test_create(self):
         # Тестирование создания записи
@@ -40,6 +47,74 @@ class TestBbpCRUD(unittest.TestCase):
 
         self.assertEqual(retrieved_record.id, created_record.id)  # Проверяем, что записи совпадают
 
+    def test_iter_all(self):
+        # Тестирование потокового чтения всех записей
+        self.crud.bulk_create([('iter_user', 'password', 'notes')] * 5)
+
+        ids = [record.id for record in self.crud.iter_all(batch_size=2)]
+
+        self.assertEqual(ids, sorted(ids))  # Записи идут по возрастанию ID
+        self.assertEqual(len(ids), len(self.crud.read_all()))
+
+    def test_page(self):
+        # Тестирование keyset-пагинации
+        ids = self.crud.bulk_create([('page_user', 'password', 'notes')] * 5)
+
+        first_page = self.crud.page(after_id=ids[0] - 1, limit=2)
+        second_page = self.crud.page(after_id=first_page[-1].id, limit=2)
+
+        self.assertEqual([record.id for record in first_page], ids[:2])
+        self.assertEqual([record.id for record in second_page], ids[2:4])
+        self.assertEqual(self.crud.page(after_id=ids[-1] + 1000), [])
+
+    def test_read_rows(self):
+        # Тестирование чтения проекции без ORM-объектов
+        ids = self.crud.bulk_create([('rows_user_%d' % i, 'password', 'notes %d' % i) for i in range(3)])
+
+        rows = self.crud.read_rows(after_id=ids[0] - 1, limit=3)
+
+        self.assertEqual([(row.id, row.login) for row in rows], [(ids[i], 'rows_user_%d' % i) for i in range(3)])
+        self.assertFalse(hasattr(rows[0], 'notes'))  # Заметки не читаются без запроса
+        self.assertEqual(self.crud.read_notes(ids[:2]), {ids[0]: 'notes 0', ids[1]: 'notes 1'})
+        self.assertEqual(self.crud.read_rows(('login', 'password'), after_id=ids[-1] - 1),
+                         [('rows_user_2', 'password')])
+        with self.assertRaises(ValueError):
+            self.crud.read_rows(('secret',))
+
+    def test_search(self):
+        # Тестирование полнотекстового поиска по логину и заметкам
+        ids = self.crud.bulk_create([
+            ('search_alpha_user', 'password', 'Zephyrine bank account'),
+            ('search_beta_user', 'password', 'zephyrine mail'),
+        ])
+
+        found = [record.id for record in self.crud.search('zephyr bank')]
+        self.assertEqual(found[:1], [ids[0]])  # Все слова как префиксы
+        self.assertEqual(set(record.id for record in self.crud.search('zephyrine')) & set(ids), set(ids))
+
+        self.crud.update(ids[1], BbpUpdateSchema(notes='renamed'))
+        self.crud.delete(ids[0])
+        self.assertEqual([record.id for record in self.crud.search('zephyrine')], [])  # Индекс синхронизирован
+
+    def test_search_rows(self):
+        # Тестирование поиска в строки проекции без чтения паролей
+        ids = self.crud.bulk_create([('rows_user', 'password', 'Quokkaland trip')])
+
+        rows = self.crud.search_rows('quokka', ('id', 'login', 'notes'))
+
+        self.assertEqual([tuple(row) for row in rows], [(ids[0], 'rows_user', 'Quokkaland trip')])
+        self.assertEqual(self.crud.search_rows('  '), [])
+
+    def test_search_login(self):
+        # Тестирование поиска по началу логина
+        ids = self.crud.bulk_create([('prefixed_login_%d' % i, 'password', '') for i in range(3)])
+
+        found = [record.id for record in self.crud.search_login('prefixed_login_', limit=100)]
+
+        self.assertTrue(set(ids) <= set(found))
+        self.assertTrue(all(record.login.startswith('prefixed_login_')
+                            for record in self.crud.search_login('prefixed_login_', limit=100)))
+
     def test_update(self):
         # Тестирование обновления записи
         login = 'update_user'
@@ -72,6 +147,46 @@ class TestBbpCRUD(unittest.TestCase):
 
         self.assertIsNone(deleted_record)  # Проверяем, что запись больше не существует
 
+    def test_bulk_create(self):
+        # Тестирование массового создания записей
+        records = [('bulk_user_%d' % i, 'bulk_password', 'Bulk notes') for i in range(5)]
+
+        ids = self.crud.bulk_create(records, batch_size=2)
+
+        self.assertEqual(len(ids), len(records))
+        for record_id, (login, _, _) in zip(ids, records):
+            self.assertEqual(self.crud.read(record_id).login, login)  # Порядок ID совпадает с порядком записей
+
+        with self.assertRaises(ValueError):  # Явные ID не возвращались бы в порядке записей
+            self.crud.bulk_create([{'id': 1000002, 'login': 'b', 'password': 'p', 'notes': ''},
+                                   {'id': 1000001, 'login': 'a', 'password': 'p', 'notes': ''}])
+
+    def test_bulk_update(self):
+        # Тестирование массового обновления записей
+        ids = self.crud.bulk_create([('bulk_update_user', 'password', 'notes')] * 3)
+
+        updated = self.crud.bulk_update({
+            ids[0]: BbpUpdateSchema(login='bulk_updated_user'),
+            ids[1]: BbpUpdateSchema(password='new_password', notes='New notes'),
+            -1: BbpUpdateSchema(login='missing'),
+        })
+
+        self.assertEqual(updated, 2)  # Несуществующий ID не учитывается
+        self.assertEqual(self.crud.read(ids[0]).login, 'bulk_updated_user')
+        self.assertEqual(self.crud.read(ids[1]).password, 'new_password')
+        self.assertEqual(self.crud.read(ids[1]).login, 'bulk_update_user')
+        self.assertEqual(self.crud.read(ids[2]).notes, 'notes')
+
+    def test_bulk_delete(self):
+        # Тестирование массового удаления записей
+        ids = self.crud.bulk_create([('bulk_delete_user', 'password', 'notes')] * 3)
+
+        deleted = self.crud.bulk_delete(ids[:2] + [-1], batch_size=1)
+
+        self.assertEqual(deleted, 2)
+        self.assertIsNone(self.crud.read(ids[0]))
+        self.assertIsNotNone(self.crud.read(ids[2]))
+
 
 if __name__ == '__main__':
     unittest.main()
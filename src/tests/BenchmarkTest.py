@@ -0,0 +1,27 @@
+import unittest
+
+from src.benchmarks.Suite import compare
+
+
+class TestBenchmarkCompare(unittest.TestCase):
+    def test_regressions_respect_direction_and_threshold(self):
+        baseline = {
+            "throughput": {"value": 100.0, "unit": "MB/s", "higher_is_better": True},
+            "latency": {"value": 10.0, "unit": "ms", "higher_is_better": False},
+            "stable": {"value": 50.0, "unit": "ops/s", "higher_is_better": True},
+        }
+        results = {
+            "throughput": {"value": 70.0, "unit": "MB/s", "higher_is_better": True},
+            "latency": {"value": 13.0, "unit": "ms", "higher_is_better": False},
+            "stable": {"value": 45.0, "unit": "ops/s", "higher_is_better": True},
+            "new_metric": {"value": 1.0, "unit": "ops/s", "higher_is_better": True},
+        }
+
+        regressions = compare(results, baseline, threshold=0.25)
+
+        self.assertEqual([name for name, *_ in regressions], ["throughput", "latency"])
+        self.assertEqual(compare(results, baseline, threshold=0.5), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
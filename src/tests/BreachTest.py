@@ -0,0 +1,94 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+
+from src.database.BbpBase import BbpCRUD, BbpTableBase, BbpUpdateSchema
+from src.database.Breach import BLOOM_SUFFIX, BreachIndex, BreachedPasswordError, BreachedRecord, build_index
+from src.tests import unlock_test_vault
+
+
+def sha1_line(password, count=1, upper=True):
+    digest = hashlib.sha1(password.encode()).hexdigest()
+    return f"{digest.upper() if upper else digest}:{count}\n"
+
+
+class TestBreachIndex(unittest.TestCase):
+    def setUp(self):
+        unlock_test_vault(self.addCleanup)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.corpus = os.path.join(self.tmp.name, "pwned.txt")
+        self.index_path = os.path.join(self.tmp.name, "pwned.bin")
+        self.leaked = [f"leaked{i}" for i in range(3000)]
+        with open(self.corpus, "w") as f:
+            for i, password in enumerate(reversed(self.leaked)):  # Не по порядку, разный регистр
+                f.write(sha1_line(password, i, upper=i % 2 == 0))
+            f.write("\n" + sha1_line("leaked7"))  # Повтор и пустая строка
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_build_and_lookup(self):
+        count = build_index(self.corpus, self.index_path, run_size=700)  # Несколько кусков внешней сортировки
+
+        self.assertEqual(count, len(self.leaked))
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["pwned.bin", "pwned.txt"])  # Временные файлы удалены
+        with BreachIndex(self.index_path) as index:
+            self.assertEqual(len(index), len(self.leaked))
+            self.assertEqual(list(index), sorted(index))
+            self.assertTrue(all(password in index for password in self.leaked))
+            self.assertFalse(any(index.contains(f"safe{i}") for i in range(1000)))
+
+    def test_bloom_prefilter(self):
+        build_index(self.corpus, self.index_path, bloom_error_rate=0.01)
+        self.assertTrue(os.path.exists(self.index_path + BLOOM_SUFFIX))
+
+        with BreachIndex(self.index_path) as index:
+            self.assertTrue(all(password in index for password in self.leaked))
+            self.assertFalse(any(index.contains(f"safe{i}") for i in range(1000)))
+            self.assertGreater(index.bloom_rejections, 950)
+
+        build_index(self.corpus, self.index_path)  # Без фильтра: старый фильтр удаляется
+        self.assertFalse(os.path.exists(self.index_path + BLOOM_SUFFIX))
+
+    def test_rejects_invalid_files(self):
+        with open(self.corpus, "a") as f:
+            f.write("not-a-hash\n")
+        with self.assertRaises(ValueError):
+            build_index(self.corpus, self.index_path)
+        self.assertFalse(os.path.exists(self.index_path))
+        with self.assertRaises(ValueError):
+            BreachIndex(self.corpus)
+
+    def test_crud_checks_and_audit(self):
+        build_index(self.corpus, self.index_path)
+        engine = create_engine("sqlite://")
+        BbpTableBase.metadata.create_all(engine)
+        with BreachIndex(self.index_path) as index:
+            BbpCRUD(engine).bulk_create([("old", "leaked5", ""), ("safe", "unique-password", ""),
+                                         ("reused", "leaked5", "")])
+            crud = BbpCRUD(engine, breach_index=index)
+
+            with self.assertRaises(BreachedPasswordError):
+                crud.create("new", "leaked1", "")
+            record = crud.create("new", "another-unique-password", "")
+            with self.assertRaises(BreachedPasswordError):
+                crud.update(record.id, BbpUpdateSchema(password="leaked2"))
+            self.assertIsNotNone(crud.update(record.id, BbpUpdateSchema(notes="ok")))
+
+            self.assertEqual(index.audit(crud, batch_size=2), [BreachedRecord(1, "old"), BreachedRecord(3, "reused")])
+
+            with self.assertRaises(BreachedPasswordError):  # Утечка во второй пачке: не записано ничего
+                crud.bulk_create([("bulk1", "unique-1", ""), ("bulk2", "unique-2", ""), ("bulk3", "leaked3", "")],
+                                 batch_size=2)
+            with self.assertRaises(BreachedPasswordError):
+                crud.bulk_update({2: BbpUpdateSchema(notes="changed"), record.id: BbpUpdateSchema(password="leaked4")})
+            self.assertEqual(crud.search_login("bulk"), [])
+            self.assertEqual(crud.read(2).notes, "")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import time
+import unittest
+
+from sqlalchemy import create_engine
+
+from src.database.BbpBase import BbpTableBase, BbpUpdateSchema, CachedBbpCRUD
+from src.database.Cache import RecordCache
+from src.database.Encryption import vault_key
+from src.tests import TEST_VAULT_KEY, unlock_test_vault
+
+
+class TestRecordCache(unittest.TestCase):
+    def test_lru_eviction_by_count(self):
+        cache = RecordCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")  # "a" становится недавно использованной
+        cache.put("c", 3)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_eviction_by_size(self):
+        cache = RecordCache(max_entries=100, max_bytes=100, sizeof=len)
+        cache.put("a", "x" * 60)
+        cache.put("b", "y" * 60)
+        cache.put("c", "z" * 200)  # Больше лимита целиком - не кэшируется
+
+        self.assertEqual(len(cache), 1)
+        self.assertIn("b", cache)
+        self.assertNotIn("c", cache)
+        self.assertLessEqual(cache.stats["bytes"], 100)
+
+    def test_ttl(self):
+        cache = RecordCache(ttl=0.01)
+        cache.put("a", 1)
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get("a"))
+
+    def test_stale_load_is_not_stored(self):
+        cache = RecordCache()
+
+        def load():
+            cache.invalidate(["a"])  # Изменение данных во время загрузки
+            return "old"
+
+        self.assertEqual(cache.get_or_load("a", load), "old")
+        self.assertNotIn("a", cache)
+
+
+class TestCachedBbpCRUD(unittest.TestCase):
+    def setUp(self):
+        unlock_test_vault(self.addCleanup)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'test.db')}")
+        BbpTableBase.metadata.create_all(self.engine)
+        self.crud = CachedBbpCRUD(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_read_hits_cache(self):
+        record = self.crud.create('cached_user', 'password', 'notes')
+
+        first = self.crud.read(record.id)
+        second = self.crud.read(record.id)
+
+        self.assertIs(first, second)
+        self.assertEqual(first.login, 'cached_user')
+        self.assertEqual((self.crud.stats["hits"], self.crud.stats["misses"]), (1, 1))
+        with self.assertRaises(AttributeError):
+            first.login = 'changed'  # Снимки неизменяемы
+
+    def test_update_and_delete_invalidate(self):
+        record = self.crud.create('cached_user', 'password', 'notes')
+        self.crud.read(record.id)
+        self.assertEqual(len(self.crud.read_all()), 1)
+
+        self.crud.update(record.id, BbpUpdateSchema(notes='new notes'))
+        self.assertEqual(self.crud.read(record.id).notes, 'new notes')
+        self.assertEqual(self.crud.read_all()[0].notes, 'new notes')
+
+        self.crud.bulk_delete([record.id])
+        self.assertIsNone(self.crud.read(record.id))
+        self.assertEqual(self.crud.read_all(), [])
+
+    def test_search_invalidated_by_create(self):
+        self.assertEqual(self.crud.search('bank'), [])
+
+        self.crud.bulk_create([('alice', 'password', 'bank account')])
+
+        self.assertEqual([record.login for record in self.crud.search('bank')], ['alice'])
+
+    def test_vault_change_clears_cache(self):
+        record = self.crud.create('cached_user', 'password', 'notes')
+        self.crud.read(record.id)
+
+        vault_key.lock()
+        vault_key.unlock_with_key(TEST_VAULT_KEY)  # Тот же ключ, но новая разблокировка
+        self.crud.read(record.id)
+
+        self.assertEqual(self.crud.stats["misses"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from src.core.Config import Config
+from src.core.Database import DataBase
+from src.core.Services import Services, _database
+
+
+class TestConfig(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env_file = os.path.join(self.tmp.name, ".env")
+        self.environ = mock.patch.dict(os.environ)
+        self.environ.start()
+        for key in ("SQLITE_PATH", "SQLITE_ECHO", "API_TOKEN", "EXTRA"):
+            os.environ.pop(key, None)
+
+    def tearDown(self):
+        self.environ.stop()
+        self.tmp.cleanup()
+
+    def test_creates_file_with_defaults_on_first_use(self):
+        config = Config(self.env_file)
+        self.assertFalse(os.path.exists(self.env_file))
+
+        self.assertEqual(config.settings.SQLITE_PATH, "")
+        with open(self.env_file) as f:
+            self.assertEqual(f.read(), "# Configuration file\nSQLITE_PATH=\n")
+        self.assertFalse(config.settings.SQLITE_ECHO)
+
+    def test_environment_is_not_overwritten_by_defaults(self):
+        os.environ["SQLITE_PATH"] = "sqlite:///from_env.db"
+        config = Config(self.env_file)
+
+        self.assertEqual(config.get("SQLITE_PATH"), "sqlite:///from_env.db")
+        self.assertEqual(os.environ["SQLITE_PATH"], "sqlite:///from_env.db")
+
+    def test_set_many_writes_once_and_types_values(self):
+        config = Config(self.env_file)
+        config.get("SQLITE_PATH")  # Первая загрузка создает .env
+        with mock.patch("src.core.Config.os.replace", wraps=os.replace) as replace:
+            config.set_many({"SQLITE_ECHO": "true", "API_TOKEN": "secret token", "EXTRA": "1"})
+
+        self.assertEqual(replace.call_count, 1)
+        self.assertTrue(config.settings.SQLITE_ECHO)
+        self.assertEqual(config.get("API_TOKEN"), "secret token")
+        self.assertEqual(Config(self.env_file).get("API_TOKEN"), "secret token")  # Значение с пробелом в кавычках
+        self.assertEqual(config.settings.EXTRA, "1")
+        self.assertEqual(os.listdir(self.tmp.name), [".env"])  # Временный файл не остался
+
+    def test_set_replaces_existing_key(self):
+        config = Config(self.env_file)
+        config.set("SQLITE_PATH", "sqlite:///a.db")
+        config.set("SQLITE_PATH", "sqlite:///b.db")
+
+        with open(self.env_file) as f:
+            self.assertEqual(f.read().count("SQLITE_PATH="), 1)
+        self.assertEqual(config.get("SQLITE_PATH"), "sqlite:///b.db")
+
+    def test_subscribers_get_changed_keys(self):
+        config = Config(self.env_file)
+        calls, other = [], []
+        config.subscribe(calls.append, keys=["SQLITE_PATH"])
+        unsubscribe = config.subscribe(other.append)
+        unsubscribe()
+
+        config.set("API_TOKEN", "x")
+        config.set("SQLITE_PATH", "sqlite:///c.db")
+        config.set("SQLITE_PATH", "sqlite:///c.db")  # Без изменений - без уведомления
+
+        self.assertEqual(calls, [{"SQLITE_PATH": "sqlite:///c.db"}])
+        self.assertEqual(other, [])
+
+    def test_reload_picks_up_external_edits(self):
+        config = Config(self.env_file)
+        self.assertFalse(config.settings.SQLITE_ECHO)
+        with open(self.env_file, "a") as f:
+            f.write("SQLITE_ECHO=true\n")
+
+        self.assertEqual(config.reload(), {"SQLITE_ECHO": "true"})
+        self.assertTrue(config.settings.SQLITE_ECHO)
+
+    def test_watch(self):
+        config = Config(self.env_file)
+        changes = []
+        config.subscribe(changes.append)
+        config.watch()
+        try:
+            time.sleep(0.3)  # Наблюдатель успевает запуститься
+            with open(self.env_file, "a") as f:
+                f.write("EXTRA=watched\n")
+            deadline = time.monotonic() + 10
+            while not changes and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            config.stop_watching()
+
+        self.assertEqual(changes, [{"EXTRA": "watched"}])
+
+    def test_pool_settings_reach_engine(self):
+        config = Config(self.env_file)
+        config.set_many({"SQLITE_PATH": f"sqlite:///{os.path.join(self.tmp.name, 'pool.db')}",
+                         "SQLITE_POOL_SIZE": "3", "SQLITE_POOL_TIMEOUT": "2.5"})
+        services = Services()
+        services.override("config", config)
+        services.register("database", _database)
+
+        engine = services.database.engine
+        self.assertEqual((engine.pool.size(), engine.pool.timeout()), (3, 2.5))
+        config.set("SQLITE_POOL_SIZE", "7")  # Новые настройки пула пересоздают движок
+        self.assertEqual(services.database.engine.pool.size(), 7)
+        services.database.engine.dispose()
+
+
+class TestDataBaseReconfigure(unittest.TestCase):
+    def test_reconfigure(self):
+        database = DataBase("sqlite://")
+        engine = database.engine
+
+        self.assertFalse(database.reconfigure("sqlite://"))
+        self.assertTrue(database.reconfigure("sqlite://", echo=True))
+        self.assertIsNot(database.engine, engine)
+        self.assertTrue(database.engine.echo)
+        database.engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
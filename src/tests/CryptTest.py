@@ -0,0 +1,283 @@
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from src.utils.Crypt import FileEncryptor
+
+
+class TestFileEncryptor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.encryptor = FileEncryptor("test_password")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def _write(self, name, data):
+        path = self._path(name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _roundtrip(self, data, encryptor=None):
+        encryptor = encryptor or self.encryptor
+        src = self._write("plain.bin", data)
+        self.assertTrue(encryptor.encrypt_file(src, self._path("file.encrypted")))
+        self.assertTrue(encryptor.decrypt_file(self._path("file.encrypted"), self._path("out.bin")))
+        return self._read(self._path("out.bin"))
+
+    def test_roundtrip(self):
+        for size in (0, 1, 15, 16, 4096, 4097, 10000):
+            data = os.urandom(size)
+            self.assertEqual(self._roundtrip(data), data)
+
+    def test_versioned_header(self):
+        src = self._write("plain.bin", b"data")
+        self.encryptor.encrypt_file(src, self._path("file.encrypted"))
+        header = self._read(self._path("file.encrypted"))[:len(FileEncryptor.MAGIC) + 1]
+        self.assertEqual(header, FileEncryptor.MAGIC + bytes([FileEncryptor.FORMAT_VERSION]))
+
+    def test_cbc_format_roundtrip(self):
+        encryptor = FileEncryptor("test_password", format_version=FileEncryptor.FORMAT_CBC)
+        for size in (0, 16, 5000):
+            data = os.urandom(size)
+            self.assertEqual(self._roundtrip(data, encryptor), data)
+
+    def test_segmented_boundaries(self):
+        encryptor = FileEncryptor("test_password", segment_size=1024)
+        for size in (0, 1023, 1024, 1025, 4096):
+            data = os.urandom(size)
+            self.assertEqual(self._roundtrip(data, encryptor), data)
+
+    def test_buffer_modes(self):
+        for format_version in (FileEncryptor.FORMAT_CBC, FileEncryptor.FORMAT_SEGMENTED):
+            for buffer_size in (100, 4096, 1024 * 1024):
+                for use_mmap in (False, True):
+                    encryptor = FileEncryptor("test_password", format_version, segment_size=1024,
+                                              buffer_size=buffer_size, use_mmap=use_mmap)
+                    for size in (0, 15, 4096, 10001):
+                        data = os.urandom(size)
+                        self.assertEqual(self._roundtrip(data, encryptor), data)
+
+    def test_wrong_password(self):
+        src = self._write("plain.bin", b"secret data")
+        self.encryptor.encrypt_file(src, self._path("file.encrypted"))
+        other = FileEncryptor("wrong_password")
+        self.assertFalse(other.decrypt_file(self._path("file.encrypted"), self._path("out.bin")))
+
+    def test_tampering_detected(self):
+        encryptor = FileEncryptor("test_password", segment_size=1024)
+        src = self._write("plain.bin", os.urandom(4000))
+        encryptor.encrypt_file(src, self._path("file.encrypted"))
+        data = bytearray(self._read(self._path("file.encrypted")))
+
+        flipped = bytearray(data)
+        flipped[2000] ^= 1
+        self._write("flipped.encrypted", bytes(flipped))
+        self.assertFalse(encryptor.decrypt_file(self._path("flipped.encrypted"), self._path("out.bin")))
+
+        # Отрезанный последний сегмент вместе с футером
+        self._write("truncated.encrypted", bytes(data[:-(FileEncryptor.FOOTER_SIZE + 100)]))
+        self.assertFalse(encryptor.decrypt_file(self._path("truncated.encrypted"), self._path("out.bin")))
+
+    def test_decrypt_range(self):
+        encryptor = FileEncryptor("test_password", segment_size=1000)
+        data = os.urandom(10500)
+        src = self._write("plain.bin", data)
+        encryptor.encrypt_file(src, self._path("file.encrypted"))
+
+        for offset, length in ((0, 10), (999, 2), (1500, 3000), (10000, 1000), (10500, 5), (0, 20000)):
+            self.assertEqual(encryptor.decrypt_range(self._path("file.encrypted"), offset, length),
+                             data[offset:offset + length])
+
+    def test_parallel_segments(self):
+        encryptor = FileEncryptor("test_password", segment_size=1000)
+        data = os.urandom(25001)
+        src = self._write("plain.bin", data)
+        self.assertTrue(encryptor.encrypt_file(src, self._path("par.encrypted"), workers=2))
+        self.assertTrue(encryptor.decrypt_file(self._path("par.encrypted"), self._path("out.bin")))
+        self.assertEqual(self._read(self._path("out.bin")), data)
+
+        encryptor.encrypt_file(src, self._path("file.encrypted"))
+        self.assertTrue(encryptor.decrypt_file(self._path("file.encrypted"), self._path("out2.bin"), workers=3))
+        self.assertEqual(self._read(self._path("out2.bin")), data)
+
+    def test_bytes_roundtrip(self):
+        encryptor = FileEncryptor("test_password", segment_size=1024)
+        for size in (0, 1, 1024, 1025, 5000):
+            data = os.urandom(size)
+            encrypted = encryptor.encrypt_bytes(data)
+            self.assertEqual(encryptor.decrypt_bytes(encrypted), data)
+
+    def test_stream_interoperates_with_files(self):
+        encryptor = FileEncryptor("test_password", segment_size=1024)
+        data = os.urandom(5000)
+        chunks = [data[i:i + 333] for i in range(0, len(data), 333)]
+        self._write("stream.encrypted", b"".join(encryptor.encrypt_stream(iter(chunks))))
+        self.assertTrue(encryptor.decrypt_file(self._path("stream.encrypted"), self._path("out.bin")))
+        self.assertEqual(self._read(self._path("out.bin")), data)
+
+        for format_version in (FileEncryptor.FORMAT_CBC, FileEncryptor.FORMAT_SEGMENTED):
+            src = self._write("plain.bin", data)
+            FileEncryptor("test_password", format_version).encrypt_file(src, self._path("file.encrypted"))
+            with open(self._path("file.encrypted"), 'rb') as fin:
+                self.assertEqual(b"".join(encryptor.decrypt_stream(fin)), data)
+
+    def test_stream_detects_truncation(self):
+        encryptor = FileEncryptor("test_password", segment_size=1024)
+        encrypted = encryptor.encrypt_bytes(os.urandom(5000))
+        with self.assertRaises(ValueError):
+            encryptor.decrypt_bytes(encrypted[:-1])
+        with self.assertRaises(ValueError):
+            encryptor.decrypt_bytes(encrypted[:-(FileEncryptor.FOOTER_SIZE + 1040)] + encrypted[-FileEncryptor.FOOTER_SIZE:])
+
+    def test_session_roundtrip(self):
+        self.encryptor.start_session()
+        data = os.urandom(5000)
+        self.assertEqual(self._roundtrip(data), data)
+
+        # Другой экземпляр без сессии должен расшифровать файл сессии
+        other = FileEncryptor("test_password")
+        self.assertTrue(other.decrypt_file(self._path("file.encrypted"), self._path("other.bin")))
+        self.assertEqual(self._read(self._path("other.bin")), data)
+
+    def test_session_reuses_master_key(self):
+        self.encryptor.start_session()
+        calls = []
+        derive = self.encryptor._derive_master_key
+        self.encryptor._derive_master_key = lambda *args: calls.append(args) or derive(*args)
+
+        for _ in range(3):
+            self._roundtrip(b"payload")
+        self.assertEqual(calls, [])
+
+    def test_legacy_file_decrypts(self):
+        data = os.urandom(64)
+        salt = os.urandom(FileEncryptor.SALT_SIZE)
+        key, iv = self.encryptor._derive_key_and_iv("test_password", salt)
+        encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+        self._write("legacy.encrypted", salt + encryptor.update(data) + encryptor.finalize())
+
+        self.assertTrue(self.encryptor.decrypt_file(self._path("legacy.encrypted"), self._path("out.bin")))
+        self.assertEqual(self._read(self._path("out.bin")), data)
+
+    def _make_tree(self):
+        files = {
+            "a.txt": b"alpha",
+            os.path.join("sub", "b.bin"): os.urandom(10000),
+            os.path.join("sub", "deep", "c.bin"): b"",
+        }
+        for rel, data in files.items():
+            os.makedirs(os.path.dirname(self._path(os.path.join("src", rel))), exist_ok=True)
+            self._write(os.path.join("src", rel), data)
+        return files
+
+    def test_tree_roundtrip(self):
+        files = self._make_tree()
+        for workers in (1, 2):
+            report = self.encryptor.encrypt_tree(self._path("src"), self._path("enc"), workers=workers)
+            self.assertEqual((report.files, report.errors), (len(files), []))
+            self.assertTrue(os.path.exists(self._path(os.path.join("enc", "a.txt.encrypted"))))
+
+            report = self.encryptor.decrypt_tree(self._path("enc"), self._path("dec"), workers=workers)
+            self.assertEqual((report.files, report.errors), (len(files), []))
+            for rel, data in files.items():
+                self.assertEqual(self._read(self._path(os.path.join("dec", rel))), data)
+
+    def test_tree_reports_errors(self):
+        self._make_tree()
+        self.encryptor.encrypt_tree(self._path("src"), self._path("enc"), workers=1)
+        self._write(os.path.join("enc", "broken.encrypted"), FileEncryptor.MAGIC + b"\x01")
+
+        report = self.encryptor.decrypt_tree(self._path("enc"), self._path("dec"), workers=2)
+        self.assertEqual(report.files, 3)
+        self.assertEqual([os.path.basename(path) for path, _ in report.errors], ["broken.encrypted"])
+
+    def test_tree_keeps_format_settings(self):
+        self._make_tree()
+        magic_size = len(FileEncryptor.MAGIC)
+        segment_offset = magic_size + 1 + FileEncryptor.MASTER_SALT_SIZE + FileEncryptor.FILE_SALT_SIZE
+        # The password is passed per call, so the tree runs on a fresh session encryptor
+        for format_version, segment_size in ((FileEncryptor.FORMAT_CBC, None), (FileEncryptor.FORMAT_SEGMENTED, 1024)):
+            encryptor = FileEncryptor(format_version=format_version, segment_size=segment_size)
+            out_dir = self._path(f"enc{format_version}")
+            report = encryptor.encrypt_tree(self._path("src"), out_dir, password="test_password", workers=1)
+            self.assertEqual(report.errors, [])
+
+            data = self._read(os.path.join(out_dir, "sub", "b.bin.encrypted"))
+            self.assertEqual(data[magic_size], format_version)
+            if segment_size:
+                self.assertEqual(struct.unpack(">I", data[segment_offset:segment_offset + 4])[0], segment_size)
+
+            report = encryptor.decrypt_tree(out_dir, self._path("dec"), password="test_password", workers=1)
+            self.assertEqual(report.errors, [])
+
+    def test_tree_keeps_io_settings(self):
+        self._make_tree()
+        encryptor = FileEncryptor(buffer_size=100, use_mmap=True)
+        encrypt_file = FileEncryptor._encrypt_file
+
+        def record(instance, *args):
+            seen.append(((instance.buffer_size, instance.use_mmap), args[0]))
+            return encrypt_file(instance, *args)
+
+        for incremental in (False, True):
+            seen = []
+            with mock.patch.object(FileEncryptor, "_encrypt_file", autospec=True, side_effect=record):
+                report = encryptor.encrypt_tree(self._path("src"), self._path(f"enc{incremental}"),
+                                                password="test_password", workers=1, incremental=incremental)
+            self.assertEqual(report.errors, [])
+            self.assertEqual({settings for settings, _ in seen}, {(100, True)})
+            self.assertEqual([os.path.basename(path) for _, path in seen], ["b.bin", "a.txt", "c.bin"])  # Largest first
+
+    def _age(self, rel, seconds_ago=60):
+        # Old enough that the manifest trusts the mtime (see RACY_WINDOW_NS)
+        timestamp = os.path.getmtime(self._path(os.path.join("src", rel))) - seconds_ago
+        os.utime(self._path(os.path.join("src", rel)), (timestamp, timestamp))
+
+    def test_incremental_tree(self):
+        files = self._make_tree()
+        for rel in files:
+            self._age(rel)
+        encrypt = lambda: self.encryptor.encrypt_tree(self._path("src"), self._path("enc"), workers=1,
+                                                      incremental=True)
+
+        report = encrypt()
+        self.assertEqual((report.files, report.skipped, report.errors), (3, 0, []))
+        report = encrypt()
+        self.assertEqual((report.files, report.skipped, report.hashed), (0, 3, 0))  # Nothing read
+
+        self._write(os.path.join("src", "a.txt"), b"ALPHA")  # Same size, new mtime -> hashed
+        self._age("a.txt", 30)
+        self._age(os.path.join("sub", "deep", "c.bin"), 30)  # Only touched -> hashed, skipped
+        os.remove(self._path(os.path.join("src", "sub", "b.bin")))
+        report = encrypt()
+        self.assertEqual((report.files, report.skipped, report.hashed, report.removed), (1, 1, 2, 1))
+        self.assertFalse(os.path.exists(self._path(os.path.join("enc", "sub", "b.bin.encrypted"))))
+
+        self._write(os.path.join("src", "new.txt"), b"new")  # Just written: racy, hashed next time
+        report = encrypt()
+        self.assertEqual((report.files, report.skipped), (1, 2))
+        self.assertEqual(encrypt().hashed, 1)
+
+        report = self.encryptor.decrypt_tree(self._path("enc"), self._path("dec"), workers=1)
+        self.assertEqual((report.files, report.errors), (3, []))
+        self.assertEqual(self._read(self._path(os.path.join("dec", "a.txt"))), b"ALPHA")
+
+        with self.assertRaises(ValueError):
+            FileEncryptor("other_password").encrypt_tree(self._path("src"), self._path("enc"), incremental=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
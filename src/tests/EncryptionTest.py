@@ -0,0 +1,71 @@
+import os
+import unittest
+
+from sqlalchemy import create_engine, text
+
+from src.database.BbpBase import BbpTableBase, BbpCRUD, BbpUpdateSchema
+from src.database.Encryption import VaultKey, VaultLockedError, vault_key
+from src.tests import unlock_test_vault
+
+
+class TestEncryptedPassword(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        BbpTableBase.metadata.create_all(self.engine)
+        self.crud = BbpCRUD(self.engine)
+        unlock_test_vault(self.addCleanup)
+
+    def _raw_password(self, record_id):
+        with self.engine.connect() as connection:
+            return connection.execute(text("SELECT password FROM bbp WHERE id = :id"), {"id": record_id}).scalar()
+
+    def test_stored_encrypted(self):
+        record = self.crud.create("user", "secret", "notes")
+        raw = self._raw_password(record.id)
+        self.assertTrue(raw.startswith(VaultKey.PREFIX))
+        self.assertNotIn("secret", raw)
+        self.assertEqual(self.crud.read(record.id).password, "secret")
+
+    def test_read_all_and_update(self):
+        for i in range(10):
+            self.crud.create(f"user{i}", f"password{i}", "")
+        self.assertEqual([r.password for r in self.crud.read_all()], [f"password{i}" for i in range(10)])
+
+        updated = self.crud.update(1, BbpUpdateSchema(password="changed"))
+        self.assertEqual(updated.password, "changed")
+        self.assertTrue(self._raw_password(1).startswith(VaultKey.PREFIX))
+
+    def test_plaintext_rows_still_readable(self):
+        vault_key.lock()
+        vault_key.allow_plaintext = True  # Единственный тест явного разрешения открытого текста
+        self.addCleanup(setattr, vault_key, "allow_plaintext", False)
+        record = self.crud.create("old_user", "old_password", "")
+        with self.assertRaises(VaultLockedError):  # Читалось бы как шифротекст
+            self.crud.create("old_user", VaultKey.PREFIX + "password", "")
+        vault_key.allow_plaintext = False
+        vault_key.unlock("master_password", os.urandom(16), iterations=1000)
+        self.assertEqual(self.crud.read(record.id).password, "old_password")
+
+    def test_locked_vault_rejects_writes(self):
+        record = self.crud.create("user", "secret", "")
+        vault_key.lock()
+        with self.assertRaises(VaultLockedError):
+            self.crud.create("user", "plain", "")
+        with self.assertRaises(VaultLockedError):
+            self.crud.update(record.id, BbpUpdateSchema(password="plain"))
+
+    def test_locked_vault(self):
+        record = self.crud.create("user", "secret", "")
+        vault_key.lock()
+        with self.assertRaises(VaultLockedError):
+            self.crud.read(record.id)
+
+    def test_wrong_key(self):
+        record = self.crud.create("user", "secret", "")
+        vault_key.unlock("other_password", os.urandom(16), iterations=1000)
+        with self.assertRaises(ValueError):
+            self.crud.read(record.id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import time
+import unittest
+
+from sqlalchemy import create_engine
+
+from src.database.Encryption import VaultKey
+from src.database.MasterKey import PBKDF2, SCRYPT, MasterKeyStore, VaultMetaTable, calibrate
+
+
+class TestMasterKeyStore(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        self.vault = VaultKey()
+        self.store = MasterKeyStore(self.engine, self.vault, target_seconds=0.02, min_cost=1000)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_setup_and_unlock(self):
+        self.assertFalse(self.store.initialized)
+        params = self.store.setup("correct horse")
+        self.assertEqual(params.kdf, PBKDF2)
+        encrypted = self.vault.encrypt("secret")
+        with self.assertRaises(ValueError):
+            self.store.setup("again")
+
+        self.store.lock()
+        self.assertFalse(self.store.unlock("wrong"))
+        self.assertFalse(self.vault.unlocked)
+        self.assertTrue(self.store.unlock("correct horse"))
+        self.assertEqual(self.vault.decrypt(encrypted), "secret")  # Тот же ключ хранилища
+
+    def test_unlock_retunes_when_cost_is_off_target(self):
+        # Цель побольше, чем в остальных тестах: при 20 мс шум замера сравним с RETUNE_FACTOR
+        self.store = MasterKeyStore(self.engine, self.vault, target_seconds=0.08, min_cost=1000)
+        self.store.setup("password")
+        encrypted = self.vault.encrypt("secret")
+        with self.store.Session() as session:
+            # Как будто параметры подобраны на машине в 16 раз быстрее этой (без смены ключа)
+            meta = session.get(VaultMetaTable, 1)
+            calibrated = meta.cost
+        slow = MasterKeyStore(self.engine, VaultKey(), target_seconds=0.08 / 16, min_cost=1000)
+        self.assertTrue(slow.unlock("password"))
+        self.assertTrue(slow.retuned)
+        self.assertLess(slow.params.cost, calibrated)
+
+        self.assertTrue(self.store.unlock("password"))  # Обратно на эту машину
+        self.assertTrue(self.store.retuned)
+        self.assertEqual(self.vault.decrypt(encrypted), "secret")
+
+        started = time.perf_counter()
+        self.assertTrue(self.store.unlock("password"))
+        self.assertFalse(self.store.retuned)  # Стоимость уже соответствует цели
+        self.assertLess(time.perf_counter() - started, 0.08 * 10)
+
+    def test_kdf_change_and_password_change(self):
+        self.store.setup("old")
+        scrypt = MasterKeyStore(self.engine, self.vault, kdf=SCRYPT, target_seconds=0.02, min_cost=2 ** 10)
+        self.assertTrue(scrypt.unlock("old"))
+        self.assertEqual(scrypt.params.kdf, SCRYPT)
+
+        self.assertFalse(scrypt.change_password("wrong", "new"))
+        self.assertTrue(scrypt.change_password("old", "new"))
+        self.assertFalse(scrypt.unlock("old"))
+        self.assertTrue(scrypt.unlock("new"))
+
+    def test_calibrate(self):
+        self.assertGreaterEqual(calibrate(PBKDF2, 0.001), 100000)  # Нижняя граница не зависит от машины
+        cost = calibrate(SCRYPT, 0.02, min_cost=2)
+        self.assertEqual(cost & (cost - 1), 0)  # N - степень двойки
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+
+from src.core.Metrics import Metrics, metrics
+from src.database.BbpBase import BbpTableBase, BbpCRUD
+from src.tests import unlock_test_vault
+
+
+class TestMetrics(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        registry = Metrics()
+        registry.inc("calls_total")
+        with registry.timer("block_seconds"):
+            pass
+
+        self.assertEqual(registry.snapshot(), {"counters": {}, "histograms": {}})
+
+    def test_histogram_and_prometheus_export(self):
+        registry = Metrics(enabled=True)
+        registry.inc("calls_total", operation="read")
+        registry.observe("latency_seconds", 0.002, buckets=(0.001, 0.01), operation="read")
+        registry.observe("latency_seconds", 0.5, buckets=(0.001, 0.01), operation="read")
+
+        histogram = registry.snapshot()["histograms"]['latency_seconds{operation="read"}']
+        self.assertEqual(histogram["buckets"], {"0.001": 0, "0.01": 1, "+Inf": 2})
+        text = registry.to_prometheus()
+        self.assertIn('calls_total{operation="read"} 1', text)
+        self.assertIn('latency_seconds_bucket{operation="read",le="0.01"} 1', text)
+        self.assertIn('latency_seconds_count{operation="read"} 2', text)
+
+    def test_timed_counts_sql_statements(self):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'test.db')}")
+            BbpTableBase.metadata.create_all(engine)
+            crud = BbpCRUD(engine)
+            unlock_test_vault(self.addCleanup)
+            record = crud.create('metrics_user', 'password', 'notes')
+
+            metrics.reset()
+            metrics.enable()
+            try:
+                crud.read(record.id)
+            finally:
+                metrics.disable()
+            engine.dispose()
+
+        histograms = metrics.snapshot()["histograms"]
+        self.assertEqual(histograms['bbp_operation_seconds{operation="read"}']["count"], 1)
+        self.assertEqual(histograms['bbp_operation_seconds_sql_statements{operation="read"}']["sum"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
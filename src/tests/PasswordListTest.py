@@ -0,0 +1,96 @@
+import unittest
+from types import SimpleNamespace
+
+import flet as ft
+
+from src.ui.PasswordList import OVERSCAN, PasswordList, crud_page_loader
+
+
+class TestPasswordList(unittest.TestCase):
+    def setUp(self):
+        self.records = [{"id": i, "login": f"user{i}", "password": "secret", "notes": ""} for i in range(1, 5001)]
+        self.loaded_pages = []
+        self.password_list = PasswordList(self.load_page, lambda record: ft.Text(record["login"]),
+                                          page_size=50, item_extent=100, height=400)
+        self.password_list.reload()
+
+    def load_page(self, after_id, limit):
+        self.loaded_pages.append(after_id)
+        start = 0 if after_id is None else after_id  # id совпадает с позицией + 1
+        return self.records[start:start + limit]
+
+    def visible_logins(self):
+        return [control.value for control in self.password_list.view.controls[1:-1]]
+
+    def test_builds_only_visible_window(self):
+        self.assertEqual(self.loaded_pages, [None])
+        self.assertEqual(self.visible_logins(), [f"user{i}" for i in range(1, 4 + OVERSCAN + 1)])
+        self.assertEqual(self.password_list.cards_built, 4 + OVERSCAN)
+
+    def test_scroll_loads_pages_lazily_and_reuses_cards(self):
+        self.password_list._on_scroll(SimpleNamespace(pixels=100 * 60))  # Первая видимая - 61-я запись
+        self.assertEqual(self.loaded_pages, [None, 50])
+        self.assertEqual(self.visible_logins()[0], f"user{61 - OVERSCAN}")
+        self.assertEqual(self.password_list._top.height, (60 - OVERSCAN) * 100)
+
+        built = self.password_list.cards_built
+        self.password_list._on_scroll(SimpleNamespace(pixels=100 * 61))  # Сдвиг на одну карточку
+        self.assertEqual(self.password_list.cards_built, built + 1)
+
+    def test_patches_single_records(self):
+        card = self.password_list.view.controls[2]
+        self.password_list.remove(1)
+        self.assertEqual(self.visible_logins()[0], "user2")
+        self.assertIs(self.password_list.view.controls[1], card)  # Карточка записи 2 не перестроена
+
+        self.password_list.replace({"id": 3, "login": "renamed", "password": "x", "notes": ""})
+        self.assertEqual(self.visible_logins()[1], "renamed")
+
+    def test_insert_beyond_loaded_pages_keeps_paging(self):
+        self.password_list.insert({"id": 10000, "login": "new", "password": "x", "notes": ""})
+        self.password_list._on_scroll(SimpleNamespace(pixels=100 * 60))
+
+        self.assertEqual(self.loaded_pages, [None, 50])  # Подгрузка продолжается после последней загруженной
+        self.assertEqual(self.password_list._ids, sorted(self.password_list._ids))
+        self.assertEqual(self.password_list._ids[-1], 10000)
+
+    def test_crud_page_loader_skips_passwords(self):
+        calls = []
+        row = SimpleNamespace(_asdict=lambda: {"id": 1, "login": "user", "notes": ""})
+        crud = SimpleNamespace(read_rows=lambda columns, after_id, limit: calls.append(columns) or [row])
+
+        self.assertEqual(crud_page_loader(crud)(None, 10), [{"id": 1, "login": "user", "notes": ""}])
+        self.assertNotIn("password", calls[0])
+
+    def test_external_pages(self):
+        password_list = PasswordList(None, lambda record: ft.Text(record["login"]), item_extent=100, height=400)
+        password_list.set_records(self.records[:2], exhausted=False)
+        password_list.insert({"id": 9999, "login": "pending", "password": "", "notes": ""})
+        password_list.extend(self.records[1:4], exhausted=True)  # Запись 2 уже есть - пропускается
+
+        self.assertEqual(password_list._ids, [1, 2, 3, 4, 9999])
+        built = password_list.cards_built
+        password_list.set_records(password_list.records)  # Те же записи - карточки переиспользуются
+        self.assertEqual(password_list.cards_built, built)
+
+    def test_filter_reuses_cached_cards(self):
+        password_list = PasswordList(None, lambda record: ft.Text(record["login"]), item_extent=100, height=400)
+        password_list.set_records(self.records[:20])
+        password_list.set_records(self.records[100:103])  # Результаты поиска
+        built = password_list.cards_built
+        password_list.set_records(self.records[:20])  # Поиск очищен - карточки первых записей из кэша
+
+        self.assertEqual(password_list.cards_built, built)
+
+    def test_empty_list(self):
+        password_list = PasswordList(lambda after_id, limit: [], lambda record: ft.Text(""))
+        password_list.reload()
+        self.assertTrue(password_list._empty.visible)
+
+        password_list.insert({"id": 1, "login": "a", "password": "b", "notes": ""})
+        self.assertFalse(password_list._empty.visible)
+        self.assertEqual(len(password_list.view.controls), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
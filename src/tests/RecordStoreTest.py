@@ -0,0 +1,96 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from sqlalchemy import create_engine
+
+from src.database.BbpBase import BbpCRUD, BbpTableBase
+from src.database.Encryption import VaultKey
+from src.database.MasterKey import MasterKeyStore
+from src.tests import unlock_test_vault
+from src.ui.RecordStore import RecordStore
+
+
+class TestRecordStore(unittest.TestCase):
+    def setUp(self):
+        unlock_test_vault(self.addCleanup)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'test.db')}")
+        BbpTableBase.metadata.create_all(self.engine)
+        self.crud = BbpCRUD(self.engine)
+        self.crud.bulk_create((f"user{i}", "password", f"note {i}") for i in range(10))
+        self.store = RecordStore(lambda: self.crud, first_page_size=2, page_size=3)
+
+    def tearDown(self):
+        self.store.close()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def load(self):
+        pages, done = [], threading.Event()
+
+        def on_page(records, first, exhausted):
+            pages.append(([record["id"] for record in records], first, exhausted))
+            if exhausted:
+                done.set()
+        return pages, done, on_page
+
+    def test_load_streams_pages(self):
+        pages, done, on_page = self.load()
+        self.assertTrue(self.store.load(on_page))
+        self.assertTrue(done.wait(10))
+
+        self.assertEqual(pages, [([1, 2], True, False), ([3, 4, 5], False, False), ([6, 7, 8], False, False),
+                                 ([9, 10], False, True)])
+
+    def test_repeated_loads_are_coalesced(self):
+        release = threading.Event()
+        self.store.submit(lambda crud: release.wait(10))  # Фоновый поток занят
+        pages, done, on_page = self.load()
+
+        self.assertTrue(self.store.load(on_page))
+        self.assertFalse(self.store.load(on_page))
+        self.assertFalse(self.store.load(on_page))
+        release.set()
+        self.assertTrue(done.wait(10))
+        self.store.submit(lambda crud: None).result(10)  # Дождаться конца загрузки
+
+        # Первая загрузка прервана после первой страницы и начата заново один раз
+        self.assertEqual(self.store.loads_started, 2)
+        self.assertEqual([first for _, first, _ in pages].count(True), 2)
+
+    def test_search_cancels_queued_search(self):
+        release = threading.Event()
+        self.store.submit(lambda crud: release.wait(10))
+        stale = self.store.search("user1")
+        latest = self.store.search("note 3")
+        release.set()
+
+        self.assertEqual(latest.result(10), [{"id": 4, "login": "user3", "notes": "note 3"}])
+        self.assertTrue(stale.cancelled())
+
+    def test_unlock(self):
+        vault = VaultKey()
+        master_key = MasterKeyStore(self.engine, vault, target_seconds=0.01, min_cost=1000)
+        store = RecordStore(lambda: self.crud, master_key_factory=lambda: master_key)
+        try:
+            self.assertFalse(store.vault_initialized().result(10))
+            self.assertTrue(store.unlock("master", setup=True).result(10))
+            vault.lock()
+            self.assertFalse(store.unlock("wrong").result(10))
+            self.assertTrue(store.unlock("master").result(10))
+            self.assertTrue(vault.unlocked)
+        finally:
+            store.close()
+
+    def test_create_delete_and_read_password(self):
+        record = self.store.create("new", "secret", "").result(10)
+        self.assertEqual(record, {"id": 11, "login": "new", "notes": ""})
+        self.assertEqual(self.store.read_password(11).result(10), "secret")
+        self.assertTrue(self.store.delete(11).result(10))
+        self.assertIsNone(self.store.read_password(11).result(10))
+
+
+if __name__ == "__main__":
+    unittest.main()
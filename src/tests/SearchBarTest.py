@@ -0,0 +1,29 @@
+import threading
+import unittest
+
+from src.ui.SearchBar import SearchBar
+
+
+class TestSearchBar(unittest.TestCase):
+    def test_debounces_and_skips_repeated_query(self):
+        queries, fired = [], threading.Event()
+
+        def on_search(query):
+            queries.append(query)
+            fired.set()
+
+        search_bar = SearchBar(on_search, delay=0.05)
+        for value in ("g", "gi", "git ", "git"):
+            search_bar.schedule(value)
+        self.assertTrue(fired.wait(5))
+        self.assertEqual(queries, ["git"])
+
+        search_bar.schedule("gi")
+        search_bar.schedule("git")  # Вернулись к найденному запросу
+        search_bar.schedule("")  # Очистка - сразу и отменяет ожидающий поиск
+        self.assertEqual(queries, ["git", ""])
+        self.assertEqual(search_bar.query, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
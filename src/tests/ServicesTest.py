@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from src.core.Config import Config
+from src.core.Metrics import metrics
+from src.core.Services import Services, _config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestServices(unittest.TestCase):
+    def test_factory_runs_once_on_first_use(self):
+        services = Services()
+        calls = []
+        services.register("value", lambda container: calls.append(1) or object())
+
+        self.assertFalse(services.is_created("value"))
+        first = services.value
+        self.assertIs(services.get("value"), first)
+        self.assertEqual(calls, [1])
+
+        services.reset("value")
+        self.assertIsNot(services.value, first)
+        self.assertEqual(calls, [1, 1])
+
+    def test_dependencies_and_override(self):
+        services = Services()
+        services.register("base", lambda container: 2)
+        services.register("derived", lambda container: container.base * 10)
+        services.override("base", 5)
+
+        self.assertEqual(services.derived, 50)
+        with self.assertRaises(AttributeError):
+            services.missing
+
+    def test_config_applies_metrics_setting(self):
+        self.addCleanup(metrics.disable)
+        with tempfile.TemporaryDirectory() as directory, mock.patch.dict(os.environ):
+            os.environ.pop("METRICS_ENABLED", None)
+            config = Config(os.path.join(directory, ".env"))
+            config.set("METRICS_ENABLED", "true")
+            services = Services()
+            services.register("config", _config)
+
+            with mock.patch("src.core.Config.config", config):
+                services.config
+            self.assertTrue(metrics.enabled)
+            config.set("METRICS_ENABLED", "false")
+            self.assertFalse(metrics.enabled)
+
+    def test_imports_have_no_side_effects(self):
+        # Импорт точек входа не создает .env и базу данных в рабочем каталоге
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(os.environ, PYTHONPATH=ROOT)
+            subprocess.run([sys.executable, "-c", "import src.core.Database, src.api.Server, src.utils.Crypt"],
+                           cwd=directory, env=env, check=True, timeout=120)
+
+            self.assertEqual(os.listdir(directory), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,13 @@
+from src.database.Encryption import vault_key
+
+# Постоянный ключ: BbpTest работает с файлом database.db, который переживает запуски
+TEST_VAULT_KEY = bytes(range(32))
+
+
+def unlock_test_vault(add_cleanup) -> None:
+    """
+    Разблокирует общий vault_key тестовым ключом. Блокировка регистрируется через
+    add_cleanup (TestCase.addCleanup или addClassCleanup) и выполняется даже при ошибке теста.
+    """
+    vault_key.unlock_with_key(TEST_VAULT_KEY)
+    add_cleanup(vault_key.lock)
@@ -0,0 +1,238 @@
+import bisect
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import flet as ft
+
+from src.ui.RecordStore import LIST_COLUMNS
+
+CARD_HEIGHT = 180  # Высота карточки вместе с вертикальными отступами
+PAGE_SIZE = 50
+OVERSCAN = 5  # Карточек сверх видимых с каждой стороны окна
+CARD_CACHE_SIZE = 200  # Карточек, сохраняемых после выхода из окна (прокрутка назад, смена фильтра)
+
+Record = Dict[str, Any]
+PageLoader = Callable[[Optional[int], int], List[Record]]
+
+
+def crud_page_loader(crud) -> PageLoader:
+    """
+    Загрузчик страниц из BbpCRUD (keyset-пагинация по id через read_rows). Читаются
+    только LIST_COLUMNS: пароли не расшифровываются для списка.
+
+    Args:
+        crud: BbpCRUD.
+
+    Returns:
+        PageLoader: Функция (after_id, limit) -> список записей-словарей.
+    """
+    def load(after_id: Optional[int], limit: int) -> List[Record]:
+        return [row._asdict() for row in crud.read_rows(LIST_COLUMNS, after_id, limit)]
+    return load
+
+
+class PasswordList:
+    """
+    Виртуализированный список записей: карточки строятся только для видимого окна
+    (плюс OVERSCAN), остальное место занимают пустые контейнеры нужной высоты.
+
+    Записи либо подгружаются страницами через load_page по мере прокрутки, либо
+    передаются извне (set_records и extend, например из фонового потока). Построенные
+    карточки (до CARD_CACHE_SIZE последних) кэшируются по id и переиспользуются, пока
+    запись не изменилась, в том числе при смене набора записей фильтром;
+    insert, remove и replace меняют одну запись и перестраивают только ее карточку.
+    Записи хранятся по возрастанию id.
+    """
+
+    def __init__(self, load_page: Optional[PageLoader], build_card: Callable[[Record], ft.Control],
+                 page_size: int = PAGE_SIZE, item_extent: int = CARD_HEIGHT, height: int = 400, width: int = 600,
+                 empty_text: str = "У вас пока нет сохраненных паролей."):
+        """
+        Args:
+            load_page (Optional[PageLoader]): (after_id, limit) -> записи с id больше after_id
+                по возрастанию id; None - записи передаются через set_records и extend.
+            build_card (Callable[[Record], ft.Control]): Строит карточку записи высотой item_extent.
+            page_size (int): Размер страницы загрузки.
+            item_extent (int): Высота одной карточки в пикселях.
+            height (int): Высота области прокрутки.
+            width (int): Ширина списка.
+            empty_text (str): Текст для пустого списка.
+        """
+        self.load_page = load_page
+        self.build_card = build_card
+        self.page_size = page_size
+        self.item_extent = item_extent
+        self.height = height
+        self.records: List[Record] = []
+        self._ids: List[int] = []
+        self._cards: "OrderedDict[int, Tuple[Record, ft.Control]]" = OrderedDict()
+        self._loaded_until = None  # Последний id, полученный от load_page
+        self._exhausted = load_page is None
+        self._window = None  # Отрисованное окно: (start, end, id записей, всего записей)
+        self._first_visible = 0
+        self._lock = threading.RLock()  # Записи приходят и из потока интерфейса, и из фоновых
+        self.cards_built = 0  # Для отладки и тестов: сколько карточек построено всего
+
+        self._top = ft.Container(height=0)
+        self._bottom = ft.Container(height=0)
+        self._empty = ft.Text(empty_text, size=16, color="white", text_align=ft.TextAlign.CENTER, visible=False)
+        self.view = ft.ListView(controls=[self._top, self._bottom], spacing=0, height=height, width=width,
+                                on_scroll=self._on_scroll, on_scroll_interval=50)
+        self.control = ft.Column([self._empty, self.view], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+
+    @property
+    def empty_text(self) -> str:
+        return self._empty.value
+
+    @empty_text.setter
+    def empty_text(self, value: str) -> None:
+        self._empty.value = value
+
+    @property
+    def visible_count(self) -> int:
+        return math.ceil(self.height / self.item_extent)
+
+    def reload(self) -> None:
+        """
+        Сбрасывает загруженные записи и загружает первую страницу через load_page.
+        """
+        with self._lock:
+            self.records, self._ids = [], []
+            self._loaded_until = None
+            self._exhausted = self.load_page is None
+            self._first_visible = 0
+            self._render(force=True)
+
+    def set_records(self, records: List[Record], exhausted: bool = True) -> None:
+        """
+        Заменяет записи списка (карточки неизменившихся записей переиспользуются).
+
+        Args:
+            records (List[Record]): Записи по возрастанию id.
+            exhausted (bool): Других записей нет (иначе ожидаются вызовы extend).
+        """
+        with self._lock:
+            self.records = list(records)
+            self._ids = [record["id"] for record in self.records]
+            self._exhausted = exhausted
+            self._render(force=True)
+
+    def extend(self, records: List[Record], exhausted: bool = True) -> None:
+        """
+        Добавляет следующую страницу записей; уже добавленные через insert пропускаются.
+
+        Args:
+            records (List[Record]): Записи по возрастанию id.
+            exhausted (bool): Это последняя страница.
+        """
+        with self._lock:
+            self._exhausted = exhausted
+            records = [record for record in records if self._position(record["id"]) is None]
+            if records:
+                position = bisect.bisect_left(self._ids, records[0]["id"])
+                self.records[position:position] = records
+                self._ids[position:position] = [record["id"] for record in records]
+            self._render()
+
+    def _load_more(self) -> None:
+        page = self.load_page(self._loaded_until, self.page_size)
+        if page:
+            self._loaded_until = page[-1]["id"]
+        self._exhausted = len(page) < self.page_size
+        records = [record for record in page if self._position(record["id"]) is None]
+        position = bisect.bisect_left(self._ids, records[0]["id"]) if records else 0
+        self.records[position:position] = records
+        self._ids[position:position] = [record["id"] for record in records]
+
+    def _on_scroll(self, e) -> None:
+        first = int(max(e.pixels or 0, 0) // self.item_extent)
+        with self._lock:
+            if first != self._first_visible:
+                self._first_visible = first
+                self._render()
+
+    def _render(self, force: bool = False) -> None:
+        first = self._first_visible
+        # Подгрузка, пока окно не заполнено или не кончились записи
+        while self.load_page is not None and not self._exhausted \
+                and len(self.records) < first + self.visible_count + 2 * OVERSCAN:
+            self._load_more()
+
+        start = max(0, min(first, len(self.records)) - OVERSCAN)
+        end = min(len(self.records), first + self.visible_count + OVERSCAN)
+        window = (start, end, tuple(self._ids[start:end]), len(self.records))
+        if window == self._window and not force:
+            return
+        self._window = window
+
+        cards = []
+        for record in self.records[start:end]:
+            cached = self._cards.get(record["id"])
+            if cached is not None and cached[0] == record:
+                card = cached[1]
+                self._cards.move_to_end(record["id"])
+            else:
+                card = self.build_card(record)
+                self.cards_built += 1
+                self._cards[record["id"]] = (record, card)
+            cards.append(card)
+        while len(self._cards) > max(CARD_CACHE_SIZE, len(cards)):
+            self._cards.popitem(last=False)
+
+        self._top.height = start * self.item_extent
+        self._bottom.height = (len(self.records) - end) * self.item_extent
+        self.view.controls = [self._top, *cards, self._bottom]
+        self._empty.visible = not self.records
+        self._update(self.control)
+
+    def _position(self, record_id: int) -> Optional[int]:
+        position = bisect.bisect_left(self._ids, record_id)
+        if position < len(self._ids) and self._ids[position] == record_id:
+            return position
+        return None
+
+    def insert(self, record: Record) -> None:
+        """
+        Добавляет запись на место по ее id (существующая запись с тем же id заменяется).
+        """
+        with self._lock:
+            position = bisect.bisect_left(self._ids, record["id"])
+            if position < len(self._ids) and self._ids[position] == record["id"]:
+                self.records[position] = record
+            else:
+                self.records.insert(position, record)
+                self._ids.insert(position, record["id"])
+            self._render(force=True)
+
+    def remove(self, record_id: int) -> Optional[Record]:
+        """
+        Удаляет запись из списка без перестроения остальных карточек.
+
+        Returns:
+            Optional[Record]: Удаленная запись или None, если ее не было в списке.
+        """
+        with self._lock:
+            position = self._position(record_id)
+            if position is None:
+                return None
+            record = self.records.pop(position)
+            del self._ids[position]
+            self._render()
+            return record
+
+    def replace(self, record: Record) -> None:
+        """
+        Заменяет загруженную запись; перестраивается только ее карточка.
+        """
+        with self._lock:
+            position = self._position(record["id"])
+            if position is not None:
+                self.records[position] = record
+                self._render(force=True)
+
+    @staticmethod
+    def _update(control: ft.Control) -> None:
+        if control.page is not None:
+            control.update()
@@ -0,0 +1,214 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Для списка пароли не читаются и не расшифровываются: их дочитывает read_password при копировании
+LIST_COLUMNS = ("id", "login", "notes")
+FIRST_PAGE_SIZE = 50  # Первая страница маленькая, чтобы список появился сразу
+PAGE_SIZE = 1000
+SEARCH_LIMIT = 200
+
+PageCallback = Callable[[List[dict], bool, bool], None]
+
+
+class RecordStore:
+    """
+    Слой данных интерфейса: все обращения к таблице "bbp" (и расшифровка) выполняются
+    в одном фоновом потоке, методы сразу возвращают Future и не блокируют поток
+    интерфейса. Один поток сохраняет порядок операций и не создает конкурирующих
+    записей в SQLite.
+    """
+
+    def __init__(self, crud_factory: Callable = None, first_page_size: int = FIRST_PAGE_SIZE,
+                 page_size: int = PAGE_SIZE, master_key_factory: Callable = None):
+        """
+        Args:
+            crud_factory (Callable): Возвращает BbpCRUD; вызывается в фоновом потоке при
+                первой операции. По умолчанию services.crud.
+            first_page_size (int): Размер первой страницы load.
+            page_size (int): Размер следующих страниц load.
+            master_key_factory (Callable): Возвращает MasterKeyStore; по умолчанию services.master_key.
+        """
+        self._crud_factory = crud_factory or _default_crud
+        self._crud = None
+        self._master_key_factory = master_key_factory or _default_master_key
+        self.first_page_size = first_page_size
+        self.page_size = page_size
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="record-store")
+        self._lock = threading.Lock()
+        self._loading = False
+        self._reload_requested = False
+        self._search_future = None
+        self.loads_started = 0  # Сколько раз загрузка списка начиналась с первой страницы
+
+    def _get_crud(self):
+        if self._crud is None:
+            self._crud = self._crud_factory()  # База и схема создаются в фоновом потоке
+        return self._crud
+
+    def submit(self, function: Callable, *args) -> Future:
+        """
+        Выполняет function(crud, *args) в фоновом потоке.
+
+        Returns:
+            Future: Результат function.
+        """
+        return self._executor.submit(lambda: function(self._get_crud(), *args))
+
+    def vault_initialized(self) -> Future:
+        """
+        Future возвращает True, если мастер-пароль уже задан.
+        """
+        return self._executor.submit(lambda: self._master_key_factory().initialized)
+
+    def unlock(self, password: str, setup: bool = False) -> Future:
+        """
+        Разблокирует хранилище мастер-паролем (вывод ключа занимает около
+        UNLOCK_TARGET_MS и не блокирует интерфейс). Операции, поставленные после
+        unlock, выполняются уже с разблокированным ключом.
+
+        Args:
+            password (str): Мастер-пароль.
+            setup (bool): Задать мастер-пароль нового хранилища.
+
+        Returns:
+            Future: True, если пароль верный.
+        """
+        def unlock():
+            master_key = self._master_key_factory()
+            if setup:
+                master_key.setup(password)
+                return True
+            return master_key.unlock(password)
+        return self._executor.submit(unlock)
+
+    def create(self, login: str, password: str, notes: str) -> Future:
+        """
+        Создает запись. Future возвращает словарь со столбцами LIST_COLUMNS.
+        """
+        def create(crud):
+            record = crud.create(login, password, notes)
+            return {"id": record.id, "login": login, "notes": notes}
+        return self.submit(create)
+
+    def delete(self, record_id: int) -> Future:
+        """
+        Удаляет запись. Future возвращает True, если запись была удалена.
+        """
+        return self.submit(lambda crud: crud.delete(record_id))
+
+    def read_password(self, record_id: int) -> Future:
+        """
+        Читает и расшифровывает пароль одной записи. Future возвращает пароль или None.
+        """
+        def read_password(crud):
+            record = crud.read(record_id)
+            return record.password if record is not None else None
+        return self.submit(read_password)
+
+    def audit_breaches(self) -> Future:
+        """
+        Проверяет пароли всех записей по индексу утечек (см. BreachIndex.audit).
+
+        Returns:
+            Future: Список BreachedRecord или None, если индекс утечек не настроен.
+        """
+        def audit(crud):
+            return crud.breach_index.audit(crud) if crud.breach_index is not None else None
+        return self.submit(audit)
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> Future:
+        """
+        Полнотекстовый поиск по логину и заметкам (индекс FTS5, см. BbpCRUD.search_rows).
+        Предыдущий поиск, еще ожидающий в очереди, отменяется.
+
+        Args:
+            query (str): Поисковая строка.
+            limit (int): Максимальное количество результатов (самые релевантные).
+
+        Returns:
+            Future: Записи со столбцами LIST_COLUMNS по возрастанию id.
+        """
+        def search(crud):
+            rows = crud.search_rows(query, LIST_COLUMNS, limit)
+            return sorted((row._asdict() for row in rows), key=lambda record: record["id"])
+
+        with self._lock:
+            if self._search_future is not None:
+                self._search_future.cancel()
+            future = self._search_future = self.submit(search)
+        return future
+
+    def load(self, on_page: PageCallback, on_error: Callable[[BaseException], None] = None) -> bool:
+        """
+        Загружает все записи страницами и передает их в on_page(records, first, exhausted)
+        из фонового потока: первая страница приходит быстро, остальные следом. Между
+        страницами выполняются другие операции (create, delete), поставленные в очередь.
+
+        Повторные вызовы во время загрузки объединяются: текущая загрузка начинается
+        заново один раз, сколько бы вызовов ни пришло.
+
+        Args:
+            on_page (PageCallback): Получатель страниц.
+            on_error (Callable[[BaseException], None]): Вызывается при ошибке чтения.
+
+        Returns:
+            bool: True, если начата новая загрузка (False - объединена с текущей).
+        """
+        with self._lock:
+            if self._loading:
+                self._reload_requested = True
+                return False
+            self._loading = True
+            self.loads_started += 1
+        self._executor.submit(self._load_page, on_page, on_error, None)
+        return True
+
+    def _load_page(self, on_page: PageCallback, on_error, after_id: Optional[int]) -> None:
+        first = after_id is None
+        size = self.first_page_size if first else self.page_size
+        try:
+            rows = self._get_crud().read_rows(LIST_COLUMNS, after_id, size)
+            exhausted = len(rows) < size
+            on_page([row._asdict() for row in rows], first, exhausted)
+        except BaseException as e:
+            logger.exception("Failed to load records")
+            with self._lock:
+                self._loading = self._reload_requested = False
+            if on_error is not None:
+                on_error(e)
+            return
+
+        with self._lock:
+            if self._reload_requested:
+                # Данные могли измениться: продолжать устаревшую загрузку нет смысла
+                self._reload_requested = False
+                self.loads_started += 1
+                after_id = None
+            elif exhausted:
+                self._loading = False
+                return
+            else:
+                after_id = rows[-1].id
+        self._executor.submit(self._load_page, on_page, on_error, after_id)
+
+    def close(self) -> None:
+        """
+        Отменяет операции в очереди; текущая операция завершается в фоне.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _default_crud():
+    from src.core.Services import services
+
+    return services.crud
+
+
+def _default_master_key():
+    from src.core.Services import services
+
+    return services.master_key
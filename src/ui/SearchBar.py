@@ -0,0 +1,67 @@
+import threading
+from typing import Callable
+
+import flet as ft
+
+DEBOUNCE_SECONDS = 0.15  # Поиск запускается после паузы в наборе, а не на каждую клавишу
+
+
+class SearchBar:
+    """
+    Поле поиска с задержкой: on_search(query) вызывается из фонового таймера через
+    delay секунд после последнего изменения текста; каждое новое изменение отменяет
+    ожидающий вызов. Очистка поля передает пустую строку сразу.
+    """
+
+    def __init__(self, on_search: Callable[[str], None], delay: float = DEBOUNCE_SECONDS, width: int = 550):
+        """
+        Args:
+            on_search (Callable[[str], None]): Получает запрос без пробелов по краям.
+            delay (float): Задержка в секундах.
+            width (int): Ширина поля.
+        """
+        self.on_search = on_search
+        self.delay = delay
+        self._timer = None
+        self._lock = threading.Lock()
+        self.query = ""  # Последний переданный в on_search запрос
+        self.control = ft.TextField(
+            label="Поиск по логину и заметке",
+            prefix_icon=ft.Icons.SEARCH,
+            on_change=lambda e: self.schedule(e.control.value),
+            width=width,
+            border_color="#7C4DFF"
+        )
+
+    def schedule(self, value: str) -> None:
+        """
+        Откладывает поиск по value; пустой запрос выполняется без задержки.
+        """
+        query = (value or "").strip()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if query:
+                self._timer = threading.Timer(self.delay, self._fire, (query,))
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        self._fire(query)
+
+    def _fire(self, query: str) -> None:
+        with self._lock:
+            self._timer = None
+            if query == self.query:
+                return  # Текст изменился и вернулся к уже найденному
+            self.query = query
+        self.on_search(query)
+
+    def cancel(self) -> None:
+        """
+        Отменяет ожидающий поиск.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
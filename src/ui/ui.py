@@ -1,10 +1,29 @@
+import itertools
+
 import flet as ft
 
+from src.database.Breach import BreachedPasswordError
+from src.ui.PasswordList import CARD_HEIGHT, PasswordList
+from src.ui.RecordStore import RecordStore
+from src.ui.SearchBar import SearchBar
+
+# id несохраненных записей: больше любого id из базы, поэтому они в конце списка
+PENDING_ID_BASE = 2 ** 62
+PASSWORD_MASK = "●" * 8  # Пароли для списка не расшифровываются, длина не раскрывается
+EMPTY_TEXT = "У вас пока нет сохраненных паролей."
+NOT_FOUND_TEXT = "Ничего не найдено."
+
 
 class PasswordManager:
-    def __init__(self, page: ft.Page):
+    def __init__(self, page: ft.Page, store: RecordStore = None):
         self.page = page
-        self.saved_passwords = []
+        self.store = store or RecordStore()  # База данных в фоновом потоке
+        self.password_list = None  # Создается при первом переходе к списку
+        self.search_bar = SearchBar(self._on_search)
+        self._search_generation = 0  # Результаты устаревших запросов отбрасываются
+        self._vault_initialized = None  # Задан ли мастер-пароль (узнается в фоне)
+        self._pending = {}  # id -> записи, которые еще сохраняются
+        self._pending_ids = itertools.count(PENDING_ID_BASE)
         self._init_page()
         self._create_ui_elements()
         self._show_login()
@@ -35,6 +54,7 @@ class PasswordManager:
             ft.PopupMenuButton(
                 icon=ft.icons.MORE_VERT,
                 items=[
+                    ft.PopupMenuItem(text="Проверить утечки", on_click=lambda e: self._audit_breaches()),
                     ft.PopupMenuItem(text="Настройки", on_click=self._show_temp_message),
                     ft.PopupMenuItem(text="Создатели", on_click=self._show_temp_message),
                 ],
@@ -64,26 +84,58 @@ class PasswordManager:
             width=300,
             border_color="#7C4DFF"
         )
+        confirm_input = ft.TextField(
+            label="Повторите пароль",
+            password=True,
+            width=300,
+            border_color="#7C4DFF",
+            visible=False
+        )
         login_button = ft.ElevatedButton(
             "Войти",
-            on_click=lambda e: self._check_password(password_input.value),
+            on_click=lambda e: self._check_password(password_input.value, confirm_input.value),
             color=ft.colors.WHITE,
             bgcolor="#7C4DFF",
             width=150
         )
         login_content = ft.Column(
-            [password_input, login_button],
+            [password_input, confirm_input, login_button],
             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
             spacing=20,
             alignment=ft.MainAxisAlignment.CENTER
         )
         self._navigate(login_content)
 
-    def _check_password(self, password):
-        if password == "1111":
-            self._navigate_to_welcome()
-        else:
-            self._show_snackbar("Неверный пароль!", ft.colors.RED)
+        def vault_state(future):
+            if future.exception() is not None:
+                self._show_snackbar(f"Не удалось открыть хранилище: {future.exception()}", ft.colors.RED)
+                return
+            self._vault_initialized = future.result()
+            if not self._vault_initialized:  # Первый запуск: мастер-пароль задается здесь
+                password_input.label = "Придумайте мастер-пароль"
+                confirm_input.visible = True
+                login_button.text = "Создать"
+                self.page.update()
+        self.store.vault_initialized().add_done_callback(vault_state)
+
+    def _check_password(self, password, confirmation=None):
+        if not password:
+            self._show_snackbar("Введите пароль", ft.colors.RED)
+            return
+        setup = self._vault_initialized is False
+        if setup and password != confirmation:
+            self._show_snackbar("Пароли не совпадают", ft.colors.RED)
+            return
+
+        def unlocked(future):
+            if future.exception() is not None:
+                self._show_snackbar(f"Не удалось открыть хранилище: {future.exception()}", ft.colors.RED)
+            elif future.result():
+                self._vault_initialized = True
+                self._navigate_to_welcome()
+            else:
+                self._show_snackbar("Неверный пароль!", ft.colors.RED)
+        self.store.unlock(password, setup).add_done_callback(unlocked)
 
     def _navigate_to_welcome(self):
         welcome_content = ft.Column(
@@ -156,62 +208,110 @@ class PasswordManager:
             self._show_snackbar("Логин и пароль обязательны!", ft.colors.RED)
             return
 
-        record = {
-            "login": fields["Логин"].value,
-            "password": fields["Пароль"].value,
-            "note": fields["Заметка"].value or ""
-        }
+        login, password, notes = fields["Логин"].value, fields["Пароль"].value, fields["Заметка"].value or ""
+        # Запись сразу появляется в списке, сохранение идет в фоне
+        pending = {"id": next(self._pending_ids), "login": login, "notes": notes, "pending": True}
+        self._pending[pending["id"]] = pending
+        self._get_password_list().insert(pending)
+        self.store.create(login, password, notes).add_done_callback(
+            lambda future: self._on_saved(pending["id"], future))
+        self._navigate_to_passwords(refresh=False)
 
-        # encrypted_record = self.core.encrypt_data(record)
-        self.saved_passwords.append(record)
-        # self._save_to_file(encrypted_record)
+    def _on_saved(self, pending_id, future):
+        self._pending.pop(pending_id, None)
+        self.password_list.remove(pending_id)
+        if isinstance(future.exception(), BreachedPasswordError):
+            self._show_snackbar("Этот пароль найден в утечках, выберите другой", ft.colors.RED)
+            return
+        if future.exception() is not None:
+            self._show_snackbar(f"Не удалось сохранить запись: {future.exception()}", ft.colors.RED)
+            return
+        self.password_list.insert(future.result())
         self._show_snackbar("Запись успешно сохранена!")
-        self._navigate_to_passwords()
 
-    def _navigate_to_passwords(self):
-        content = ft.ListView(
-            controls=[
+    def _get_password_list(self):
+        if self.password_list is None:
+            self.password_list = PasswordList(None, self._create_password_card, empty_text=EMPTY_TEXT)
+            self._refresh()
+        return self.password_list
+
+    def _refresh(self):
+        if self.search_bar.query:
+            self._on_search(self.search_bar.query)
+        else:
+            self.store.load(self._on_page, self._on_load_error)
+
+    def _on_search(self, query):
+        self._search_generation += 1
+        generation = self._search_generation
+        if not query:
+            # Частые очистки поля объединяются в одну загрузку списка
+            self.password_list.empty_text = EMPTY_TEXT
+            self.store.load(self._on_page, self._on_load_error)
+            return
+        self.store.search(query).add_done_callback(
+            lambda future: self._on_search_results(generation, future))
+
+    def _on_search_results(self, generation, future):
+        if generation != self._search_generation or future.cancelled():
+            return  # Пользователь уже ввел другой запрос
+        if future.exception() is not None:
+            self._show_snackbar(f"Ошибка поиска: {future.exception()}", ft.colors.RED)
+            return
+        self.password_list.empty_text = NOT_FOUND_TEXT
+        self.password_list.set_records(future.result(), exhausted=True)
+
+    def _on_page(self, records, first, exhausted):
+        if self.search_bar.query:
+            return  # Во время поиска список показывает результаты, а не все записи
+        if first:
+            self.password_list.set_records(records, exhausted)
+            for record in list(self._pending.values()):  # Перезагрузка не теряет несохраненные записи
+                self.password_list.insert(record)
+        else:
+            self.password_list.extend(records, exhausted)
+
+    def _on_load_error(self, error):
+        self._show_snackbar(f"Не удалось загрузить записи: {error}", ft.colors.RED)
+
+    def _navigate_to_passwords(self, refresh=True):
+        if self.password_list is None:
+            self._get_password_list()
+        elif refresh:
+            # Частые переходы объединяются в одну перезагрузку
+            self._refresh()
+        content = ft.Column(
+            [
                 ft.Text("Сохраненные пароли",
                         size=20,
                         color="white",
-                        text_align=ft.TextAlign.CENTER)
+                        text_align=ft.TextAlign.CENTER),
+                self.search_bar.control,
+                self.password_list.control
             ],
             spacing=15,
-            width=600,
-            height=400,
-            auto_scroll=True
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            width=600
         )
-
-        if not self.saved_passwords:
-            content.controls.append(
-                ft.Text("У вас пока нет сохраненных паролей.",
-                        size=16,
-                        color="white",
-                        text_align=ft.TextAlign.CENTER)
-            )
-        else:
-            content.controls.extend(
-                self._create_password_card(record, index)
-                for index, record in enumerate(self.saved_passwords)
-            )
-
         self._navigate(content)
 
-    def _create_password_card(self, record, index):
+    def _create_password_card(self, record):
         return ft.Container(
             content=ft.Column([
                 self._create_row("Логин", record['login'], True),
-                self._create_row("Пароль", '●' * len(record['password']), True),
-                self._create_note_row(record, index)
+                self._create_row("Пароль", PASSWORD_MASK, not record.get("pending"),
+                                 on_copy=lambda record_id=record['id']: self._copy_password(record_id)),
+                self._create_note_row(record)
             ], spacing=12),
             padding=15,
             border_radius=10,
             bgcolor="#333333",
             margin=ft.margin.symmetric(vertical=5),
+            height=CARD_HEIGHT - 10,
             width=550
         )
 
-    def _create_row(self, label, value, copyable=False):
+    def _create_row(self, label, value, copyable=False, on_copy=None):
         return ft.Row(
             [
                 ft.Text(
@@ -225,18 +325,18 @@ class PasswordManager:
                     color="white",
                     expand=True),
                 ft.Container(
-                    self._create_copy_button(value) if copyable else ft.Container(),
+                    self._create_copy_button(value, on_copy) if copyable else ft.Container(),
                     alignment=ft.alignment.center_right,
                     expand=True)],
             alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
             vertical_alignment=ft.CrossAxisAlignment.CENTER,
             width=500)
 
-    def _create_note_row(self, record, index):
+    def _create_note_row(self, record):
         return ft.Row(
             [
                 ft.Text("Заметка:", size=16, color="white", width=80),
-                ft.Text(record['note'] or "-",
+                ft.Text(record['notes'] or "-",
                         size=16,
                         color="white",
                         expand=True,
@@ -244,9 +344,10 @@ class PasswordManager:
                 ft.Container(
                     ft.IconButton(
                         icon=ft.icons.DELETE_FOREVER,
-                        on_click=lambda e, idx=index: self._delete_record(idx),
+                        on_click=lambda e, record_id=record['id']: self._delete_record(record_id),
                         tooltip="Удалить запись",
-                        icon_color=ft.colors.RED
+                        icon_color=ft.colors.RED,
+                        disabled=bool(record.get("pending"))
                     ),
                     alignment=ft.alignment.center_right,
                     expand=True
@@ -257,11 +358,11 @@ class PasswordManager:
             width=500
         )
 
-    def _create_copy_button(self, value):
+    def _create_copy_button(self, value, on_copy=None):
         return ft.IconButton(
             icon=ft.icons.CONTENT_COPY,
-            on_click=lambda e: self._copy_to_clipboard(value),
-            tooltip=f"Копировать {value}",
+            on_click=lambda e: on_copy() if on_copy else self._copy_to_clipboard(value),
+            tooltip="Копировать пароль" if on_copy else f"Копировать {value}",
             icon_color=ft.colors.WHITE,
             bgcolor="#7C4DFF",
             style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=5))
@@ -271,13 +372,43 @@ class PasswordManager:
         self.page.set_clipboard(value)
         self._show_snackbar(f"Скопировано: {value.split(': ')[0]}")
 
-    def _delete_record(self, index):
-        del self.saved_passwords[index]
-        self._navigate_to_passwords()
+    def _copy_password(self, record_id):
+        def copied(future):
+            if future.exception() is not None or future.result() is None:
+                self._show_snackbar("Не удалось получить пароль", ft.colors.RED)
+            else:
+                self.page.set_clipboard(future.result())
+                self._show_snackbar("Пароль скопирован")
+        self.store.read_password(record_id).add_done_callback(copied)
+
+    def _audit_breaches(self):
+        def audited(future):
+            if future.exception() is not None:
+                self._show_snackbar(f"Не удалось проверить пароли: {future.exception()}", ft.colors.RED)
+            elif future.result() is None:
+                self._show_snackbar("Индекс утечек не настроен (BREACH_INDEX_PATH)", ft.colors.ORANGE)
+            elif not future.result():
+                self._show_snackbar("Пароли из утечек не найдены")
+            else:
+                logins = ", ".join(record.login for record in future.result()[:5])
+                self._show_snackbar(f"Найдено в утечках: {len(future.result())} ({logins})", ft.colors.RED)
+        self.store.audit_breaches().add_done_callback(audited)
+
+    def _delete_record(self, record_id):
+        # Карточка исчезает сразу; при ошибке удаления запись возвращается в список
+        record = self.password_list.remove(record_id)
+
+        def deleted(future):
+            if future.exception() is not None:
+                if record is not None:
+                    self.password_list.insert(record)
+                self._show_snackbar(f"Не удалось удалить запись: {future.exception()}", ft.colors.RED)
+        self.store.delete(record_id).add_done_callback(deleted)
 
 
 def main(page: ft.Page):
     PasswordManager(page)
 
 
-ft.app(target=main)
+if __name__ == "__main__":
+    ft.app(target=main)
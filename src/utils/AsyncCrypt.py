@@ -0,0 +1,174 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.Crypt import FileEncryptor
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class AsyncFileEncryptor:
+    """asyncio front-end for FileEncryptor.
+
+    PBKDF2 and the ciphers release the GIL, so they run on a bounded thread pool
+    while the event loop keeps serving other requests. At most max_concurrency
+    jobs run at once, the others wait for a free slot.
+    """
+
+    def __init__(self, password: str = None, max_concurrency: int = 4, queue_size: int = 4,
+                 executor: ThreadPoolExecutor = None, **options):
+        """
+        Args:
+            password: default password, as for FileEncryptor.
+            max_concurrency: number of jobs allowed to run at the same time. A custom
+                executor must have at least that many threads.
+            queue_size: chunks buffered in each direction of a stream before the
+                faster side is paused.
+            options: passed to FileEncryptor (format_version, segment_size, buffer_size, use_mmap).
+        """
+        self.encryptor = FileEncryptor(password, **options)
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self._executor = executor or ThreadPoolExecutor(max_concurrency, thread_name_prefix="AsyncFileEncryptor")
+        self._owns_executor = executor is None
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self) -> None:
+        if self._owns_executor:
+            await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def _run(self, function, *args):
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def start_session(self, password: str = None) -> None:
+        await self._run(self.encryptor.start_session, password)
+
+    def end_session(self) -> None:
+        self.encryptor.end_session()
+
+    async def encrypt_file(self, in_filename: str, out_filename: str, password: str = None) -> bool:
+        return await self._run(self.encryptor.encrypt_file, in_filename, out_filename, password)
+
+    async def decrypt_file(self, in_filename: str, out_filename: str, password: str = None) -> bool:
+        return await self._run(self.encryptor.decrypt_file, in_filename, out_filename, password)
+
+    async def decrypt_range(self, in_filename: str, offset: int, length: int, password: str = None) -> bytes:
+        return await self._run(self.encryptor.decrypt_range, in_filename, offset, length, password)
+
+    async def encrypt_bytes(self, data: bytes, password: str = None) -> bytes:
+        return await self._run(self.encryptor.encrypt_bytes, data, password)
+
+    async def decrypt_bytes(self, data: bytes, password: str = None) -> bytes:
+        return await self._run(self.encryptor.decrypt_bytes, data, password)
+
+    def encrypt_stream(self, source, password: str = None):
+        """Encrypt an async iterable of byte chunks, returns an async iterator of ciphertext chunks"""
+        return self._bridge(lambda chunks: self.encryptor.encrypt_stream(chunks, password), source)
+
+    def decrypt_stream(self, source, password: str = None):
+        """Decrypt an async iterable of byte chunks, returns an async iterator of plaintext chunks"""
+        return self._bridge(lambda chunks: self.encryptor.decrypt_stream(chunks, password), source)
+
+    async def encrypt_to_file(self, source, out_filename: str, password: str = None) -> int:
+        """Encrypt an async iterable (e.g. an upload body) straight into out_filename.
+
+        Returns the number of ciphertext bytes written, raises on error.
+        """
+        def write(chunks):
+            written = 0
+            with open(out_filename, 'wb') as fout:
+                for chunk in self.encryptor.encrypt_stream(chunks, password):
+                    written += fout.write(chunk)
+            yield written
+
+        results = self._bridge(write, source)
+        try:
+            return await results.__anext__()
+        finally:
+            await results.aclose()
+
+    def decrypt_from_file(self, in_filename: str, password: str = None):
+        """Async iterator over the plaintext of in_filename (e.g. for a download response)"""
+        def read(_):
+            with open(in_filename, 'rb') as fin:
+                yield from self.encryptor.decrypt_stream(fin, password)
+
+        return self._bridge(read)
+
+    async def _bridge(self, function, source=None):
+        """Run function(chunks) -> iterator of bytes on the executor.
+
+        Input comes from the async iterable source and output goes back through a
+        bounded queue, so a slow consumer pauses the worker and a slow producer
+        pauses the cipher; memory stays at about queue_size chunks each way.
+        """
+        loop = asyncio.get_running_loop()
+        inbox = asyncio.Queue(self.queue_size)
+        outbox = asyncio.Queue(self.queue_size)
+        stopped = threading.Event()
+
+        def call(coroutine):
+            return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+        def incoming():
+            while True:
+                chunk = call(inbox.get())
+                if chunk is _DONE:
+                    return
+                if isinstance(chunk, _Failure):
+                    raise chunk.error
+                yield chunk
+
+        def work():
+            try:
+                for chunk in function(incoming()):
+                    if stopped.is_set():
+                        return
+                    call(outbox.put(chunk))
+                call(outbox.put(_DONE))
+            except BaseException as e:
+                if not stopped.is_set():
+                    call(outbox.put(_Failure(e)))
+
+        async def feed():
+            try:
+                if source is not None:
+                    async for chunk in source:
+                        await inbox.put(chunk)
+                await inbox.put(_DONE)
+            except Exception as e:
+                await inbox.put(_Failure(e))
+
+        async with self._slots:
+            feeder = asyncio.create_task(feed())
+            worker = loop.run_in_executor(self._executor, work)
+            try:
+                while True:
+                    chunk = await outbox.get()
+                    if chunk is _DONE:
+                        break
+                    if isinstance(chunk, _Failure):
+                        raise chunk.error
+                    yield chunk
+            finally:
+                # Unblock the worker thread if the consumer stopped early
+                stopped.set()
+                feeder.cancel()
+                while not worker.done():
+                    while not outbox.empty():
+                        outbox.get_nowait()
+                    if not inbox.full():
+                        inbox.put_nowait(_DONE)
+                    await asyncio.wait({worker}, timeout=0.01)
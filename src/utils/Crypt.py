@@ -1,136 +1,1191 @@
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-import os
-
-class FileEncryptor:
-    SALT_SIZE = 8
-    BUFFER_SIZE = 4096
-    KEY_SIZE = 32
-    IV_SIZE = 16
-
-    def __init__(self, password: str = None):
-        self.password = password
-
-    def _derive_key_and_iv(self, password: str, salt: bytes) -> tuple[bytes, bytes]:
-        """Generate key and IV from password and salt using PBKDF2"""
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=self.KEY_SIZE + self.IV_SIZE,
-            salt=salt,
-            iterations=100000,
-        )
-        key_iv = kdf.derive(password.encode())
-        return key_iv[:self.KEY_SIZE], key_iv[self.KEY_SIZE:self.KEY_SIZE + self.IV_SIZE]
-
-    def encrypt_file(self, in_filename: str, out_filename: str, password: str = None) -> bool:
-        try:
-            use_password = password or self.password
-            if not use_password:
-                raise ValueError("Password not provided")
-
-            salt = os.urandom(self.SALT_SIZE)
-            key, iv = self._derive_key_and_iv(use_password, salt)
-
-            cipher = Cipher(algorithms.AES(key), modes.CBC(iv))
-            encryptor = cipher.encryptor()
-
-            with open(in_filename, 'rb') as fin, open(out_filename, 'wb') as fout:
-                fout.write(salt)
-
-                while True:
-                    chunk = fin.read(self.BUFFER_SIZE)
-                    if not chunk:
-                        break
-
-                    if len(chunk) % 16 != 0:
-                        padding_length = 16 - (len(chunk) % 16)
-                        chunk += bytes([padding_length]) * padding_length
-
-                    encrypted_chunk = encryptor.update(chunk)
-                    fout.write(encrypted_chunk)
-
-                fout.write(encryptor.finalize())
-
-            return True
-        except Exception as e:
-            print(f"Encryption error: {str(e)}")
-            return False
-
-    def decrypt_file(self, in_filename: str, out_filename: str, password: str = None) -> bool:
-        try:
-            use_password = password or self.password
-            if not use_password:
-                raise ValueError("Password not provided")
-
-            with open(in_filename, 'rb') as fin:
-                salt = fin.read(self.SALT_SIZE)
-                key, iv = self._derive_key_and_iv(use_password, salt)
-
-                cipher = Cipher(algorithms.AES(key), modes.CBC(iv))
-                decryptor = cipher.decryptor()
-
-                with open(out_filename, 'wb') as fout:
-                    while True:
-                        chunk = fin.read(self.BUFFER_SIZE)
-                        if not chunk:
-                            break
-
-                        decrypted_chunk = decryptor.update(chunk)
-
-                        if not chunk:
-                            decrypted_chunk = decryptor.finalize()
-                            if decrypted_chunk:
-                                padding_length = decrypted_chunk[-1]
-                                decrypted_chunk = decrypted_chunk[:-padding_length]
-
-                        fout.write(decrypted_chunk)
-
-                    final_chunk = decryptor.finalize()
-                    if final_chunk:
-                        padding_length = final_chunk[-1]
-                        final_chunk = final_chunk[:-padding_length]
-                        fout.write(final_chunk)
-
-            return True
-        except Exception as e:
-            print(f"Decryption error: {str(e)}")
-            return False
-
-def main():
-    import sys
-
-    if len(sys.argv) != 3:
-        print(f"Usage: {sys.argv[0]} <encrypt|decrypt> <filename>")
-        sys.exit(1)
-
-    mode = sys.argv[1]
-    filename = sys.argv[2]
-
-    encryptor = FileEncryptor()
-
-    if mode == "encrypt":
-        output_file = filename + ".encrypted"
-        password = input("Enter password for encryption: ")
-        if encryptor.encrypt_file(filename, output_file, password):
-            print(f"File encrypted successfully to {output_file}")
-        else:
-            print("Encryption failed.")
-            sys.exit(1)
-    elif mode == "decrypt":
-        if not filename.endswith(".encrypted"):
-            print("Error: File must have .encrypted extension")
-            sys.exit(1)
-        output_file = filename.replace(".encrypted", "")
-        password = input("Enter password for decryption: ")
-        if encryptor.decrypt_file(filename, output_file, password):
-            print(f"File decrypted successfully to {output_file}")
-        else:
-            print("Decryption failed.")
-            sys.exit(1)
-    else:
-        print("Invalid mode. Use 'encrypt' or 'decrypt'.")
-        sys.exit(1)
-
-if __name__ == "__main__":
-    main()
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives import hashes, padding
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from src.core.Metrics import metrics, THROUGHPUT_BUCKETS
+import hmac
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TreeReport:
+    """Summary of an encrypt_tree/decrypt_tree run"""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.errors = []
+        self.elapsed = 0.0
+        # Incremental runs only
+        self.skipped = 0  # unchanged files left as they are
+        self.hashed = 0  # files whose metadata was ambiguous and had to be hashed
+        self.removed = 0  # outputs removed because their input was deleted
+
+    @property
+    def throughput(self) -> float:
+        """Processed input bytes per second"""
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.elapsed if self.elapsed else 0.0
+
+    def add(self, path: str, size: int, error: str = None) -> None:
+        if error is None:
+            self.files += 1
+            self.bytes += size
+        else:
+            self.errors.append((path, error))
+
+    def __repr__(self):
+        return (f"TreeReport(files={self.files}, bytes={self.bytes}, errors={len(self.errors)}, "
+                f"skipped={self.skipped}, removed={self.removed}, "
+                f"elapsed={self.elapsed:.2f}s, throughput={self.throughput / 2 ** 20:.1f} MiB/s)")
+
+
+class _StreamReader:
+    """Reads exact amounts from a binary file-like object or an iterable of byte chunks"""
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = [source]
+        self._file_read = getattr(source, "read", None)
+        self._chunks = None if self._file_read else iter(source)
+        self._pending = bytearray()
+        self._eof = False
+
+    def read(self, size: int) -> bytes:
+        """Return size bytes, fewer only at the end of the stream"""
+        while len(self._pending) < size and not self._eof:
+            if self._file_read:
+                chunk = self._file_read(size - len(self._pending))
+                if not chunk:
+                    self._eof = True
+            else:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    self._eof = True
+            if chunk:
+                self._pending += chunk
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        return data
+
+    def unread(self, data: bytes) -> None:
+        self._pending[:0] = data
+
+
+class FileEncryptor:
+    SALT_SIZE = 8
+    BUFFER_SIZE = 1024 * 1024
+    KEY_SIZE = 32
+    IV_SIZE = 16
+    KDF_ITERATIONS = 100000
+
+    # Versioned header: MAGIC | version | master salt | file salt [| segment size].
+    # Files without the magic are treated as the legacy "salt + CBC" format.
+    MAGIC = b"KSEC"
+    FORMAT_CBC = 1
+    FORMAT_SEGMENTED = 2
+    FORMAT_VERSION = FORMAT_SEGMENTED
+    MASTER_SALT_SIZE = 16
+    FILE_SALT_SIZE = 16
+    HKDF_INFO = b"KrakenSecure file key v1"
+    ENCRYPTED_SUFFIX = ".encrypted"
+
+    # Incremental encrypt_tree: manifest of the inputs, kept next to the outputs
+    MANIFEST_NAME = ".manifest.json"
+    MANIFEST_VERSION = 1
+    MANIFEST_HKDF_INFO = b"KrakenSecure manifest key v1"
+    # A file modified this close to the moment it was recorded may change again
+    # without a visible mtime change (coarse timestamps), so its metadata isn't trusted
+    RACY_WINDOW_NS = 2 * 10 ** 9
+
+    # Segmented format: AES-GCM segments of SEGMENT_SIZE plaintext bytes, each
+    # followed by its tag, then an authenticated footer (plaintext size, segment count).
+    SEGMENT_SIZE = 64 * 1024
+    MAX_SEGMENT_SIZE = 64 * 1024 * 1024
+    SEGMENT_HKDF_INFO = b"KrakenSecure file key v2"
+    TAG_SIZE = 16
+    FOOTER_SIZE = 16 + TAG_SIZE
+
+    def __init__(self, password: str = None, format_version: int = None, segment_size: int = None,
+                 buffer_size: int = None, use_mmap: bool = False):
+        self.password = password
+        self.format_version = format_version or self.FORMAT_VERSION
+        self.segment_size = segment_size or self.SEGMENT_SIZE
+        # Size of the reusable I/O buffers; use_mmap feeds the cipher straight from the page cache
+        self.buffer_size = buffer_size or self.BUFFER_SIZE
+        self.use_mmap = use_mmap
+        if not 0 < self.segment_size <= self.MAX_SEGMENT_SIZE:
+            raise ValueError(f"Segment size must be between 1 and {self.MAX_SEGMENT_SIZE}")
+        self._session_password = None
+        self._session_salt = None
+        self._master_keys = {}
+
+    @property
+    def in_session(self) -> bool:
+        return self._session_salt is not None
+
+    def start_session(self, password: str = None, salt: bytes = None) -> None:
+        """Stretch the password once and reuse the master key for every following file.
+
+        salt reuses the master salt of an earlier session (new random salt by default).
+        """
+        use_password = password or self.password
+        if not use_password:
+            raise ValueError("Password not provided")
+
+        self.end_session()
+        salt = salt or os.urandom(self.MASTER_SALT_SIZE)
+        self._master_keys[salt] = self._derive_master_key(use_password, salt)
+        self._session_password = use_password
+        self._session_salt = salt
+
+    def end_session(self) -> None:
+        """Forget the cached master keys"""
+        self._session_password = None
+        self._session_salt = None
+        self._master_keys.clear()
+
+    def _derive_key_and_iv(self, password: str, salt: bytes) -> tuple[bytes, bytes]:
+        """Generate key and IV from password and salt using PBKDF2 (legacy format)"""
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=self.KEY_SIZE + self.IV_SIZE,
+            salt=salt,
+            iterations=self.KDF_ITERATIONS,
+        )
+        with metrics.timer("crypt_kdf_seconds", format="legacy"):
+            key_iv = kdf.derive(password.encode())
+        return key_iv[:self.KEY_SIZE], key_iv[self.KEY_SIZE:self.KEY_SIZE + self.IV_SIZE]
+
+    def _derive_master_key(self, password: str, salt: bytes) -> bytes:
+        """Stretch the password into a master key using PBKDF2"""
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=self.KEY_SIZE,
+            salt=salt,
+            iterations=self.KDF_ITERATIONS,
+        )
+        with metrics.timer("crypt_kdf_seconds", format="master"):
+            return kdf.derive(password.encode())
+
+    def _master_key_for(self, password: str, salt: bytes) -> bytes:
+        """Return the master key for salt, reusing the session cache when possible"""
+        if password != self._session_password:
+            return self._derive_master_key(password, salt)
+
+        master_key = self._master_keys.get(salt)
+        if master_key is None:
+            # File from another session, remember it for the rest of this one
+            master_key = self._derive_master_key(password, salt)
+            self._master_keys[salt] = master_key
+        return master_key
+
+    def _derive_file_key_and_iv(self, master_key: bytes, file_salt: bytes) -> tuple[bytes, bytes]:
+        """Cheap per-file key and IV from the master key using HKDF"""
+        hkdf = HKDF(
+            algorithm=hashes.SHA256(),
+            length=self.KEY_SIZE + self.IV_SIZE,
+            salt=file_salt,
+            info=self.HKDF_INFO,
+        )
+        key_iv = hkdf.derive(master_key)
+        return key_iv[:self.KEY_SIZE], key_iv[self.KEY_SIZE:]
+
+    def _derive_segment_key(self, master_key: bytes, file_salt: bytes) -> bytes:
+        """Per-file AES-GCM key for the segmented format using HKDF"""
+        hkdf = HKDF(
+            algorithm=hashes.SHA256(),
+            length=self.KEY_SIZE,
+            salt=file_salt,
+            info=self.SEGMENT_HKDF_INFO,
+        )
+        return hkdf.derive(master_key)
+
+    def _new_header(self, password: str, format_version: int = None) -> tuple[bytes, bytes, bytes]:
+        """Build a file header and return it together with the master key and file salt"""
+        format_version = format_version or self.format_version
+        if self.in_session and password == self._session_password:
+            master_salt = self._session_salt
+        else:
+            master_salt = os.urandom(self.MASTER_SALT_SIZE)
+        file_salt = os.urandom(self.FILE_SALT_SIZE)
+
+        master_key = self._master_key_for(password, master_salt)
+        header = self.MAGIC + bytes([format_version]) + master_salt + file_salt
+        if format_version == self.FORMAT_SEGMENTED:
+            header += struct.pack(">I", self.segment_size)
+        return header, master_key, file_salt
+
+    def _read_header(self, fin, password: str):
+        """Parse a versioned header.
+
+        Returns (version, header bytes, master key, file salt, segment size) or None for legacy files.
+        """
+        prefix = fin.read(len(self.MAGIC) + 1)
+        if len(prefix) < len(self.MAGIC) + 1 or not prefix.startswith(self.MAGIC):
+            if isinstance(fin, _StreamReader):
+                fin.unread(prefix)
+            else:
+                fin.seek(0)
+            return None
+
+        version = prefix[-1]
+        if version not in (self.FORMAT_CBC, self.FORMAT_SEGMENTED):
+            raise ValueError(f"Unsupported file format version: {version}")
+
+        master_salt = fin.read(self.MASTER_SALT_SIZE)
+        file_salt = fin.read(self.FILE_SALT_SIZE)
+        if len(master_salt) != self.MASTER_SALT_SIZE or len(file_salt) != self.FILE_SALT_SIZE:
+            raise ValueError("Truncated file header")
+        header = prefix + master_salt + file_salt
+
+        segment_size = None
+        if version == self.FORMAT_SEGMENTED:
+            raw_size = fin.read(4)
+            if len(raw_size) != 4:
+                raise ValueError("Truncated file header")
+            segment_size, = struct.unpack(">I", raw_size)
+            if not 0 < segment_size <= self.MAX_SEGMENT_SIZE:
+                raise ValueError(f"Invalid segment size: {segment_size}")
+            header += raw_size
+
+        master_key = self._master_key_for(password, master_salt)
+        return version, header, master_key, file_salt, segment_size
+
+    def encrypt_file(self, in_filename: str, out_filename: str, password: str = None,
+                     workers: int = None) -> bool:
+        start = time.perf_counter()
+        try:
+            self._encrypt_file(in_filename, out_filename, password, workers)
+        except Exception as e:
+            logger.error("Encryption error: %s", e)
+            metrics.inc("crypt_errors_total", operation="encrypt")
+            return False
+        _record_transfer("encrypt", in_filename, start)
+        return True
+
+    def decrypt_file(self, in_filename: str, out_filename: str, password: str = None,
+                     workers: int = None) -> bool:
+        start = time.perf_counter()
+        try:
+            self._decrypt_file(in_filename, out_filename, password, workers)
+        except Exception as e:
+            logger.error("Decryption error: %s", e)
+            metrics.inc("crypt_errors_total", operation="decrypt")
+            return False
+        _record_transfer("decrypt", in_filename, start)
+        return True
+
+    def decrypt_range(self, in_filename: str, offset: int, length: int, password: str = None) -> bytes:
+        """Decrypt length plaintext bytes starting at offset, touching only the segments involved.
+
+        Only works for files in the segmented format, raises ValueError otherwise.
+        """
+        use_password = self._use_password(password)
+        if offset < 0 or length < 0:
+            raise ValueError("Offset and length must be non-negative")
+
+        with open(in_filename, 'rb') as fin:
+            parsed = self._read_header(fin, use_password)
+            if parsed is None or parsed[0] != self.FORMAT_SEGMENTED:
+                raise ValueError("Range decryption needs the segmented file format")
+            _, header, master_key, file_salt, segment_size = parsed
+
+            aead = AESGCM(self._derive_segment_key(master_key, file_salt))
+            plaintext_size, segment_count = self._read_footer(fin, aead, header, segment_size)
+
+            end = min(offset + length, plaintext_size)
+            if offset >= end:
+                return b""
+
+            first, last = offset // segment_size, (end - 1) // segment_size
+            fin.seek(len(header) + first * (segment_size + self.TAG_SIZE))
+            result = bytearray()
+            for index in range(first, last + 1):
+                result += self._decrypt_segment(aead, header, fin, index, segment_count,
+                                                segment_size, plaintext_size)
+
+            start = offset - first * segment_size
+            return bytes(result[start:start + end - offset])
+
+    def encrypt_bytes(self, data: bytes, password: str = None) -> bytes:
+        """Encrypt data in memory into the segmented format, raises on error"""
+        return b"".join(self.encrypt_stream(data, password))
+
+    def decrypt_bytes(self, data: bytes, password: str = None) -> bytes:
+        """Decrypt data produced by encrypt_bytes/encrypt_file, raises on error"""
+        return b"".join(self.decrypt_stream(data, password))
+
+    def encrypt_stream(self, source, password: str = None):
+        """Encrypt a binary file-like object or an iterable of byte chunks.
+
+        Yields the segmented format incrementally, so only one segment is kept
+        in memory. The source is never seeked, pipes and sockets work.
+        """
+        use_password = self._use_password(password)
+        header, master_key, file_salt = self._new_header(use_password, self.FORMAT_SEGMENTED)
+        key = self._derive_segment_key(master_key, file_salt)
+        algorithm = algorithms.AES(key)
+        segment_size = self.segment_size
+        reader = _StreamReader(source)
+        out = memoryview(bytearray(segment_size + self.TAG_SIZE + 15))
+
+        yield header
+        index = 0
+        plaintext_size = 0
+        chunk = reader.read(segment_size)
+        while True:
+            # Read ahead one segment to know which one is the last
+            next_chunk = reader.read(segment_size) if len(chunk) == segment_size else b""
+            last = not next_chunk
+            yield bytes(out[:self._seal_segment(algorithm, header, index, last, chunk, out)])
+            plaintext_size += len(chunk)
+            index += 1
+            if last:
+                break
+            chunk = next_chunk
+
+        yield self._footer(AESGCM(key), header, plaintext_size, index)
+
+    def decrypt_stream(self, source, password: str = None):
+        """Decrypt a binary file-like object or an iterable of byte chunks, yielding plaintext.
+
+        Every format is accepted. Segmented data is authenticated segment by
+        segment before it is yielded; tampering or truncation raises ValueError.
+        """
+        use_password = self._use_password(password)
+        reader = _StreamReader(source)
+        parsed = self._read_header(reader, use_password)
+
+        if parsed is None:
+            salt = reader.read(self.SALT_SIZE)
+            yield from self._decrypt_cbc_stream(reader, *self._derive_key_and_iv(use_password, salt),
+                                                unpad=False)
+        elif parsed[0] == self.FORMAT_CBC:
+            _, _, master_key, file_salt, _ = parsed
+            yield from self._decrypt_cbc_stream(reader, *self._derive_file_key_and_iv(master_key, file_salt),
+                                                unpad=True)
+        else:
+            _, header, master_key, file_salt, segment_size = parsed
+            yield from self._decrypt_segment_stream(reader, header, master_key, file_salt, segment_size)
+
+    def _decrypt_segment_stream(self, reader, header: bytes, master_key: bytes, file_salt: bytes,
+                                segment_size: int):
+        key = self._derive_segment_key(master_key, file_salt)
+        algorithm = algorithms.AES(key)
+        record_size = segment_size + self.TAG_SIZE
+        out = memoryview(bytearray(segment_size + 15))
+
+        index = 0
+        plaintext_size = 0
+        # Keep one record + footer buffered: a record is known not to be the last
+        # one only once more data shows up behind it
+        pending = reader.read(record_size + self.FOOTER_SIZE)
+        while True:
+            more = reader.read(record_size)
+            if not more:
+                break
+            size = self._open_segment(algorithm, header, index, False, pending[:record_size], out)
+            yield bytes(out[:size])
+            plaintext_size += size
+            index += 1
+            pending = pending[record_size:] + more
+
+        if len(pending) < self.TAG_SIZE + self.FOOTER_SIZE:
+            raise ValueError("Truncated file")
+        size = self._open_segment(algorithm, header, index, True, pending[:-self.FOOTER_SIZE], out)
+        plaintext_size += size
+        index += 1
+        footer = self._parse_footer(AESGCM(key), header, pending[-self.FOOTER_SIZE:])
+        if footer != (plaintext_size, index):
+            raise ValueError("Stream does not match its index footer")
+        yield bytes(out[:size])
+
+    def _decrypt_cbc_stream(self, reader, key: bytes, iv: bytes, unpad: bool):
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+        block = algorithms.AES.block_size // 8
+        chunk_size = self._block_chunk_size()
+        out = memoryview(bytearray(chunk_size + block))
+
+        held = b""
+        while True:
+            chunk = reader.read(chunk_size)
+            if not chunk:
+                break
+            size = decryptor.update_into(chunk, out)
+            if not unpad:
+                yield bytes(out[:size])
+            elif size:
+                yield held + bytes(out[:size - block])
+                held = bytes(out[size - block:size])
+
+        decryptor.finalize()
+        if unpad:
+            unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
+            yield unpadder.update(held) + unpadder.finalize()
+
+    def _use_password(self, password: str = None) -> str:
+        use_password = password or self.password
+        if not use_password:
+            raise ValueError("Password not provided")
+        return use_password
+
+    def _clone(self, password: str) -> "FileEncryptor":
+        """Fresh encryptor for another password with the same format and I/O settings"""
+        return FileEncryptor(password, format_version=self.format_version, segment_size=self.segment_size,
+                             buffer_size=self.buffer_size, use_mmap=self.use_mmap)
+
+    def _encrypt_file(self, in_filename: str, out_filename: str, password: str = None,
+                      workers: int = None) -> None:
+        use_password = self._use_password(password)
+        header, master_key, file_salt = self._new_header(use_password)
+
+        if self.format_version == self.FORMAT_CBC:
+            key, iv = self._derive_file_key_and_iv(master_key, file_salt)
+            with open(in_filename, 'rb') as fin, open(out_filename, 'wb') as fout:
+                fout.write(header)
+                self._encrypt_v1(fin, fout, key, iv)
+            return
+
+        key = self._derive_segment_key(master_key, file_salt)
+        plaintext_size = os.path.getsize(in_filename)
+        segment_count = self._segment_count(plaintext_size, self.segment_size)
+        if workers is not None and workers > 1 and segment_count > 1:
+            self._crypt_segments_parallel("encrypt", in_filename, out_filename, key, header,
+                                          self.segment_size, plaintext_size, segment_count, workers)
+            return
+
+        with open(in_filename, 'rb') as fin, open(out_filename, 'wb') as fout:
+            fout.write(header)
+            self._encrypt_segments(fin, fout, key, header, self.segment_size, plaintext_size)
+
+    def _decrypt_file(self, in_filename: str, out_filename: str, password: str = None,
+                      workers: int = None) -> None:
+        use_password = self._use_password(password)
+
+        with open(in_filename, 'rb') as fin:
+            parsed = self._read_header(fin, use_password)
+
+            if parsed is not None and parsed[0] == self.FORMAT_SEGMENTED:
+                _, header, master_key, file_salt, segment_size = parsed
+                key = self._derive_segment_key(master_key, file_salt)
+                aead = AESGCM(key)
+                plaintext_size, segment_count = self._read_footer(fin, aead, header, segment_size)
+
+                if workers is not None and workers > 1 and segment_count > 1:
+                    fin.close()
+                    self._crypt_segments_parallel("decrypt", in_filename, out_filename, key, header,
+                                                  segment_size, plaintext_size, segment_count, workers)
+                    return
+
+                fin.seek(len(header))
+                with open(out_filename, 'wb') as fout:
+                    self._decrypt_segments(fin, fout, key, header, segment_size,
+                                           plaintext_size, segment_count)
+                return
+
+            with open(out_filename, 'wb') as fout:
+                if parsed is None:
+                    self._decrypt_legacy(fin, fout, use_password)
+                else:
+                    _, _, master_key, file_salt, _ = parsed
+                    self._decrypt_v1(fin, fout, *self._derive_file_key_and_iv(master_key, file_salt))
+
+    def encrypt_tree(self, in_dir: str, out_dir: str, password: str = None, workers: int = None,
+                     incremental: bool = False) -> TreeReport:
+        """Encrypt every file under in_dir into out_dir using a process pool.
+
+        incremental only encrypts files that changed since the previous incremental run
+        into the same out_dir (see _encrypt_tree_incremental).
+        """
+        use_password = self._use_password(password)
+        if incremental:
+            return self._encrypt_tree_incremental(in_dir, out_dir, use_password, workers)
+        encryptor = self
+        if not (self.in_session and use_password == self._session_password):
+            # One KDF for the whole tree, the workers only run HKDF per file
+            encryptor = self._clone(use_password)
+            encryptor.start_session()
+
+        jobs = [(path, os.path.join(out_dir, rel + self.ENCRYPTED_SUFFIX), size)
+                for path, rel, size in self._walk_tree(in_dir)]
+        return encryptor._run_tree("encrypt", jobs, use_password, workers)
+
+    def decrypt_tree(self, in_dir: str, out_dir: str, password: str = None, workers: int = None) -> TreeReport:
+        """Decrypt every *.encrypted file under in_dir into out_dir using a process pool"""
+        use_password = self._use_password(password)
+        encryptor = self
+        if use_password != self._session_password:
+            encryptor = self._clone(use_password)
+            encryptor._session_password = use_password
+
+        jobs = [(path, os.path.join(out_dir, rel[:-len(self.ENCRYPTED_SUFFIX)]), size)
+                for path, rel, size in self._walk_tree(in_dir)
+                if rel.endswith(self.ENCRYPTED_SUFFIX)]
+        encryptor._prime_master_keys(path for path, _, _ in jobs)
+        return encryptor._run_tree("decrypt", jobs, use_password, workers)
+
+    def _encrypt_tree_incremental(self, in_dir: str, out_dir: str, password: str, workers: int = None) -> TreeReport:
+        """Encrypt new and modified files only, tracked by a manifest in out_dir.
+
+        The manifest stores size, mtime, a keyed content hash and the output path of
+        every input. A file with the same size and mtime is skipped without being read;
+        if only the mtime differs, or the entry was recorded within RACY_WINDOW_NS of the
+        file's last change, the content hash decides. Outputs of deleted inputs are
+        removed. All runs share the manifest's master salt, so the KDF runs once per run.
+        """
+        start = time.perf_counter()
+        manifest_path = os.path.join(out_dir, self.MANIFEST_NAME)
+        manifest = _read_manifest(manifest_path, self.MANIFEST_VERSION)
+        salt = bytes.fromhex(manifest["salt"]) if manifest else None
+
+        encryptor = self
+        if not (self.in_session and password == self._session_password and salt in (None, self._session_salt)):
+            encryptor = self._clone(password)
+            encryptor.start_session(salt=salt)
+        hash_key = encryptor._manifest_key()
+        # Hashes are keyed, so the manifest doesn't reveal file contents; the check
+        # catches a run with another password, which would mix keys in one tree
+        check = hmac.new(hash_key, b"manifest", "sha256").hexdigest()
+        if manifest and not hmac.compare_digest(manifest["check"], check):
+            raise ValueError("Manifest was written with a different password")
+        entries = manifest["files"] if manifest else {}
+
+        report = TreeReport()
+        scan_started_ns = time.time_ns()
+        tree = self._scan_tree(in_dir)
+        jobs, pending = [], {}
+        for rel, (path, stat) in tree.items():
+            entry = entries.get(rel)
+            out_rel = entry["output"] if entry else rel + self.ENCRYPTED_SUFFIX
+            out_path = os.path.join(out_dir, out_rel)
+            if entry and entry["size"] == stat.st_size and os.path.exists(out_path):
+                if entry["mtime_ns"] == stat.st_mtime_ns and not entry["racy"]:
+                    report.skipped += 1
+                    continue
+                report.hashed += 1
+                try:
+                    digest = _file_hmac(hash_key, path, self.buffer_size)
+                except OSError as e:
+                    report.add(path, stat.st_size, str(e))
+                    continue
+                if hmac.compare_digest(digest, entry["hash"]):
+                    entries[rel] = _manifest_entry(stat, digest, out_rel, scan_started_ns, self.RACY_WINDOW_NS)
+                    report.skipped += 1
+                    continue
+            jobs.append((path, out_path, stat.st_size))
+            pending[path] = (rel, out_rel, stat)
+
+        # Large files first, as in _walk_tree
+        jobs.sort(key=lambda job: job[2], reverse=True)
+        digests = {}
+        encryptor._run_tree("encrypt", jobs, password, workers, report, hash_key, digests)
+        for path, (rel, out_rel, stat) in pending.items():
+            if path in digests:
+                entries[rel] = _manifest_entry(stat, digests[path], out_rel, scan_started_ns, self.RACY_WINDOW_NS)
+            else:
+                entries.pop(rel, None)  # Failed: retry on the next run
+
+        for rel in [rel for rel in entries if rel not in tree]:
+            out_path = os.path.join(out_dir, entries[rel]["output"])
+            try:
+                os.remove(out_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                report.errors.append((out_path, str(e)))
+                continue
+            _remove_empty_dirs(os.path.dirname(out_path), out_dir)
+            del entries[rel]
+            report.removed += 1
+
+        os.makedirs(out_dir, exist_ok=True)
+        _write_manifest(manifest_path, {"version": self.MANIFEST_VERSION, "salt": encryptor._session_salt.hex(),
+                                        "check": check, "files": entries})
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def _manifest_key(self) -> bytes:
+        """Key for the manifest content hashes, bound to the session master key"""
+        hkdf = HKDF(
+            algorithm=hashes.SHA256(),
+            length=self.KEY_SIZE,
+            salt=None,
+            info=self.MANIFEST_HKDF_INFO,
+        )
+        return hkdf.derive(self._master_keys[self._session_salt])
+
+    @staticmethod
+    def _scan_tree(in_dir: str) -> dict:
+        """Map relative path -> (path, stat) for every regular file, one stat per file"""
+        tree = {}
+        for root, _, files in os.walk(in_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                tree[os.path.relpath(path, in_dir)] = (path, os.stat(path))
+        return tree
+
+    @staticmethod
+    def _walk_tree(in_dir: str):
+        """Yield (path, relative path, size) for every regular file, largest first"""
+        entries = []
+        for root, _, files in os.walk(in_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                entries.append((path, os.path.relpath(path, in_dir), os.path.getsize(path)))
+        # Large files first so the pool doesn't end up waiting on a single big one
+        entries.sort(key=lambda entry: entry[2], reverse=True)
+        return entries
+
+    def _prime_master_keys(self, paths) -> None:
+        """Derive the master key of every distinct session once, before the workers start"""
+        prefix_size = len(self.MAGIC) + 1
+        for path in paths:
+            try:
+                with open(path, 'rb') as fin:
+                    prefix = fin.read(prefix_size + self.MASTER_SALT_SIZE)
+            except OSError:
+                continue
+            if prefix[:len(self.MAGIC)] == self.MAGIC:
+                salt = prefix[prefix_size:]
+                if len(salt) == self.MASTER_SALT_SIZE:
+                    self._master_key_for(self._session_password, salt)
+
+    def _run_tree(self, mode: str, jobs: list, password: str, workers: int = None, report: TreeReport = None,
+                  hash_key: bytes = None, digests: dict = None) -> TreeReport:
+        """Run the jobs; with hash_key the keyed hash of every processed input goes to digests"""
+        report = report or TreeReport()
+        for _, out_path, _ in jobs:
+            os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+
+        def add(in_path, size, error, digest):
+            report.add(in_path, size, error)
+            if digests is not None and digest is not None:
+                digests[in_path] = digest
+
+        workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+        start = time.perf_counter()
+        if workers == 1:
+            for job in jobs:
+                add(*_run_tree_job(self, mode, password, *job, hash_key))
+        else:
+            from concurrent.futures import ProcessPoolExecutor, as_completed  # Не нужен при работе в один поток
+
+            state = (password, self._session_salt, dict(self._master_keys), self.format_version,
+                     self.segment_size, self.buffer_size, self.use_mmap)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_tree_worker,
+                                     initargs=state) as pool:
+                futures = [pool.submit(_run_tree_job, None, mode, password, *job, hash_key) for job in jobs]
+                for future in as_completed(futures):
+                    add(*future.result())
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    @staticmethod
+    def _segment_count(plaintext_size: int, segment_size: int) -> int:
+        # An empty file still gets one (empty) final segment
+        return max(1, -(-plaintext_size // segment_size))
+
+    @staticmethod
+    def _segment_nonce(index: int) -> bytes:
+        # Every file has its own key, so a counter is a safe nonce
+        return struct.pack(">IQ", 0, index)
+
+    @staticmethod
+    def _segment_aad(header: bytes, index: int, last: bool) -> bytes:
+        # Binds each segment to its file, position and to the end of the stream
+        return header + struct.pack(">QB", index, last)
+
+    def _footer(self, aead, header: bytes, plaintext_size: int, segment_count: int) -> bytes:
+        fields = struct.pack(">QQ", plaintext_size, segment_count)
+        return fields + aead.encrypt(struct.pack(">IQ", 1, 0), b"", header + fields)
+
+    def _parse_footer(self, aead, header: bytes, footer: bytes) -> tuple[int, int]:
+        """Authenticate the index footer, returns (plaintext size, segment count)"""
+        if len(footer) != self.FOOTER_SIZE:
+            raise ValueError("Truncated file")
+        fields, tag = footer[:16], footer[16:]
+        try:
+            aead.decrypt(struct.pack(">IQ", 1, 0), tag, header + fields)
+        except InvalidTag:
+            raise ValueError("Wrong password or corrupted file footer") from None
+        return struct.unpack(">QQ", fields)
+
+    def _read_footer(self, fin, aead, header: bytes, segment_size: int) -> tuple[int, int]:
+        """Read and authenticate the index footer, returns (plaintext size, segment count)"""
+        file_size = fin.seek(0, os.SEEK_END)
+        if file_size < len(header) + self.FOOTER_SIZE:
+            raise ValueError("Truncated file")
+        fin.seek(file_size - self.FOOTER_SIZE)
+        plaintext_size, segment_count = self._parse_footer(aead, header, fin.read(self.FOOTER_SIZE))
+        expected_size = (len(header) + plaintext_size + segment_count * self.TAG_SIZE
+                         + self.FOOTER_SIZE)
+        if (segment_count != self._segment_count(plaintext_size, segment_size)
+                or file_size != expected_size):
+            raise ValueError("File size does not match its index footer")
+        return plaintext_size, segment_count
+
+    def _decrypt_segment(self, aead, header: bytes, fin, index: int, segment_count: int,
+                         segment_size: int, plaintext_size: int) -> bytes:
+        """Read segment index at the current position of fin and decrypt it"""
+        last = index == segment_count - 1
+        size = plaintext_size - index * segment_size if last else segment_size
+        data = fin.read(size + self.TAG_SIZE)
+        if len(data) != size + self.TAG_SIZE:
+            raise ValueError("Truncated segment")
+        try:
+            return aead.decrypt(self._segment_nonce(index), data, self._segment_aad(header, index, last))
+        except InvalidTag:
+            raise ValueError(f"Segment {index} failed authentication") from None
+
+    def _seal_segment(self, algorithm, header: bytes, index: int, last: bool, data, out) -> int:
+        """Encrypt one segment into out followed by its tag, returns the bytes written"""
+        encryptor = Cipher(algorithm, modes.GCM(self._segment_nonce(index))).encryptor()
+        encryptor.authenticate_additional_data(self._segment_aad(header, index, last))
+        size = encryptor.update_into(data, out)
+        encryptor.finalize()
+        out[size:size + self.TAG_SIZE] = encryptor.tag
+        return size + self.TAG_SIZE
+
+    def _open_segment(self, algorithm, header: bytes, index: int, last: bool, record, out) -> int:
+        """Decrypt one segment + tag record into out, returns the plaintext size"""
+        if len(record) < self.TAG_SIZE:
+            raise ValueError("Truncated segment")
+        tag = bytes(record[-self.TAG_SIZE:])
+        decryptor = Cipher(algorithm, modes.GCM(self._segment_nonce(index), tag)).decryptor()
+        decryptor.authenticate_additional_data(self._segment_aad(header, index, last))
+        size = decryptor.update_into(record[:-self.TAG_SIZE], out)
+        try:
+            decryptor.finalize()
+        except InvalidTag:
+            raise ValueError(f"Segment {index} failed authentication") from None
+        return size
+
+    def _encrypt_segments(self, fin, fout, key: bytes, header: bytes, segment_size: int,
+                          plaintext_size: int) -> None:
+        algorithm = algorithms.AES(key)
+        segment_count = self._segment_count(plaintext_size, segment_size)
+        per_chunk = max(1, self.buffer_size // segment_size)
+        # update_into wants block_size - 1 spare bytes after the data
+        out = memoryview(bytearray(per_chunk * (segment_size + self.TAG_SIZE) + 15))
+
+        index = 0
+        for chunk in self._input_chunks(fin, per_chunk * segment_size, plaintext_size):
+            written = 0
+            for start in range(0, len(chunk), segment_size):
+                written += self._seal_segment(algorithm, header, index, index == segment_count - 1,
+                                              chunk[start:start + segment_size], out[written:])
+                index += 1
+            fout.write(out[:written])
+
+        if plaintext_size == 0:
+            fout.write(out[:self._seal_segment(algorithm, header, 0, True, b"", out)])
+            index = 1
+        if index != segment_count:
+            raise ValueError("Input file changed during encryption")
+        fout.write(self._footer(AESGCM(key), header, plaintext_size, segment_count))
+
+    def _decrypt_segments(self, fin, fout, key: bytes, header: bytes, segment_size: int,
+                          plaintext_size: int, segment_count: int) -> None:
+        algorithm = algorithms.AES(key)
+        record_size = segment_size + self.TAG_SIZE
+        per_chunk = max(1, self.buffer_size // segment_size)
+        out = memoryview(bytearray(per_chunk * segment_size + 15))
+        ciphertext_size = plaintext_size + segment_count * self.TAG_SIZE
+
+        index = 0
+        for chunk in self._input_chunks(fin, per_chunk * record_size, ciphertext_size):
+            written = 0
+            for start in range(0, len(chunk), record_size):
+                written += self._open_segment(algorithm, header, index, index == segment_count - 1,
+                                              chunk[start:start + record_size], out[written:])
+                index += 1
+            fout.write(out[:written])
+
+        if index != segment_count:
+            raise ValueError("Truncated file")
+
+    def _crypt_segments_parallel(self, mode: str, in_filename: str, out_filename: str, key: bytes,
+                                 header: bytes, segment_size: int, plaintext_size: int,
+                                 segment_count: int, workers: int) -> None:
+        """Split the segments into contiguous batches and process them on a process pool.
+
+        Every segment has a fixed position in both files, so the workers write
+        straight into a preallocated output file.
+        """
+        ciphertext_size = len(header) + plaintext_size + segment_count * self.TAG_SIZE
+        with open(out_filename, 'wb') as fout:
+            if mode == "encrypt":
+                fout.write(header)
+                fout.truncate(ciphertext_size + self.FOOTER_SIZE)
+            else:
+                fout.truncate(plaintext_size)
+
+        workers = min(workers, segment_count)
+        batch = -(-segment_count // (workers * 4))
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_crypt_segment_batch, mode, in_filename, out_filename, key, header,
+                                   segment_size, plaintext_size, segment_count,
+                                   first, min(first + batch, segment_count))
+                       for first in range(0, segment_count, batch)]
+            for future in as_completed(futures):
+                future.result()
+
+        if mode == "encrypt":
+            with open(out_filename, 'r+b') as fout:
+                fout.seek(ciphertext_size)
+                fout.write(self._footer(AESGCM(key), header, plaintext_size, segment_count))
+
+    @staticmethod
+    def _read_full(fin, view) -> int:
+        """readinto() until view is full or the file ends"""
+        total = 0
+        while total < len(view):
+            size = fin.readinto(view[total:])
+            if not size:
+                break
+            total += size
+        return total
+
+    def _input_chunks(self, fin, chunk_size: int, limit: int = None):
+        """Yield memoryviews of chunk_size bytes of fin (the last one may be shorter).
+
+        A view is only valid until the next one is requested: it points either into
+        one reused buffer or, with use_mmap, straight into the mapped file.
+        """
+        start = fin.tell()
+        end = os.fstat(fin.fileno()).st_size
+        if limit is not None:
+            end = min(end, start + limit)
+
+        if self.use_mmap and end > start:
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(start, end, chunk_size):
+                        chunk = view[offset:min(offset + chunk_size, end)]
+                        try:
+                            yield chunk
+                        finally:
+                            chunk.release()
+                finally:
+                    view.release()
+            fin.seek(end)
+            return
+
+        buffer = memoryview(bytearray(chunk_size))
+        remaining = limit
+        while remaining is None or remaining > 0:
+            view = buffer if remaining is None or remaining >= chunk_size else buffer[:remaining]
+            size = self._read_full(fin, view)
+            if not size:
+                break
+            yield buffer[:size]
+            if remaining is not None:
+                remaining -= size
+            if size < len(view):
+                break
+
+    def _block_chunk_size(self) -> int:
+        block = algorithms.AES.block_size // 8
+        return max(block, self.buffer_size - self.buffer_size % block)
+
+    def _encrypt_v1(self, fin, fout, key: bytes, iv: bytes) -> None:
+        encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+        block = algorithms.AES.block_size // 8
+        chunk_size = self._block_chunk_size()
+        out = memoryview(bytearray(chunk_size + 2 * block))
+
+        tail = b""
+        for chunk in self._input_chunks(fin, chunk_size):
+            # Only the last chunk can end with a partial block
+            full = len(chunk) - len(chunk) % block
+            fout.write(out[:encryptor.update_into(chunk[:full], out)])
+            tail = bytes(chunk[full:])
+
+        padding_length = block - len(tail)
+        fout.write(out[:encryptor.update_into(tail + bytes([padding_length]) * padding_length, out)])
+        fout.write(encryptor.finalize())
+
+    def _decrypt_v1(self, fin, fout, key: bytes, iv: bytes) -> None:
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+        block = algorithms.AES.block_size // 8
+        chunk_size = self._block_chunk_size()
+        out = memoryview(bytearray(chunk_size + block))
+
+        # The last plaintext block carries the padding, so always hold one back
+        held = b""
+        for chunk in self._input_chunks(fin, chunk_size):
+            size = decryptor.update_into(chunk, out)
+            if size:
+                fout.write(held)
+                fout.write(out[:size - block])
+                held = bytes(out[size - block:size])
+
+        decryptor.finalize()
+        unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
+        fout.write(unpadder.update(held))
+        fout.write(unpadder.finalize())
+
+    def _decrypt_legacy(self, fin, fout, password: str) -> None:
+        salt = fin.read(self.SALT_SIZE)
+        key, iv = self._derive_key_and_iv(password, salt)
+
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+        out = memoryview(bytearray(self._block_chunk_size() + 16))
+
+        for chunk in self._input_chunks(fin, self._block_chunk_size()):
+            fout.write(out[:decryptor.update_into(chunk, out)])
+
+        final_chunk = decryptor.finalize()
+        if final_chunk:
+            padding_length = final_chunk[-1]
+            final_chunk = final_chunk[:-padding_length]
+            fout.write(final_chunk)
+
+
+def _crypt_segment_batch(mode: str, in_filename: str, out_filename: str, key: bytes, header: bytes,
+                         segment_size: int, plaintext_size: int, segment_count: int,
+                         first: int, stop: int) -> None:
+    """Process pool job: encrypt or decrypt segments [first, stop) in place"""
+    encryptor = FileEncryptor()
+    aead = AESGCM(key)
+    record_size = segment_size + FileEncryptor.TAG_SIZE
+    plain_offset = first * segment_size
+    cipher_offset = len(header) + first * record_size
+
+    with open(in_filename, 'rb') as fin, open(out_filename, 'r+b') as fout:
+        if mode == "encrypt":
+            fin.seek(plain_offset)
+            fout.seek(cipher_offset)
+            for index in range(first, stop):
+                last = index == segment_count - 1
+                size = plaintext_size - index * segment_size if last else segment_size
+                chunk = fin.read(size)
+                if len(chunk) != size:
+                    raise ValueError("Input file changed during encryption")
+                fout.write(aead.encrypt(encryptor._segment_nonce(index), chunk,
+                                        encryptor._segment_aad(header, index, last)))
+        else:
+            fin.seek(cipher_offset)
+            fout.seek(plain_offset)
+            for index in range(first, stop):
+                fout.write(encryptor._decrypt_segment(aead, header, fin, index, segment_count,
+                                                      segment_size, plaintext_size))
+
+
+_tree_worker = None
+
+
+def _init_tree_worker(password: str, session_salt: bytes, master_keys: dict, format_version: int,
+                      segment_size: int, buffer_size: int, use_mmap: bool) -> None:
+    """Process pool initializer: rebuild the parent's session without running the KDF again"""
+    global _tree_worker
+    _tree_worker = FileEncryptor(password, format_version, segment_size, buffer_size, use_mmap)
+    _tree_worker._session_password = password
+    _tree_worker._session_salt = session_salt
+    _tree_worker._master_keys = master_keys
+
+
+def _run_tree_job(encryptor, mode: str, password: str, in_path: str, out_path: str, size: int,
+                  hash_key: bytes = None):
+    encryptor = encryptor or _tree_worker
+    try:
+        # Hash before encrypting: if the file changes in between, the stored hash is the
+        # older one and the next incremental run sees the change
+        digest = _file_hmac(hash_key, in_path, encryptor.buffer_size) if hash_key else None
+        if mode == "encrypt":
+            encryptor._encrypt_file(in_path, out_path, password)
+        else:
+            encryptor._decrypt_file(in_path, out_path, password)
+        return in_path, size, None, digest
+    except Exception as e:
+        return in_path, size, str(e), None
+
+
+def _file_hmac(key: bytes, path: str, buffer_size: int) -> str:
+    """Keyed SHA-256 of a file's content, hex encoded"""
+    digest = hmac.new(key, digestmod="sha256")
+    with open(path, 'rb') as f:
+        while chunk := f.read(buffer_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _manifest_entry(stat: os.stat_result, digest: str, output: str, scan_started_ns: int, racy_window_ns: int) -> dict:
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest, "output": output,
+            "racy": stat.st_mtime_ns >= scan_started_ns - racy_window_ns}
+
+
+def _read_manifest(path: str, version: int):
+    """Return the manifest dict or None if there is none yet"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if manifest.get("version") != version:
+        raise ValueError(f"Unsupported manifest version: {manifest.get('version')}")
+    return manifest
+
+
+def _write_manifest(path: str, manifest: dict) -> None:
+    """Write the manifest atomically so an interrupted run leaves the previous one intact"""
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _remove_empty_dirs(directory: str, top: str) -> None:
+    """Remove directory and its parents up to top while they are empty"""
+    top = os.path.abspath(top)
+    directory = os.path.abspath(directory)
+    while directory != top and directory.startswith(top + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return
+        directory = os.path.dirname(directory)
+
+
+def _record_transfer(operation: str, in_filename: str, start: float) -> None:
+    """Record bytes and bytes/sec of one finished file operation"""
+    if not metrics.enabled:
+        return
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(in_filename)
+    metrics.inc("crypt_bytes_total", size, operation=operation)
+    metrics.observe("crypt_file_seconds", elapsed, operation=operation)
+    if elapsed > 0:
+        metrics.observe("crypt_throughput_bytes_per_second", size / elapsed, THROUGHPUT_BUCKETS, operation=operation)
+
+
+def _crypt_pipe(encryptor: FileEncryptor, mode: str, filename: str, output: str) -> None:
+    """Stream between files and stdin/stdout, messages go to stderr to keep stdout clean"""
+    import getpass
+    import sys
+
+    password = getpass.getpass(f"Enter password for {mode}ion: ", stream=sys.stderr)
+    source = sys.stdin.buffer if filename == "-" else open(filename, 'rb')
+    target = sys.stdout.buffer if output in (None, "-") else open(output, 'wb')
+    try:
+        if mode == "encrypt":
+            chunks = encryptor.encrypt_stream(source, password)
+        else:
+            chunks = encryptor.decrypt_stream(source, password)
+        for chunk in chunks:
+            target.write(chunk)
+        target.flush()
+    except Exception as e:
+        print(f"{mode.capitalize()}ion error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if target is not sys.stdout.buffer:
+            target.close()
+
+
+def main():
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Encrypt or decrypt a file or a whole directory")
+    parser.add_argument("mode", choices=["encrypt", "decrypt"])
+    parser.add_argument("filename", help="file or directory, '-' to read stdin")
+    parser.add_argument("-o", "--output", default=None,
+                        help="output file, '-' for stdout (default: stdout for stdin, "
+                             "otherwise next to the input)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes for directories (default: number of CPUs) "
+                             "or for the segments of a single file (default: 1)")
+    parser.add_argument("--metrics", choices=["json", "prometheus"], default=None,
+                        help="print timings (KDF, MB/s, errors) to stderr on exit")
+    parser.add_argument("--incremental", action="store_true",
+                        help="directories only: encrypt just the files changed since the previous "
+                             "--incremental run (manifest kept in the output directory)")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(message)s")
+    if args.metrics:
+        import atexit
+
+        metrics.enable()
+        export = metrics.to_json if args.metrics == "json" else metrics.to_prometheus
+        atexit.register(lambda: print(export(), file=sys.stderr))
+
+    mode = args.mode
+    filename = args.filename.rstrip(os.sep) or args.filename
+    if args.incremental and (mode != "encrypt" or filename == "-" or args.output == "-"
+                             or not os.path.isdir(filename)):
+        parser.error("--incremental applies only to encrypting a directory")
+
+    encryptor = FileEncryptor()
+
+    if filename == "-" or args.output == "-":
+        _crypt_pipe(encryptor, mode, filename, args.output)
+    elif os.path.isdir(filename):
+        if mode == "encrypt":
+            output_dir = filename + FileEncryptor.ENCRYPTED_SUFFIX
+            password = input("Enter password for encryption: ")
+            report = encryptor.encrypt_tree(filename, output_dir, password, args.workers, args.incremental)
+        else:
+            if not filename.endswith(FileEncryptor.ENCRYPTED_SUFFIX):
+                print("Error: Directory must have .encrypted extension")
+                sys.exit(1)
+            output_dir = filename[:-len(FileEncryptor.ENCRYPTED_SUFFIX)]
+            password = input("Enter password for decryption: ")
+            report = encryptor.decrypt_tree(filename, output_dir, password, args.workers)
+
+        for path, error in report.errors:
+            print(f"{path}: {error}")
+        print(f"{report.files} files, {report.bytes / 2 ** 20:.1f} MiB in {report.elapsed:.2f}s "
+              f"({report.throughput / 2 ** 20:.1f} MiB/s, {report.files_per_second:.1f} files/s) "
+              f"to {output_dir}")
+        if args.incremental:
+            print(f"{report.skipped} unchanged ({report.hashed} hashed), {report.removed} removed")
+        if report.errors:
+            print(f"{len(report.errors)} files failed.")
+            sys.exit(1)
+    elif mode == "encrypt":
+        output_file = args.output or filename + ".encrypted"
+        password = input("Enter password for encryption: ")
+        if encryptor.encrypt_file(filename, output_file, password, args.workers):
+            print(f"File encrypted successfully to {output_file}")
+        else:
+            print("Encryption failed.")
+            sys.exit(1)
+    else:
+        if not args.output and not filename.endswith(".encrypted"):
+            print("Error: File must have .encrypted extension")
+            sys.exit(1)
+        output_file = args.output or filename.replace(".encrypted", "")
+        password = input("Enter password for decryption: ")
+        if encryptor.decrypt_file(filename, output_file, password, args.workers):
+            print(f"File decrypted successfully to {output_file}")
+        else:
+            print("Decryption failed.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()